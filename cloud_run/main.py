@@ -4,7 +4,8 @@ import base64
 from flask import Flask, request
 from google.cloud import storage
 import logging
-from eon.cli import main as eon_main
+from eon.core.data.processor import DataProcessor
+from eon.core.data.pipeline import StreamingEncryptor, iter_source
 
 app = Flask(__name__)
 
@@ -12,19 +13,29 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def download_from_gcs(bucket_name, source_blob_name, destination_file_name):
-    """Downloads a blob from GCS."""
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(source_blob_name)
-    blob.download_to_filename(destination_file_name)
+def encrypt_gcs_object(bucket_name, source_blob_name, destination_blob_name):
+    """Streams a blob through the FHE encryption pipeline back to GCS.
+
+    Requires EON_CONTEXT_PATH to point at an existing context file; a freshly
+    generated key would never be saved and the output could not be decrypted.
+    """
+    context_path = os.getenv('EON_CONTEXT_PATH')
+    if not context_path:
+        raise ValueError("EON_CONTEXT_PATH must point to an existing FHE context file")
 
-def upload_to_gcs(bucket_name, source_file_name, destination_blob_name):
-    """Uploads a file to GCS."""
     storage_client = storage.Client()
     bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(destination_blob_name)
-    blob.upload_from_filename(source_file_name)
+    source_blob = bucket.blob(source_blob_name)
+    destination_blob = bucket.blob(destination_blob_name)
+
+    processor = DataProcessor({'fhe': {'context_path': context_path, 'create_context': False}})
+    try:
+        encryptor = StreamingEncryptor(processor)
+        with source_blob.open('rb') as source, destination_blob.open('wb') as destination:
+            chunks = iter_source(source, encryptor.chunk_size, name=source_blob_name)
+            return encryptor.encrypt_stream(chunks, destination)
+    finally:
+        processor.close()
 
 @app.route('/', methods=['POST'])
 def handle_pubsub_message():
@@ -45,34 +56,14 @@ def handle_pubsub_message():
             bucket_name = message_data['bucket']
             file_name = message_data['file']
             
-            # Create temporary directories for processing
-            os.makedirs('/tmp/input', exist_ok=True)
-            os.makedirs('/tmp/output', exist_ok=True)
-            
-            input_file = f'/tmp/input/{file_name}'
-            encrypted_file = f'/tmp/output/encrypted_{file_name}'
-            
-            # Download file from GCS
-            logger.info(f"Downloading file {file_name} from bucket {bucket_name}")
-            download_from_gcs(bucket_name, file_name, input_file)
-            
-            # Perform FHE encryption using eon-protocol
-            logger.info("Starting FHE encryption")
+            # Stream the file through FHE encryption without staging it in /tmp
+            logger.info(f"Encrypting file {file_name} from bucket {bucket_name}")
             try:
-                # Initialize EON protocol with the input file
-                eon_main(['encrypt', 
-                         '--input', input_file,
-                         '--output', encrypted_file])
-                
-                # Upload encrypted file back to GCS
-                logger.info("Uploading encrypted file to GCS")
-                upload_to_gcs(bucket_name, 
-                            encrypted_file, 
-                            f'encrypted/{file_name}')
-                
-                # Clean up temporary files
-                os.remove(input_file)
-                os.remove(encrypted_file)
+                stats = encrypt_gcs_object(bucket_name,
+                                           file_name,
+                                           f'encrypted/{file_name}')
+                logger.info(f"Encrypted {stats['values']} values "
+                            f"into {stats['chunks']} ciphertexts")
                 
                 return ('', 204)
                 
@@ -2,9 +2,11 @@
 from fastapi import FastAPI, HTTPException, Depends
 from typing import Dict, Any, Optional
 import logging
+import math
+import uuid
 from pydantic import BaseModel
 from ..core.node import NodeManager
-from ..core.scheduler import TaskManager
+from ..core.scheduler import TaskManager, Task, AdmissionRejected
 from ..utils.auth import AuthHandler
 
 app = FastAPI(title="EON Protocol API")
@@ -27,27 +29,30 @@ class TaskStatusResponse(BaseModel):
     error: Optional[str] = None
 
 auth_handler = AuthHandler()
-node_manager = NodeManager()
-task_manager = TaskManager()
+node_manager = NodeManager({})
+task_manager = TaskManager({})
 
 @app.post("/api/v1/compute", response_model=ComputeResponse)
 async def compute(
     request: ComputeRequest,
-    token: str = Depends(auth_handler.auth_wrapper)
+    token: Dict[str, Any] = Depends(auth_handler.auth_wrapper)
 ):
-    """提交计算任务"""
+    """提交计算任务，过载或超出租户限流时返回 429"""
     try:
-        # 创建任务
-        task_id = task_manager.submit_task({
-            'data_id': request.data_id,
-            'operation': request.operation,
-            'params': request.params
-        })
+        # 创建任务，按令牌中的用户进行租户限流
+        task = Task(str(uuid.uuid4()), 1, request.data_id, request.operation, request.params)
+        task_id = task_manager.submit_task(task, tenant=token.get('sub'))
         
         return ComputeResponse(
             task_id=task_id,
             status="submitted"
         )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={'Retry-After': str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"Failed to submit computation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -67,6 +72,38 @@ async def get_task_status(
         logger.error(f"Failed to get task status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/api/v1/task/{task_id}", response_model=ComputeResponse)
+def cancel_task(
+    task_id: str,
+    token: Dict[str, Any] = Depends(auth_handler.auth_wrapper)
+):
+    """取消任务，任务已结束时返回 409
+
+    取消已派发的任务需要同步调用计算节点，普通函数由 FastAPI 放到线程池执行，不阻塞事件循环。
+    """
+    try:
+        if not task_manager.cancel_task(task_id):
+            raise HTTPException(status_code=409, detail=f"任务已结束: {task_id}")
+        return ComputeResponse(task_id=task_id, status="cancelled")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to cancel task: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/metrics/queue")
+async def queue_metrics(
+    token: Dict[str, Any] = Depends(auth_handler.auth_wrapper)
+):
+    """任务队列指标：各优先级与各租户的排队数、等待时间分布、丢弃数和准入拒绝数"""
+    try:
+        return task_manager.get_queue_metrics()
+    except Exception as e:
+        logger.error(f"Failed to get queue metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/v1/health")
 async def health_check():
     """健康检查接口"""
@@ -9,6 +9,10 @@ class OperationType(str, Enum):
     SUM = "sum"
     MULTIPLY = "multiply"
     ADD = "add"
+    EXPRESSION = "expression"
+    DOT = "dot"
+    MATMUL = "matmul"
+    POLYVAL = "polyval"
 
 class ComputationRequest(BaseModel):
     data_id: str = Field(..., description="Data identifier")
@@ -0,0 +1,60 @@
+import argparse
+import logging
+from typing import Dict, Any, List, Optional
+import yaml
+from .core.data.processor import DataProcessor
+from .core.data.pipeline import StreamingEncryptor
+
+def load_config(config_path: Optional[str]) -> Dict[str, Any]:
+    """加载配置文件"""
+    if not config_path:
+        return {}
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+def encrypt(args: argparse.Namespace) -> Dict[str, Any]:
+    """流式加密输入文件
+
+    必须使用已有的上下文文件加密，新生成的密钥不会保存，密文将无法解密。
+    """
+    config = load_config(args.config)
+    fhe_config = dict(config.get('fhe', {}))
+    if args.context:
+        fhe_config['context_path'] = args.context
+    if not fhe_config.get('context_path'):
+        raise ValueError("加密需要已有的FHE上下文，请通过 --context 或配置 fhe.context_path 指定")
+    fhe_config['create_context'] = False
+
+    processor = DataProcessor({**config, 'fhe': fhe_config})
+    pipeline_config = dict(config.get('pipeline', {}))
+    if args.chunk_size:
+        pipeline_config['chunk_size'] = args.chunk_size
+    if args.workers:
+        pipeline_config['workers'] = args.workers
+
+    try:
+        encryptor = StreamingEncryptor(processor, pipeline_config)
+        return encryptor.encrypt_file(args.input, args.output)
+    finally:
+        processor.close()
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(prog='eon', description='EON Protocol CLI')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    encrypt_parser = subparsers.add_parser('encrypt', help='流式加密数据文件')
+    encrypt_parser.add_argument('--input', required=True, help='输入文件(.csv/.npy/.npz)')
+    encrypt_parser.add_argument('--output', required=True, help='密文输出文件')
+    encrypt_parser.add_argument('--config', help='配置文件路径')
+    encrypt_parser.add_argument('--context', help='序列化FHE上下文路径')
+    encrypt_parser.add_argument('--chunk-size', type=int, help='每个密文的数值个数')
+    encrypt_parser.add_argument('--workers', type=int, help='加密进程数')
+    encrypt_parser.set_defaults(handler=encrypt)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    main()
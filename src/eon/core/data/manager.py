@@ -1,8 +1,9 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator
 import numpy as np
 import json
 from pathlib import Path
 import logging
+from .pipeline import iter_npz
 
 class DataManager:
     """数据管理器，处理数据存储和检索"""
@@ -59,6 +60,15 @@ class DataManager:
             self.logger.error(f"数据检索失败: {str(e)}")
             raise
             
+    def iter_data(self, data_id: str, chunk_size: int) -> Iterator[np.ndarray]:
+        """按块流式读取数据，避免一次性加载整个数组"""
+        try:
+            data_path = self.storage_path / f"{data_id}.npz"
+            yield from iter_npz(data_path, chunk_size)
+        except Exception as e:
+            self.logger.error(f"数据流式读取失败: {str(e)}")
+            raise
+
     def _generate_id(self) -> str:
         """生成唯一数据ID"""
         import uuid
@@ -0,0 +1,195 @@
+from typing import Dict, Any, Optional, Iterator, Iterable, BinaryIO, Union
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import threading
+import zipfile
+import struct
+import queue
+import logging
+import time
+from .processor import DataProcessor
+
+FRAME_HEADER = struct.Struct('>Q')
+
+# 队列结束标记
+_END = object()
+
+def iter_npy(fileobj: BinaryIO, chunk_size: int) -> Iterator[np.ndarray]:
+    """从.npy字节流中按块读取一维数据"""
+    version = np.lib.format.read_magic(fileobj)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fileobj)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fileobj)
+    if dtype.hasobject:
+        raise ValueError("不支持对象类型数组的流式读取")
+    if fortran_order and len(shape) > 1:
+        # 列优先存储的多维数组无法按行优先顺序逐块读取
+        raise ValueError("不支持列优先（fortran_order）多维数组的流式读取")
+
+    remaining = int(np.prod(shape))
+    while remaining > 0:
+        count = min(chunk_size, remaining)
+        buffer = fileobj.read(count * dtype.itemsize)
+        if len(buffer) != count * dtype.itemsize:
+            raise ValueError("数组数据不完整")
+        yield np.frombuffer(buffer, dtype=dtype).astype(float)
+        remaining -= count
+
+def iter_npz(path: Union[str, Path, BinaryIO], chunk_size: int,
+             key: str = 'data') -> Iterator[np.ndarray]:
+    """从.npz归档中流式读取指定数组，无需整体解压"""
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(f"{key}.npy") as member:
+            yield from iter_npy(member, chunk_size)
+
+def iter_csv(source: Union[str, Path, BinaryIO], chunk_size: int,
+             rows_per_read: int = 10000) -> Iterator[np.ndarray]:
+    """按行块读取CSV数值列，并按行展开为一维数据块"""
+    buffer = np.empty(0)
+    for frame in pd.read_csv(source, chunksize=rows_per_read):
+        values = frame.select_dtypes(include='number').to_numpy(dtype=float).ravel()
+        buffer = np.concatenate([buffer, values])
+        while len(buffer) >= chunk_size:
+            yield buffer[:chunk_size]
+            buffer = buffer[chunk_size:]
+    if len(buffer):
+        yield buffer
+
+def iter_source(source: Union[str, Path, BinaryIO], chunk_size: int,
+                name: Optional[str] = None) -> Iterator[np.ndarray]:
+    """根据文件后缀选择流式读取器"""
+    suffix = Path(name or str(source)).suffix.lower()
+    if suffix == '.csv':
+        yield from iter_csv(source, chunk_size)
+    elif suffix == '.npy':
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as f:
+                yield from iter_npy(f, chunk_size)
+        else:
+            yield from iter_npy(source, chunk_size)
+    elif suffix == '.npz':
+        yield from iter_npz(source, chunk_size)
+    else:
+        raise ValueError(f"不支持的文件格式: {suffix}")
+
+def write_frame(output: BinaryIO, payload: bytes):
+    """写入一个长度前缀的密文帧"""
+    output.write(FRAME_HEADER.pack(len(payload)))
+    output.write(payload)
+
+def read_frames(input: BinaryIO) -> Iterator[bytes]:
+    """逐帧读取流式加密输出"""
+    while True:
+        header = input.read(FRAME_HEADER.size)
+        if not header:
+            return
+        (length,) = FRAME_HEADER.unpack(header)
+        yield input.read(length)
+
+class StreamingEncryptor:
+    """流式加密管道：读取 → 预处理 → 加密 → 序列化 → 写出
+
+    读取线程、加密进程池与写出线程之间通过有界队列衔接，
+    内存占用只与在途数据块数量有关，与输入文件大小无关。
+    """
+
+    def __init__(self, processor: DataProcessor, config: Optional[Dict[str, Any]] = None):
+        self.processor = processor
+        self.config = config or {}
+        self.chunk_size = self.config.get(
+            'chunk_size', processor.fhe_engine.packer.slot_count
+        )
+        self.workers = self.config.get('workers')
+        self.max_in_flight = self.config.get('max_in_flight', 16)
+        self.logger = logging.getLogger(__name__)
+
+    def encrypt_file(self, input_path: Union[str, Path],
+                     output_path: Union[str, Path],
+                     params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """流式加密本地文件"""
+        with open(output_path, 'wb') as output:
+            return self.encrypt_stream(
+                iter_source(input_path, self.chunk_size), output, params
+            )
+
+    def encrypt_stream(self, chunks: Iterable[np.ndarray],
+                       output: BinaryIO,
+                       params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """加密数据块流并按输入顺序写出密文帧"""
+        if params and params.get('normalize', False):
+            raise ValueError("流式加密不支持需要全局统计量的标准化")
+
+        read_queue = queue.Queue(maxsize=self.max_in_flight)
+        write_queue = queue.Queue(maxsize=self.max_in_flight)
+        errors = []
+        stop = threading.Event()
+        stats = {'chunks': 0, 'values': 0, 'bytes': 0}
+        start_time = time.time()
+
+        def read_loop():
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    read_queue.put(self.processor.preprocess_data(chunk, params))
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                read_queue.put(_END)
+
+        def write_loop():
+            try:
+                while True:
+                    item = write_queue.get()
+                    if item is _END:
+                        return
+                    future, size = item
+                    payload = future.result()
+                    write_frame(output, payload)
+                    stats['chunks'] += 1
+                    stats['values'] += size
+                    stats['bytes'] += len(payload)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+                # 排空队列，避免加密阶段阻塞
+                while write_queue.get() is not _END:
+                    pass
+
+        reader = threading.Thread(target=read_loop, daemon=True)
+        writer = threading.Thread(target=write_loop, daemon=True)
+        reader.start()
+        writer.start()
+
+        try:
+            while True:
+                chunk = read_queue.get()
+                if chunk is _END:
+                    break
+                if stop.is_set():
+                    continue
+                future = self.processor.submit_encrypt(chunk, self.workers)
+                write_queue.put((future, len(chunk)))
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            # 排空读取队列，让读取线程退出
+            while read_queue.get() is not _END:
+                pass
+        finally:
+            write_queue.put(_END)
+            writer.join()
+            reader.join()
+
+        if errors:
+            self.logger.error(f"流式加密失败: {str(errors[0])}")
+            raise errors[0]
+
+        stats['duration'] = time.time() - start_time
+        self.logger.info(
+            f"流式加密完成: {stats['chunks']} 个密文, {stats['values']} 个数值"
+        )
+        return stats
@@ -3,8 +3,13 @@ from typing import Dict, Any, List, Optional
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, Future
+import multiprocessing
 import logging
+import os
+import tenseal as ts
 from ..fhe.engine import FHEEngine
+from ..fhe.chunking import SlotChunker
 
 @dataclass
 class DataBatch:
@@ -12,6 +17,22 @@ class DataBatch:
     data: np.ndarray
     metadata: Dict[str, Any]
 
+# 加密工作进程持有的公钥上下文与分块器
+_worker_context: Optional[ts.Context] = None
+_worker_chunker: Optional[SlotChunker] = None
+
+def _init_encrypt_worker(context_bytes: bytes, slot_count: int):
+    """工作进程初始化：反序列化一次公钥上下文并常驻"""
+    global _worker_context, _worker_chunker
+    _worker_context = ts.context_from(context_bytes)
+    _worker_chunker = SlotChunker(slot_count)
+
+def _encrypt_worker(data: np.ndarray) -> bytes:
+    """在工作进程中加密并直接返回序列化密文，与 FHEEngine.encrypt 一样对超长数组分块"""
+    if np.size(data) > _worker_chunker.slot_count:
+        return _worker_chunker.serialize(_worker_chunker.encrypt(_worker_context, data))
+    return ts.ckks_vector(_worker_context, data).serialize()
+
 class DataProcessor:
     """数据处理器"""
     
@@ -19,6 +40,8 @@ class DataProcessor:
         self.config = config
         self.fhe_engine = FHEEngine(config.get('fhe', {}))
         self.logger = logging.getLogger(__name__)
+        self.encrypt_pool: Optional[ProcessPoolExecutor] = None
+        self.encrypt_pool_size = 0
 
     def preprocess_data(self, data: np.ndarray, 
                        params: Optional[Dict[str, Any]] = None) -> np.ndarray:
@@ -79,6 +102,68 @@ class DataProcessor:
             self.logger.error(f"数据批次加密失败: {str(e)}")
             raise
 
+    def encrypt_batches(self, batches: List[DataBatch],
+                        workers: Optional[int] = None) -> List[DataBatch]:
+        """多进程并行加密数据批次
+
+        返回的批次数据为序列化后的密文，顺序与输入一致。
+        """
+        try:
+            pool = self._get_encrypt_pool(workers)
+            chunksize = max(1, len(batches) // (self.encrypt_pool_size * 4))
+            results = pool.map(
+                _encrypt_worker,
+                [batch.data for batch in batches],
+                chunksize=chunksize
+            )
+            return [
+                DataBatch(
+                    id=batch.id,
+                    data=serialized,
+                    metadata={
+                        **batch.metadata,
+                        'encrypted': True,
+                        'serialized': True
+                    }
+                )
+                for batch, serialized in zip(batches, results)
+            ]
+        except Exception as e:
+            self.logger.error(f"并行批次加密失败: {str(e)}")
+            raise
+
+    def submit_encrypt(self, data: np.ndarray,
+                       workers: Optional[int] = None) -> Future:
+        """异步提交单个数据块到加密进程池，结果为序列化密文"""
+        return self._get_encrypt_pool(workers).submit(_encrypt_worker, data)
+
+    def _get_encrypt_pool(self, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """获取（必要时创建）常驻加密进程池"""
+        workers = workers or self.config.get('encrypt_workers') or os.cpu_count() or 1
+        if self.encrypt_pool is not None and self.encrypt_pool_size == workers:
+            return self.encrypt_pool
+
+        self.close()
+        # spawn 避免在 TenSEAL 内部线程存在时 fork
+        self.encrypt_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_encrypt_worker,
+            initargs=(self.fhe_engine.public_context_bytes(),
+                      self.fhe_engine.chunker.slot_count)
+        )
+        self.encrypt_pool_size = workers
+        self.logger.info(f"加密进程池已启动: {workers} 个工作进程")
+        return self.encrypt_pool
+
+    def close(self):
+        """关闭加密进程池和引擎线程池"""
+        if self.encrypt_pool is not None:
+            self.encrypt_pool.shutdown()
+            self.encrypt_pool = None
+            self.encrypt_pool_size = 0
+        self.fhe_engine.close()
+
     def validate_data(self, data: np.ndarray, 
                      schema: Dict[str, Any]) -> bool:
         """数据验证"""
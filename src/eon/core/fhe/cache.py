@@ -0,0 +1,192 @@
+from typing import Dict, Any, Optional, Callable, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import hashlib
+import logging
+import json
+import time
+
+class ResultCache:
+    """同态计算结果缓存
+
+    以 (数据ID, 操作, 规范化参数) 为键，内存层按 LRU 淘汰并受条目数和字节数约束，
+    条目可设置 TTL；配置了 spill_path 时被淘汰的结果写入磁盘层，命中后重新提升到内存。
+    数据ID必须能唯一标识密文内容（例如内容哈希），否则需要自行设置 TTL。
+    内存层保存序列化后的字节，每次命中都反序列化出新的密文对象，调用方可以原地修改。
+    """
+
+    def __init__(self,
+                 config: Optional[Dict[str, Any]],
+                 serialize: Callable[[Any], bytes],
+                 deserialize: Callable[[bytes], Any]):
+        config = config or {}
+        self.max_entries = config.get('max_entries', 1024)
+        self.max_bytes = config.get('max_bytes', 256 * 1024 * 1024)
+        self.ttl = config.get('ttl')
+        self.max_spill_bytes = config.get('max_spill_bytes', 1024 * 1024 * 1024)
+        spill_path = config.get('spill_path')
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.serialize = serialize
+        self.deserialize = deserialize
+
+        # 键 -> (序列化结果, 字节数, 过期时间)
+        self.memory: 'OrderedDict[str, Tuple[bytes, int, Optional[float]]]' = OrderedDict()
+        self.memory_bytes = 0
+        # 键 -> (字节数, 过期时间)
+        self.disk: 'OrderedDict[str, Tuple[int, Optional[float]]]' = OrderedDict()
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.counters = {
+            'hits': 0, 'disk_hits': 0, 'misses': 0,
+            'evictions': 0, 'spills': 0, 'expirations': 0
+        }
+
+        if self.spill_path:
+            self.spill_path.mkdir(parents=True, exist_ok=True)
+            # 旧进程的溢出文件可能属于其他密钥，不复用
+            for stale in self.spill_path.glob('*.ct'):
+                stale.unlink()
+
+    @staticmethod
+    def make_key(data_id: str, operation: str,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """生成缓存键，参数按键排序后序列化，顺序不同的等价参数命中同一条目"""
+        canonical = json.dumps(
+            [data_id, operation, params or {}],
+            sort_keys=True, separators=(',', ':'), default=_to_json
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """查找缓存结果，未命中返回 None"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[2] is None or entry[2] > now:
+                    self.memory.move_to_end(key)
+                    self.counters['hits'] += 1
+                    data = entry[0]
+                else:
+                    self._drop_memory(key)
+                    self.counters['expirations'] += 1
+                    entry = None
+
+            if entry is None:
+                disk_entry = self.disk.pop(key, None)
+                if disk_entry is None:
+                    self.counters['misses'] += 1
+                    return None
+                self.disk_bytes -= disk_entry[0]
+
+        if entry is not None:
+            return self.deserialize(data)
+
+        path = self._spill_file(key)
+        try:
+            if disk_entry[1] is not None and disk_entry[1] <= now:
+                with self.lock:
+                    self.counters['expirations'] += 1
+                    self.counters['misses'] += 1
+                return None
+            data = path.read_bytes()
+            value = self.deserialize(data)
+        except Exception as e:
+            self.logger.error(f"读取溢出缓存失败: {str(e)}")
+            with self.lock:
+                self.counters['misses'] += 1
+            return None
+        finally:
+            path.unlink(missing_ok=True)
+
+        with self.lock:
+            self.counters['disk_hits'] += 1
+            self._insert(key, data, disk_entry[0], disk_entry[1])
+        return value
+
+    def put(self, key: str, value: Any):
+        """写入缓存结果"""
+        try:
+            data = self.serialize(value)
+        except Exception as e:
+            self.logger.error(f"缓存结果失败: {str(e)}")
+            return
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            if key in self.memory:
+                self._drop_memory(key)
+            self._insert(key, data, size, expires_at)
+
+    def clear(self):
+        """清空内存层与磁盘层"""
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+            keys = list(self.disk)
+            self.disk.clear()
+            self.disk_bytes = 0
+        for key in keys:
+            self._spill_file(key).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等缓存指标"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats.update({
+                'entries': len(self.memory),
+                'bytes': self.memory_bytes,
+                'disk_entries': len(self.disk),
+                'disk_bytes': self.disk_bytes
+            })
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _insert(self, key: str, data: bytes, size: int, expires_at: Optional[float]):
+        """插入内存层并按 LRU 淘汰（调用方持有锁）"""
+        self.memory[key] = (data, size, expires_at)
+        self.memory_bytes += size
+        while self.memory and (len(self.memory) > self.max_entries or
+                               self.memory_bytes > self.max_bytes):
+            old_key, (old_data, old_size, old_expires) = self.memory.popitem(last=False)
+            self.memory_bytes -= old_size
+            self.counters['evictions'] += 1
+            if self.spill_path:
+                self._spill(old_key, old_data, old_size, old_expires)
+
+    def _drop_memory(self, key: str):
+        _, size, _ = self.memory.pop(key)
+        self.memory_bytes -= size
+
+    def _spill(self, key: str, data: bytes, size: int, expires_at: Optional[float]):
+        """把淘汰的结果写入磁盘层（调用方持有锁）"""
+        if size > self.max_spill_bytes:
+            return
+        if expires_at is not None and expires_at <= time.monotonic():
+            return
+        try:
+            self._spill_file(key).write_bytes(data)
+        except Exception as e:
+            self.logger.error(f"写入溢出缓存失败: {str(e)}")
+            return
+        self.disk[key] = (size, expires_at)
+        self.disk_bytes += size
+        self.counters['spills'] += 1
+        while self.disk_bytes > self.max_spill_bytes:
+            old_key, (old_size, _) = self.disk.popitem(last=False)
+            self.disk_bytes -= old_size
+            self._spill_file(old_key).unlink(missing_ok=True)
+
+    def _spill_file(self, key: str) -> Path:
+        return self.spill_path / f"{key}.ct"
+
+def _to_json(value: Any) -> Any:
+    """参数中的 numpy 数组/标量转换为可序列化类型"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"无法序列化的参数类型: {type(value).__name__}")
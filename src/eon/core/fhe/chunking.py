@@ -0,0 +1,173 @@
+from typing import List, Dict, Any, Optional, Union, Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+import operator
+import struct
+import json
+import numpy as np
+import tenseal as ts
+
+CHUNKED_MAGIC = b'EONCHNK1'
+_HEADER_SIZE = struct.Struct('>I')
+
+Operand = Union['ChunkedCiphertext', float, int, List[float], np.ndarray]
+
+
+@dataclass
+class ChunkedCiphertext:
+    """超过槽位数的长向量，按槽位大小切分到多个密文
+
+    每个分块占满 chunk_size 个槽位，最后一块不足部分补零；所有运算都保持
+    补零槽位为零，因此求和可以先把各分块逐元素相加，再做一次旋转求和。
+    """
+    chunks: List[ts.CKKSVector]
+    length: int
+    chunk_size: int
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunks)
+
+    def size(self) -> int:
+        """逻辑长度（不含补零槽位）"""
+        return self.length
+
+    def add(self, other: Operand, executor: Optional[Executor] = None) -> 'ChunkedCiphertext':
+        """逐元素相加，other 可为标量、等长明文数组或对齐的分块密文"""
+        return self._apply(operator.add, other, executor, keep_padding=True)
+
+    def sub(self, other: Operand, executor: Optional[Executor] = None) -> 'ChunkedCiphertext':
+        """逐元素相减"""
+        return self._apply(operator.sub, other, executor, keep_padding=True)
+
+    def mul(self, other: Operand, executor: Optional[Executor] = None) -> 'ChunkedCiphertext':
+        """逐元素相乘"""
+        return self._apply(operator.mul, other, executor)
+
+    __add__ = __radd__ = add
+    __mul__ = __rmul__ = mul
+    __sub__ = sub
+
+    def sum(self, executor: Optional[Executor] = None) -> ts.CKKSVector:
+        """全部元素求和，返回长度为1的密文
+
+        各分块按二叉树逐层两两相加（每层的加法交给执行器调度），
+        最后只对一个密文做旋转求和，旋转次数与分块数无关。
+        """
+        chunks = self.chunks
+        while len(chunks) > 1:
+            pairs = [chunks[i:i + 2] for i in range(0, len(chunks), 2)]
+            chunks = _map(_add_pair, pairs, executor)
+        return chunks[0].sum()
+
+    def mean(self, executor: Optional[Executor] = None) -> ts.CKKSVector:
+        """全部元素的均值"""
+        return self.sum(executor) * (1.0 / self.length)
+
+    def dot(self, other: Operand, executor: Optional[Executor] = None) -> ts.CKKSVector:
+        """与明文向量或对齐的分块密文做内积"""
+        return self.mul(other, executor).sum(executor)
+
+    def _apply(self, op: Callable, other: Operand, executor: Optional[Executor],
+               keep_padding: bool = False) -> 'ChunkedCiphertext':
+        operands = self._split_operand(other, keep_padding)
+        chunks = _map(lambda pair: op(*pair), list(zip(self.chunks, operands)), executor)
+        return ChunkedCiphertext(chunks=chunks, length=self.length, chunk_size=self.chunk_size)
+
+    def _split_operand(self, other: Operand, keep_padding: bool) -> List[Any]:
+        """把操作数拆成与分块对齐的列表
+
+        keep_padding 为真时标量展开成补零的明文向量，避免加减污染补零槽位。
+        """
+        if isinstance(other, ChunkedCiphertext):
+            if (other.length, other.chunk_size) != (self.length, self.chunk_size):
+                raise ValueError(
+                    f"分块密文不对齐: {other.length}/{other.chunk_size} 与 "
+                    f"{self.length}/{self.chunk_size}"
+                )
+            return other.chunks
+        if isinstance(other, ts.CKKSVector):
+            raise TypeError("分块密文不支持与单个密文直接运算")
+
+        values = np.asarray(other, dtype=float)
+        if values.ndim == 0:
+            if not keep_padding:
+                return [float(values)] * self.num_chunks
+            values = np.full(self.length, float(values))
+        elif values.shape != (self.length,):
+            raise ValueError(f"明文长度 {values.size} 与密文长度 {self.length} 不匹配")
+        return [block.tolist() for block in _split(values, self.chunk_size)]
+
+
+class SlotChunker:
+    """把长向量切分为槽位大小的分块并加密"""
+
+    def __init__(self, slot_count: int):
+        self.slot_count = slot_count
+
+    def encrypt(self, context: ts.Context, data: np.ndarray,
+                executor: Optional[Executor] = None) -> ChunkedCiphertext:
+        """分块加密，分块可在执行器中并行加密"""
+        data = np.asarray(data, dtype=float).ravel()
+        if data.size == 0:
+            raise ValueError("不能加密空向量")
+        chunks = _map(
+            lambda block: ts.ckks_vector(context, block),
+            _split(data, self.slot_count), executor
+        )
+        return ChunkedCiphertext(chunks=chunks, length=data.size, chunk_size=self.slot_count)
+
+    def decrypt(self, chunked: ChunkedCiphertext,
+                executor: Optional[Executor] = None) -> np.ndarray:
+        """逐块解密并去掉补零槽位"""
+        blocks = _map(lambda chunk: chunk.decrypt(), chunked.chunks, executor)
+        return np.concatenate([np.asarray(b) for b in blocks])[:chunked.length]
+
+    @staticmethod
+    def is_chunked(data: bytes) -> bool:
+        """判断序列化数据是否为分块密文"""
+        return data[:len(CHUNKED_MAGIC)] == CHUNKED_MAGIC
+
+    @staticmethod
+    def serialize(chunked: ChunkedCiphertext) -> bytes:
+        """序列化为单个对象：魔数 + 头部长度 + JSON头部 + 各分块密文"""
+        blobs = [chunk.serialize() for chunk in chunked.chunks]
+        header = json.dumps({
+            'length': chunked.length,
+            'chunk_size': chunked.chunk_size,
+            'sizes': [len(blob) for blob in blobs]
+        }).encode()
+        return b''.join([CHUNKED_MAGIC, _HEADER_SIZE.pack(len(header)), header] + blobs)
+
+    @staticmethod
+    def deserialize(context: ts.Context, data: bytes) -> ChunkedCiphertext:
+        """反序列化分块密文并关联到指定上下文"""
+        view = memoryview(data)
+        offset = len(CHUNKED_MAGIC)
+        (header_size,) = _HEADER_SIZE.unpack_from(view, offset)
+        offset += _HEADER_SIZE.size
+        header: Dict[str, Any] = json.loads(bytes(view[offset:offset + header_size]))
+        offset += header_size
+
+        chunks = []
+        for size in header['sizes']:
+            chunks.append(ts.ckks_vector_from(context, bytes(view[offset:offset + size])))
+            offset += size
+        return ChunkedCiphertext(
+            chunks=chunks, length=header['length'], chunk_size=header['chunk_size']
+        )
+
+
+def _split(values: np.ndarray, chunk_size: int) -> List[np.ndarray]:
+    """按 chunk_size 切分，最后一块补零到完整长度"""
+    padded = np.zeros(-(-values.size // chunk_size) * chunk_size)
+    padded[:values.size] = values
+    return list(padded.reshape(-1, chunk_size))
+
+def _add_pair(pair: List[ts.CKKSVector]) -> ts.CKKSVector:
+    return pair[0] + pair[1] if len(pair) == 2 else pair[0]
+
+def _map(fn: Callable, items: List[Any], executor: Optional[Executor]) -> List[Any]:
+    if executor is None or len(items) < 2:
+        return [fn(item) for item in items]
+    return list(executor.map(fn, items))
@@ -0,0 +1,161 @@
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+import threading
+import math
+import os
+import logging
+import tenseal as ts
+
+DEFAULT_POLY_MODULUS_DEGREE = 8192
+DEFAULT_COEFF_MOD_BIT_SIZES = [60, 40, 40, 60]
+DEFAULT_SCALE_BITS = 40
+
+ContextKey = Tuple[int, Tuple[int, ...], int]
+
+class ContextRegistry:
+    """进程级TenSEAL上下文注册表
+
+    按参数集 (poly_modulus_degree, coeff_mod_bit_sizes, scale) 和上下文文件路径缓存上下文，
+    同一进程内的各组件共享同一份密钥材料；指定不同文件的配置各自加载对应的密钥。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super(ContextRegistry, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, 'initialized'):
+            return
+
+        self.contexts: Dict[Tuple[ContextKey, Optional[str]], ts.Context] = {}
+        self.build_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.initialized = True
+
+    @staticmethod
+    def make_key(config: Dict[str, Any]) -> ContextKey:
+        """由FHE配置生成参数集键"""
+        return (
+            int(config.get('poly_modulus_degree', DEFAULT_POLY_MODULUS_DEGREE)),
+            tuple(config.get('coeff_mod_bit_sizes', DEFAULT_COEFF_MOD_BIT_SIZES)),
+            int(config.get('scale', DEFAULT_SCALE_BITS))
+        )
+
+    def get(self, config: Optional[Dict[str, Any]] = None) -> ts.Context:
+        """获取（必要时惰性创建）参数集对应的上下文
+
+        config['create_context'] 为 False 时只加载 context_path 处已有的上下文，不生成新密钥。
+        """
+        config = config or {}
+        key = self.make_key(config)
+        context_path = config.get('context_path')
+        context = self.contexts.get((key, context_path))
+        if context is not None:
+            return context
+
+        with self.build_lock:
+            context = self.contexts.get((key, context_path))
+            if context is None:
+                context = self._load_or_create(
+                    key, context_path, config.get('create_context', True)
+                )
+                self.contexts[(key, context_path)] = context
+            return context
+
+    def register(self, context: ts.Context,
+                 config: Optional[Dict[str, Any]] = None):
+        """注册外部创建或反序列化的上下文"""
+        config = config or {}
+        with self.build_lock:
+            self.contexts[(self.make_key(config), config.get('context_path'))] = context
+
+    def clear(self):
+        """清空已缓存的上下文"""
+        with self.build_lock:
+            self.contexts.clear()
+
+    def _load_or_create(self, key: ContextKey,
+                        context_path: Optional[str],
+                        create: bool = True) -> ts.Context:
+        """优先从磁盘加载序列化上下文，否则生成新密钥（create 为 False 时报错）"""
+        if context_path and Path(context_path).exists():
+            try:
+                context = ts.context_from(Path(context_path).read_bytes())
+                stored = context_key(context)
+                if stored != key:
+                    raise ValueError(f"上下文文件参数 {stored} 与配置 {key} 不一致: {context_path}")
+                if not context.has_galois_keys():
+                    context.generate_galois_keys()
+                self.logger.info(f"FHE上下文已从文件加载: {context_path}")
+                return context
+            except Exception as e:
+                self.logger.error(f"加载FHE上下文失败: {str(e)}")
+                raise
+
+        if not create:
+            raise FileNotFoundError(f"FHE上下文文件不存在: {context_path}")
+        context = self._create_context(key)
+        if context_path:
+            try:
+                _write_private(Path(context_path), context.serialize(save_secret_key=True))
+                self.logger.info(f"FHE上下文已保存: {context_path}")
+            except Exception as e:
+                self.logger.warning(f"保存FHE上下文失败: {str(e)}")
+        return context
+
+    def _create_context(self, key: ContextKey) -> ts.Context:
+        """创建FHE上下文"""
+        try:
+            poly_modulus_degree, coeff_mod_bit_sizes, scale_bits = key
+            context = ts.context(
+                ts.SCHEME_TYPE.CKKS,
+                poly_modulus_degree=poly_modulus_degree,
+                coeff_mod_bit_sizes=list(coeff_mod_bit_sizes)
+            )
+            context.global_scale = 2**scale_bits
+            # sum/mean 及槽位打包归约依赖旋转操作
+            context.generate_galois_keys()
+            self.logger.info(f"FHE上下文已创建: {key}")
+            return context
+        except Exception as e:
+            self.logger.error(f"创建FHE上下文失败: {str(e)}")
+            raise
+
+def context_key(context: ts.Context) -> ContextKey:
+    """从上下文还原参数集键
+
+    SEAL 每次模切换丢弃当前最后一个素数，各层模数总位数之差即为各素数的位数。
+    """
+    data = context.seal_context().data.key_context_data()
+    poly_modulus_degree = data.parms().poly_modulus_degree()
+    totals = []
+    while data is not None:
+        totals.append(data.total_coeff_modulus_bit_count())
+        data = data.next_context_data()
+    bit_sizes = [totals[-1]] + [totals[i - 1] - totals[i] for i in range(len(totals) - 1, 0, -1)]
+    return poly_modulus_degree, tuple(bit_sizes), int(round(math.log2(context.global_scale)))
+
+def _write_private(path: Path, data: bytes):
+    """以 0600 权限原子写入含私钥的文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except Exception:
+        temp.unlink(missing_ok=True)
+        raise
+
+def get_context(config: Optional[Dict[str, Any]] = None) -> ts.Context:
+    """获取共享的FHE上下文"""
+    return ContextRegistry().get(config)
@@ -1,67 +1,307 @@
 import numpy as np
 import tenseal as ts
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 import logging
+from .context import get_context, DEFAULT_POLY_MODULUS_DEGREE, DEFAULT_COEFF_MOD_BIT_SIZES
+from .packing import SlotPacker, PackedCiphertext
+from .chunking import SlotChunker, ChunkedCiphertext
+from .cache import ResultCache
+from .expression import compile_expression
+from .params import resolve_parameters
 
 class FHEEngine:
     """同态加密核心引擎"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化FHE引擎
         Args:
-            config: FHE配置参数
+            config: FHE配置参数，提供 workload 时自动选择未显式给出的CKKS参数
         """
-        self.config = config
-        self.context = self._create_context()
+        self.config = resolve_parameters(config)
         self.logger = logging.getLogger(__name__)
+        self.context = self._create_context()
+        slot_count = self.config.get('poly_modulus_degree', DEFAULT_POLY_MODULUS_DEGREE) // 2
+        self.packer = SlotPacker(slot_count)
+        self.chunker = SlotChunker(slot_count)
+        # 分块密文的逐块运算默认串行执行；TenSEAL 运算不释放 GIL，线程池不能带来并行，
+        # 只有显式配置 chunk_workers 时才创建线程池
+        chunk_workers = self.config.get('chunk_workers')
+        self.chunk_executor = (
+            ThreadPoolExecutor(max_workers=chunk_workers, thread_name_prefix='fhe-chunk')
+            if chunk_workers else None
+        )
+        cache_config = self.config.get('cache', {})
+        self.cache = (
+            ResultCache(cache_config, self.serialize, self.deserialize)
+            if cache_config.get('enabled', True) else None
+        )
         
+    def close(self):
+        """关闭分块运算线程池"""
+        if self.chunk_executor is not None:
+            self.chunk_executor.shutdown(wait=False)
+            self.chunk_executor = None
+
     def _create_context(self) -> ts.Context:
-        """创建FHE上下文"""
+        """获取共享的FHE上下文，同一参数集在进程内只生成一次密钥"""
         try:
-            context = ts.context(
-                ts.SCHEME_TYPE.CKKS,
-                poly_modulus_degree=self.config.get('poly_modulus_degree', 8192),
-                coeff_mod_bit_sizes=self.config.get('coeff_mod_bit_sizes', [60, 40, 40, 60])
-            )
-            context.global_scale = 2**40
-            return context
+            return get_context(self.config)
         except Exception as e:
             self.logger.error(f"创建FHE上下文失败: {str(e)}")
             raise
 
-    def encrypt(self, data: np.ndarray) -> ts.CKKSVector:
-        """加密数据"""
+    def encrypt(self, data: np.ndarray) -> Union[ts.CKKSVector, ChunkedCiphertext]:
+        """加密数据，超过槽位数的数组自动分块"""
         try:
+            if np.size(data) > self.chunker.slot_count:
+                return self.chunker.encrypt(self.context, data, self.chunk_executor)
             return ts.ckks_vector(self.context, data)
         except Exception as e:
             self.logger.error(f"数据加密失败: {str(e)}")
             raise
 
-    def decrypt(self, encrypted_data: ts.CKKSVector) -> np.ndarray:
+    def encrypt_chunked(self, data: np.ndarray) -> ChunkedCiphertext:
+        """按槽位大小分块加密，短数组也作为单块分块密文"""
+        try:
+            return self.chunker.encrypt(self.context, data, self.chunk_executor)
+        except Exception as e:
+            self.logger.error(f"分块加密失败: {str(e)}")
+            raise
+
+    def encrypt_packed(self, records: List[np.ndarray]) -> PackedCiphertext:
+        """将多条短记录打包加密到尽量少的密文中"""
+        try:
+            return self.packer.pack(self.context, records)
+        except Exception as e:
+            self.logger.error(f"打包加密失败: {str(e)}")
+            raise
+
+    def serialize(self, encrypted_data: Union[ts.CKKSVector, ChunkedCiphertext]) -> bytes:
+        """序列化密文，分块密文序列化为单个对象"""
+        try:
+            if isinstance(encrypted_data, ChunkedCiphertext):
+                return self.chunker.serialize(encrypted_data)
+            return encrypted_data.serialize()
+        except Exception as e:
+            self.logger.error(f"密文序列化失败: {str(e)}")
+            raise
+
+    def deserialize(self, data: bytes) -> Union[ts.CKKSVector, ChunkedCiphertext]:
+        """反序列化密文并关联到当前上下文"""
+        try:
+            if self.chunker.is_chunked(data):
+                return self.chunker.deserialize(self.context, data)
+            return ts.ckks_vector_from(self.context, data)
+        except Exception as e:
+            self.logger.error(f"密文反序列化失败: {str(e)}")
+            raise
+
+    def public_context_bytes(self) -> bytes:
+        """导出仅含公钥的序列化上下文，供加密工作进程使用"""
+        try:
+            return self.context.serialize(
+                save_public_key=True,
+                save_secret_key=False,
+                save_galois_keys=False,
+                save_relin_keys=False
+            )
+        except Exception as e:
+            self.logger.error(f"导出公钥上下文失败: {str(e)}")
+            raise
+
+    def evaluation_context_bytes(self) -> bytes:
+        """导出含公钥、重线性化密钥和伽罗瓦密钥但不含私钥的序列化上下文，供计算工作进程使用"""
+        try:
+            return self.context.serialize(
+                save_public_key=True,
+                save_secret_key=False,
+                save_galois_keys=True,
+                save_relin_keys=True
+            )
+        except Exception as e:
+            self.logger.error(f"导出计算上下文失败: {str(e)}")
+            raise
+
+    def decrypt(self, encrypted_data: Union[ts.CKKSVector, ChunkedCiphertext]) -> np.ndarray:
         """解密数据"""
         try:
+            if isinstance(encrypted_data, ChunkedCiphertext):
+                return self.chunker.decrypt(encrypted_data, self.chunk_executor)
             return encrypted_data.decrypt()
         except Exception as e:
             self.logger.error(f"数据解密失败: {str(e)}")
             raise
 
+    def decrypt_packed(self, packed: PackedCiphertext) -> List[np.ndarray]:
+        """解密打包密文并按布局拆分为各条记录"""
+        try:
+            decrypted = [vector.decrypt() for vector in packed.vectors]
+            return self.packer.unpack(decrypted, packed.layout)
+        except Exception as e:
+            self.logger.error(f"打包数据解密失败: {str(e)}")
+            raise
+
     def compute(self, 
-                encrypted_data: ts.CKKSVector, 
+                encrypted_data: Union[ts.CKKSVector, PackedCiphertext, ChunkedCiphertext], 
                 operation: str, 
-                params: Optional[Dict[str, Any]] = None) -> ts.CKKSVector:
-        """执行同态计算"""
+                params: Optional[Dict[str, Any]] = None,
+                data_id: Optional[str] = None,
+                operands: Optional[Dict[str, ts.CKKSVector]] = None
+                ) -> Union[ts.CKKSVector, PackedCiphertext, ChunkedCiphertext]:
+        """执行同态计算
+
+        提供 data_id 时先查询结果缓存，相同数据、操作和参数的重复计算直接返回缓存结果的副本。
+        expression 操作中主密文绑定为变量 x，operands 提供其余变量；
+        缓存键不包含 operands，传入 operands 时不使用缓存。
+        """
         try:
+            if isinstance(encrypted_data, PackedCiphertext):
+                return self._compute_packed(encrypted_data, operation, params)
+            compute = (
+                self._compute_chunked if isinstance(encrypted_data, ChunkedCiphertext)
+                else self._compute_vector
+            )
+            if data_id is None or self.cache is None or operands:
+                return compute(encrypted_data, operation, params, operands)
+
+            key = self.cache.make_key(data_id, operation, params)
+            result = self.cache.get(key)
+            if result is None:
+                result = compute(encrypted_data, operation, params, operands)
+                self.cache.put(key, result)
+            return result
+        except Exception as e:
+            self.logger.error(f"同态计算失败: {str(e)}")
+            raise
+
+    def _compute_vector(self,
+                        encrypted_data: ts.CKKSVector,
+                        operation: str,
+                        params: Optional[Dict[str, Any]] = None,
+                        operands: Optional[Dict[str, ts.CKKSVector]] = None) -> ts.CKKSVector:
+        """对单个密文执行计算"""
+        if operation == "expression":
+            return self.evaluate(params["expression"], {'x': encrypted_data, **(operands or {})})
+        elif operation == "add":
+            return encrypted_data + params.get("value", 0)
+        elif operation == "multiply":
+            return encrypted_data * params.get("value", 1)
+        elif operation == "mean":
+            return encrypted_data.sum() * (1.0 / encrypted_data.size())
+        elif operation == "sum":
+            return encrypted_data.sum()
+        elif operation == "dot":
+            # 与明文向量 params['vector'] 或密文操作数 y 做内积
+            other = params.get("vector")
+            if other is None:
+                other = (operands or {}).get("y")
+            if other is None:
+                raise ValueError("dot 需要 params['vector'] 或密文操作数 y")
+            return encrypted_data.dot(other)
+        elif operation == "matmul":
+            # 密文行向量乘明文矩阵 (size × m)
+            matrix = np.asarray(params["matrix"], dtype=float)
+            if matrix.ndim != 2 or matrix.shape[0] != encrypted_data.size():
+                raise ValueError(
+                    f"矩阵形状 {matrix.shape} 与向量长度 {encrypted_data.size()} 不匹配"
+                )
+            return encrypted_data.matmul(matrix.tolist())
+        elif operation == "polyval":
+            # 系数按升幂排列：c0 + c1*x + c2*x^2 + ...
+            return encrypted_data.polyval([float(c) for c in params["coefficients"]])
+        else:
+            raise ValueError(f"不支持的操作: {operation}")
+
+    def _compute_chunked(self,
+                         chunked: ChunkedCiphertext,
+                         operation: str,
+                         params: Optional[Dict[str, Any]] = None,
+                         operands: Optional[Dict[str, Any]] = None
+                         ) -> Union[ts.CKKSVector, ChunkedCiphertext]:
+        """对分块密文执行计算，value 可为标量或与逻辑长度相同的明文数组"""
+        params = params or {}
+        if operation == "add":
+            return chunked.add(params.get("value", 0), self.chunk_executor)
+        elif operation == "multiply":
+            return chunked.mul(params.get("value", 1), self.chunk_executor)
+        elif operation == "sum":
+            return chunked.sum(self.chunk_executor)
+        elif operation == "mean":
+            return chunked.mean(self.chunk_executor)
+        elif operation == "dot":
+            other = params.get("vector")
+            if other is None:
+                other = (operands or {}).get("y")
+            if other is None:
+                raise ValueError("dot 需要 params['vector'] 或密文操作数 y")
+            return chunked.dot(other, self.chunk_executor)
+        else:
+            raise ValueError(f"分块密文不支持的操作: {operation}")
+
+    def evaluate(self, expression: str,
+                 inputs: Dict[str, ts.CKKSVector]) -> ts.CKKSVector:
+        """编译并一次性执行表达式，如 sum(x * 3 + y)"""
+        try:
+            plan = compile_expression(expression)
+            # 首尾模数分别用于密钥与解密精度，其余每层支持一次重缩放
+            levels = len(self.config.get('coeff_mod_bit_sizes', DEFAULT_COEFF_MOD_BIT_SIZES)) - 2
+            if plan.depth > levels:
+                raise ValueError(f"表达式乘法深度 {plan.depth} 超过参数集支持的 {levels} 层")
+            return plan.execute(inputs)
+        except Exception as e:
+            self.logger.error(f"表达式计算失败: {str(e)}")
+            raise
+
+    def aggregate(self,
+                  vectors: List[ts.CKKSVector],
+                  operation: str,
+                  params: Optional[Dict[str, Any]] = None) -> ts.CKKSVector:
+        """聚合多个密文
+
+        add 对等长密文逐元素相加；sum/mean 先对各密文求和再相加，
+        mean 默认除以全部密文的元素总数，也可由 params['count'] 指定。
+        """
+        try:
+            params = params or {}
             if operation == "add":
-                return encrypted_data + params.get("value", 0)
-            elif operation == "multiply":
-                return encrypted_data * params.get("value", 1)
-            elif operation == "mean":
-                return encrypted_data.mean()
-            elif operation == "sum":
-                return encrypted_data.sum()
+                result = vectors[0]
+                for vector in vectors[1:]:
+                    result = result + vector
+                if "value" in params:
+                    result = result + params["value"]
+                return result
+            elif operation in ("sum", "mean"):
+                totals = [
+                    v.sum(self.chunk_executor) if isinstance(v, ChunkedCiphertext) else v.sum()
+                    for v in vectors
+                ]
+                result = totals[0]
+                for total in totals[1:]:
+                    result = result + total
+                if operation == "mean":
+                    count = params.get("count") or sum(v.size() for v in vectors)
+                    result = result * (1.0 / count)
+                return result
             else:
-                raise ValueError(f"不支持的操作: {operation}")
+                raise ValueError(f"不支持的聚合操作: {operation}")
         except Exception as e:
-            self.logger.error(f"同态计算失败: {str(e)}")
-            raise
\ No newline at end of file
+            self.logger.error(f"密文聚合失败: {str(e)}")
+            raise
+
+    def _compute_packed(self,
+                        packed: PackedCiphertext,
+                        operation: str,
+                        params: Optional[Dict[str, Any]] = None) -> PackedCiphertext:
+        """对打包密文逐记录执行计算"""
+        if operation == "add":
+            vectors = [v + params.get("value", 0) for v in packed.vectors]
+            return PackedCiphertext(vectors=vectors, layout=packed.layout)
+        elif operation == "multiply":
+            vectors = [v * params.get("value", 1) for v in packed.vectors]
+            return PackedCiphertext(vectors=vectors, layout=packed.layout)
+        elif operation in ("sum", "mean"):
+            return self.packer.reduce(packed, operation)
+        else:
+            raise ValueError(f"不支持的操作: {operation}")
@@ -0,0 +1,301 @@
+from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+import heapq
+import math
+import ast
+
+# 原子：('var', 变量名) 或 ('sum'/'mean', 内层多项式)
+Atom = Tuple[Any, ...]
+# 单项式：按序排列的原子元组，空元组表示常数项
+Monomial = Tuple[Atom, ...]
+Polynomial = Dict[Monomial, float]
+
+REDUCTIONS = ('sum', 'mean')
+MAX_TERMS = 64
+MAX_POWER = 8
+
+def _canonical(poly: Polynomial) -> Tuple[Tuple[Monomial, float], ...]:
+    return tuple(sorted(poly.items()))
+
+def _add(a: Polynomial, b: Polynomial) -> Polynomial:
+    result = dict(a)
+    for monomial, coeff in b.items():
+        result[monomial] = result.get(monomial, 0.0) + coeff
+    return {m: c for m, c in result.items() if c != 0.0 or m == ()}
+
+def _scale(a: Polynomial, factor: float) -> Polynomial:
+    return {m: c * factor for m, c in a.items() if c * factor != 0.0 or m == ()}
+
+def _multiply(a: Polynomial, b: Polynomial) -> Polynomial:
+    result: Polynomial = {}
+    for ma, ca in a.items():
+        for mb, cb in b.items():
+            monomial = tuple(sorted(ma + mb))
+            result[monomial] = result.get(monomial, 0.0) + ca * cb
+    if len(result) > MAX_TERMS:
+        raise ValueError(f"表达式展开后超过 {MAX_TERMS} 项")
+    return {m: c for m, c in result.items() if c != 0.0 or m == ()}
+
+def _constant(poly: Polynomial) -> float:
+    """多项式为常数时返回其值，否则抛出异常"""
+    if any(monomial != () for monomial in poly):
+        raise ValueError("除数和指数必须是常数")
+    return poly.get((), 0.0)
+
+def _to_polynomial(node: ast.AST) -> Polynomial:
+    """把语法树归一化为以密文原子为变量的多项式，明文常数在此折叠"""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return {(): float(node.value)}
+    if isinstance(node, ast.Name):
+        return {(('var', node.id),): 1.0}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _to_polynomial(node.operand)
+        return _scale(operand, -1.0) if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp):
+        left = _to_polynomial(node.left)
+        right = _to_polynomial(node.right)
+        if isinstance(node.op, ast.Add):
+            return _add(left, right)
+        if isinstance(node.op, ast.Sub):
+            return _add(left, _scale(right, -1.0))
+        if isinstance(node.op, ast.Mult):
+            return _multiply(left, right)
+        if isinstance(node.op, ast.Div):
+            divisor = _constant(right)
+            if divisor == 0:
+                raise ValueError("除数不能为0")
+            return _scale(left, 1.0 / divisor)
+        if isinstance(node.op, ast.Pow):
+            power = _constant(right)
+            if power != int(power) or not 0 <= power <= MAX_POWER:
+                raise ValueError(f"指数必须是 0 到 {MAX_POWER} 之间的整数")
+            result: Polynomial = {(): 1.0}
+            for _ in range(int(power)):
+                result = _multiply(result, left)
+            return result
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in REDUCTIONS and len(node.args) == 1 and not node.keywords):
+        inner = _to_polynomial(node.args[0])
+        terms = [(m, c) for m, c in inner.items() if m != ()]
+        if not terms:
+            raise ValueError(f"{node.func.id}() 的参数必须包含密文变量")
+        # 单项式的系数提到归约之外，便于与外层明文乘法合并
+        if len(terms) == 1 and () not in inner:
+            monomial, coeff = terms[0]
+            return {((node.func.id, _canonical({monomial: 1.0})),): coeff}
+        return {((node.func.id, _canonical(inner)),): 1.0}
+    raise ValueError(f"不支持的表达式语法: {ast.dump(node)}")
+
+class _Evaluator:
+    """在密文上执行计划"""
+
+    def __init__(self, inputs: Dict[str, Any]):
+        self.inputs = inputs
+
+    def variable(self, name: str) -> Any:
+        return self.inputs[name]
+
+    def reduce(self, kind: str, value: Any) -> Tuple[Any, float]:
+        return value.sum(), (1.0 / value.size() if kind == 'mean' else 1.0)
+
+    def scale(self, value: Any, coeff: float) -> Any:
+        return value * coeff
+
+    def multiply(self, a: Any, b: Any, fresh: bool) -> Any:
+        a, b = (_fresh(a), _fresh(b)) if fresh else (a, b)
+        return a * b
+
+    def add(self, a: Any, b: Any, negative: bool, fresh: bool) -> Any:
+        a, b = (_fresh(a), _fresh(b)) if fresh else (a, b)
+        return a - b if negative else a + b
+
+    def negate(self, value: Any) -> Any:
+        return -value
+
+    def add_constant(self, value: Any, constant: float) -> Any:
+        return value + constant
+
+class _CostCounter:
+    """只统计深度与乘法次数的空执行"""
+
+    def __init__(self):
+        self.multiplications = 0
+
+    def variable(self, name: str) -> None:
+        return None
+
+    def reduce(self, kind: str, value: None) -> Tuple[None, float]:
+        # 长度在执行时才知道，用 NaN 保证 mean 的系数乘法总被计入
+        return None, (math.nan if kind == 'mean' else 1.0)
+
+    def scale(self, value: None, coeff: float) -> None:
+        self.multiplications += 1
+
+    def multiply(self, a: None, b: None, fresh: bool) -> None:
+        self.multiplications += 1
+
+    def add(self, a: None, b: None, negative: bool, fresh: bool) -> None:
+        return None
+
+    def negate(self, value: None) -> None:
+        return None
+
+    def add_constant(self, value: None, constant: float) -> None:
+        return None
+
+# 中间结果：(乘法深度, 是否为归约后的标量, 密文)
+Term = Tuple[int, bool, Any]
+
+def _fresh(value: Any) -> Any:
+    """得到同层级的新密文
+
+    层级或长度不同的密文运算时，TenSEAL 会原地降低较浅操作数的模数，
+    共享的输入和原子因此要先复制。加0比 copy() 快得多（copy 会连同上下文一起复制）。
+    """
+    return value + 0.0
+
+def _group(factors: List[Tuple[int, Any]], coeff: float, backend) -> Tuple[int, Any]:
+    """哈夫曼式合并同类因子：系数乘在最浅的因子上，之后每次合并最浅的两个"""
+    heap = [(depth, index, value) for index, (depth, value) in enumerate(factors)]
+    heapq.heapify(heap)
+    order = len(heap)
+    if coeff != 1.0:
+        depth, _, value = heapq.heappop(heap)
+        heapq.heappush(heap, (depth + 1, order, backend.scale(value, coeff)))
+        order += 1
+    while len(heap) > 1:
+        depth_a, _, a = heapq.heappop(heap)
+        depth_b, _, b = heapq.heappop(heap)
+        value = backend.multiply(a, b, depth_a != depth_b)
+        heapq.heappush(heap, (max(depth_a, depth_b) + 1, order, value))
+        order += 1
+    return heap[0][0], heap[0][2]
+
+def _group_depth(depths: List[int], coeff: float) -> int:
+    return _group([(depth, None) for depth in depths], coeff, _CostCounter())[0]
+
+def _combine(factors: List[Term], coeff: float, backend) -> Term:
+    """合并单项式的全部因子
+
+    标量（归约结果）与向量相乘时 TenSEAL 先用掩码乘法广播标量，多消耗一层，
+    所以标量之间、向量之间先各自合并，最后只广播一次；系数放在使总深度更小的一组。
+    """
+    scalars = [(depth, value) for depth, scalar, value in factors if scalar]
+    vectors = [(depth, value) for depth, scalar, value in factors if not scalar]
+    if not scalars or not vectors:
+        depth, value = _group(scalars or vectors, coeff, backend)
+        return depth, bool(scalars), value
+
+    scalar_depths = [depth for depth, _ in scalars]
+    vector_depths = [depth for depth, _ in vectors]
+    coeff_on_scalars = (
+        max(_group_depth(scalar_depths, coeff) + 1, _group_depth(vector_depths, 1.0)) <=
+        max(_group_depth(scalar_depths, 1.0) + 1, _group_depth(vector_depths, coeff))
+    )
+    scalar_depth, scalar = _group(scalars, coeff if coeff_on_scalars else 1.0, backend)
+    vector_depth, vector = _group(vectors, 1.0 if coeff_on_scalars else coeff, backend)
+    return (
+        max(scalar_depth + 1, vector_depth) + 1, False,
+        backend.multiply(vector, scalar, True)
+    )
+
+def _accumulate(total: Optional[Tuple[int, Any]], depth: int, value: Any,
+                negative: bool, backend) -> Tuple[int, Any]:
+    if total is None:
+        return depth, (backend.negate(value) if negative else value)
+    return (
+        max(total[0], depth),
+        backend.add(total[1], value, negative, total[0] != depth)
+    )
+
+class ExpressionPlan:
+    """编译后的表达式执行计划
+
+    表达式被展开为密文原子上的多项式：明文加法与乘法折叠进系数，
+    每个单项式的密文乘法按深度从浅到深两两合并，系数乘在最浅的因子上，
+    mean 的 1/n 并入单项式系数，负系数改为减法，相同原子只计算一次。
+    """
+
+    def __init__(self, expression: str, polynomial: Polynomial):
+        self.expression = expression
+        self.polynomial = polynomial
+        self.variables = sorted(self._variables(polynomial))
+        counter = _CostCounter()
+        self.depth = self._run(polynomial, counter, {})[0]
+        # 显式乘法次数（不含TenSEAL广播标量时的掩码乘法）
+        self.multiplications = counter.multiplications
+
+    def execute(self, inputs: Dict[str, Any]) -> Any:
+        """按计划一次性计算表达式"""
+        missing = [name for name in self.variables if name not in inputs]
+        if missing:
+            raise ValueError(f"缺少表达式输入: {', '.join(missing)}")
+        return self._run(self.polynomial, _Evaluator(inputs), {})[2]
+
+    def _run(self, poly: Polynomial, backend,
+             memo: Dict[Atom, Tuple[Term, float]]) -> Term:
+        """计算多项式：同类项先各自累加，标量部分最后广播加到向量部分"""
+        totals: Dict[bool, Optional[Tuple[int, Any]]] = {True: None, False: None}
+        for monomial, coeff in poly.items():
+            if monomial == ():
+                continue
+            factors = []
+            scale = abs(coeff)
+            for atom in monomial:
+                term, factor = self._atom(atom, backend, memo)
+                factors.append(term)
+                scale *= factor
+            depth, scalar, value = _combine(factors, scale, backend)
+            totals[scalar] = _accumulate(totals[scalar], depth, value, coeff < 0, backend)
+
+        scalar_total, vector_total = totals[True], totals[False]
+        if scalar_total is None and vector_total is None:
+            raise ValueError("表达式不包含密文变量")
+        if vector_total is None:
+            result: Term = (scalar_total[0], True, scalar_total[1])
+        elif scalar_total is None:
+            result = (vector_total[0], False, vector_total[1])
+        else:
+            result = (
+                max(scalar_total[0] + 1, vector_total[0]), False,
+                backend.add(vector_total[1], scalar_total[1], False, True)
+            )
+        constant = poly.get((), 0.0)
+        if constant:
+            result = (result[0], result[1], backend.add_constant(result[2], constant))
+        return result
+
+    def _atom(self, atom: Atom, backend,
+              memo: Dict[Atom, Tuple[Term, float]]) -> Tuple[Term, float]:
+        """计算原子，返回 (中间结果, 待并入系数的因子)"""
+        if atom not in memo:
+            if atom[0] == 'var':
+                memo[atom] = ((0, False, backend.variable(atom[1])), 1.0)
+            else:
+                depth, _, inner = self._run(dict(atom[1]), backend, memo)
+                value, factor = backend.reduce(atom[0], inner)
+                memo[atom] = ((depth, True, value), factor)
+        return memo[atom]
+
+    def _variables(self, poly: Polynomial) -> set:
+        names = set()
+        for monomial in poly:
+            for atom in monomial:
+                if atom[0] == 'var':
+                    names.add(atom[1])
+                else:
+                    names |= self._variables(dict(atom[1]))
+        return names
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> ExpressionPlan:
+    """编译表达式，如 "sum(x * 3 + y)"
+
+    支持密文变量、数值常数、+ - * /（除以常数）、**（非负整数次幂）
+    以及 sum()/mean() 归约。相同表达式的编译结果会被缓存。
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {str(e)}")
+    return ExpressionPlan(expression, _to_polynomial(tree.body))
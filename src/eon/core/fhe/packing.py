@@ -0,0 +1,144 @@
+from typing import List, Dict, Any
+from dataclasses import dataclass, field
+import numpy as np
+import tenseal as ts
+
+
+@dataclass
+class PackingLayout:
+    """槽位打包布局描述
+
+    记录第 i 条逻辑记录位于第 ciphertext_indices[i] 个密文的
+    [offsets[i], offsets[i] + lengths[i]) 槽位区间。
+    """
+    slot_count: int
+    ciphertext_indices: List[int] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=list)
+    lengths: List[int] = field(default_factory=list)
+
+    @property
+    def num_records(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def num_ciphertexts(self) -> int:
+        return max(self.ciphertext_indices) + 1 if self.ciphertext_indices else 0
+
+    def records_in(self, ct_index: int) -> List[int]:
+        """返回位于指定密文中的记录序号"""
+        return [
+            i for i, idx in enumerate(self.ciphertext_indices)
+            if idx == ct_index
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'slot_count': self.slot_count,
+            'ciphertext_indices': list(self.ciphertext_indices),
+            'offsets': list(self.offsets),
+            'lengths': list(self.lengths)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PackingLayout':
+        return cls(
+            slot_count=data['slot_count'],
+            ciphertext_indices=list(data['ciphertext_indices']),
+            offsets=list(data['offsets']),
+            lengths=list(data['lengths'])
+        )
+
+
+@dataclass
+class PackedCiphertext:
+    """打包后的密文集合及其布局"""
+    vectors: List[ts.CKKSVector]
+    layout: PackingLayout
+
+
+class SlotPacker:
+    """CKKS槽位打包器，将多条短记录紧凑地放入同一密文"""
+
+    def __init__(self, slot_count: int):
+        self.slot_count = slot_count
+
+    def plan(self, lengths: List[int]) -> PackingLayout:
+        """按顺序贪心分配槽位"""
+        layout = PackingLayout(slot_count=self.slot_count)
+        ct_index, cursor = 0, 0
+        for length in lengths:
+            if length > self.slot_count:
+                raise ValueError(
+                    f"记录长度 {length} 超过槽位数 {self.slot_count}"
+                )
+            if cursor + length > self.slot_count:
+                ct_index, cursor = ct_index + 1, 0
+            layout.ciphertext_indices.append(ct_index)
+            layout.offsets.append(cursor)
+            layout.lengths.append(length)
+            cursor += length
+        return layout
+
+    def layout_slots(self, records: List[np.ndarray],
+                     layout: PackingLayout) -> List[np.ndarray]:
+        """按布局生成每个密文的明文槽位"""
+        slots = []
+        for ct_index in range(layout.num_ciphertexts):
+            members = layout.records_in(ct_index)
+            end = max(layout.offsets[i] + layout.lengths[i] for i in members)
+            buffer = np.zeros(end)
+            for i in members:
+                offset = layout.offsets[i]
+                buffer[offset:offset + layout.lengths[i]] = records[i]
+            slots.append(buffer)
+        return slots
+
+    def pack(self, context: ts.Context,
+             records: List[np.ndarray]) -> PackedCiphertext:
+        """加密并打包多条记录"""
+        records = [np.asarray(r, dtype=float).ravel() for r in records]
+        layout = self.plan([len(r) for r in records])
+        vectors = [
+            ts.ckks_vector(context, slots)
+            for slots in self.layout_slots(records, layout)
+        ]
+        return PackedCiphertext(vectors=vectors, layout=layout)
+
+    def unpack(self, decrypted: List[List[float]],
+               layout: PackingLayout) -> List[np.ndarray]:
+        """根据布局从解密槽位中还原各条记录"""
+        records = []
+        for i in range(layout.num_records):
+            values = decrypted[layout.ciphertext_indices[i]]
+            offset = layout.offsets[i]
+            records.append(np.array(values[offset:offset + layout.lengths[i]]))
+        return records
+
+    def reduce(self, packed: PackedCiphertext,
+               operation: str) -> PackedCiphertext:
+        """逐记录求和/均值
+
+        每条记录先乘以只覆盖其槽位的掩码（mean时掩码值为1/长度），
+        再通过旋转累加求和，最后把同一密文中各记录的结果重新打包
+        进一个密文，结果布局中每条记录占一个槽位。
+        """
+        if operation not in ("sum", "mean"):
+            raise ValueError(f"不支持的打包归约操作: {operation}")
+
+        layout = packed.layout
+        result_layout = PackingLayout(slot_count=self.slot_count)
+        vectors = []
+        for ct_index, vector in enumerate(packed.vectors):
+            partials = []
+            for position, i in enumerate(layout.records_in(ct_index)):
+                offset, length = layout.offsets[i], layout.lengths[i]
+                weight = 1.0 / length if operation == "mean" else 1.0
+                mask = np.zeros(vector.size())
+                mask[offset:offset + length] = weight
+                partials.append((vector * mask.tolist()).sum())
+
+                result_layout.ciphertext_indices.append(ct_index)
+                result_layout.offsets.append(position)
+                result_layout.lengths.append(1)
+            vectors.append(ts.CKKSVector.pack_vectors(partials))
+        return PackedCiphertext(vectors=vectors, layout=result_layout)
@@ -0,0 +1,92 @@
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from .expression import compile_expression
+
+# 128位经典安全级别下各多项式次数允许的最大系数模数位数（HE安全标准，与SEAL一致）
+MAX_COEFF_MODULUS_BITS = {
+    1024: 27,
+    2048: 54,
+    4096: 109,
+    8192: 218,
+    16384: 438,
+    32768: 881
+}
+MAX_PRIME_BITS = 60
+MIN_SCALE_BITS = 20
+# 一次乘法后的绝对误差比缩放因子低约20比特，每多一层再预留1比特
+PRECISION_MARGIN_BITS = 20
+
+@dataclass(frozen=True)
+class WorkloadProfile:
+    """计算负载画像
+
+    Attributes:
+        depth: 所需乘法深度（明文乘法与密文乘法各消耗一层）
+        slots: 单个密文需要容纳的数值个数
+        precision_bits: 结果需要保留的小数精度（比特）
+        integer_bits: 中间结果整数部分所需的比特数
+    """
+    depth: int
+    slots: int = 1
+    precision_bits: int = 16
+    integer_bits: int = 10
+
+def select_parameters(profile: WorkloadProfile) -> Dict[str, Any]:
+    """选择满足负载的最小安全CKKS参数
+
+    模数链为 [首素数, 缩放素数 × depth, 特殊素数]：缩放素数位数由精度决定，
+    首素数与特殊素数额外容纳整数部分；再按128位安全上限选择能容纳该链
+    且槽位足够的最小多项式次数。相同负载的选择结果会被缓存。
+    """
+    if profile.depth < 0 or profile.slots < 1:
+        raise ValueError(f"无效的负载画像: {profile}")
+
+    scale_bits = max(
+        MIN_SCALE_BITS, profile.precision_bits + PRECISION_MARGIN_BITS + profile.depth
+    )
+    outer_bits = scale_bits + profile.integer_bits
+    if outer_bits > MAX_PRIME_BITS:
+        raise ValueError(
+            f"精度 {profile.precision_bits} 比特与整数部分 {profile.integer_bits} 比特"
+            f"超过单个素数上限 {MAX_PRIME_BITS} 比特"
+        )
+
+    degree, chain = _select_chain(profile.depth, profile.slots, scale_bits, outer_bits)
+    return {
+        'poly_modulus_degree': degree,
+        'coeff_mod_bit_sizes': list(chain),
+        'scale': scale_bits
+    }
+
+@lru_cache(maxsize=128)
+def _select_chain(depth: int, slots: int,
+                  scale_bits: int, outer_bits: int) -> Tuple[int, Tuple[int, ...]]:
+    chain = (outer_bits,) + (scale_bits,) * depth + (outer_bits,)
+    for degree in sorted(MAX_COEFF_MODULUS_BITS):
+        if degree // 2 >= slots and sum(chain) <= MAX_COEFF_MODULUS_BITS[degree]:
+            return degree, chain
+    raise ValueError(f"没有满足负载的安全参数: 深度 {depth}, 槽位 {slots}")
+
+def resolve_parameters(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """根据 config['workload'] 自动补全CKKS参数
+
+    workload 可包含 depth、slots、precision_bits、integer_bits 以及 expression，
+    提供表达式时深度取其编译计划的深度。配置中显式给出的参数优先。
+    """
+    config = dict(config or {})
+    workload = config.get('workload')
+    if not workload:
+        return config
+
+    depth = workload.get('depth', 0)
+    if workload.get('expression'):
+        depth = max(depth, compile_expression(workload['expression']).depth)
+
+    profile = WorkloadProfile(
+        depth=depth,
+        slots=workload.get('slots', 1),
+        precision_bits=workload.get('precision_bits', 16),
+        integer_bits=workload.get('integer_bits', 10)
+    )
+    return {**select_parameters(profile), **config}
@@ -0,0 +1,155 @@
+import grpc
+from concurrent import futures
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import threading
+import asyncio
+import logging
+from ..proto import computation_pb2_grpc
+from .channel_pool import server_options
+
+class AsyncGrpcServer:
+    """在独立事件循环线程中运行的 grpc.aio 服务器
+
+    对外接口与 grpc.Server 保持一致（add_insecure_port/start/stop/
+    wait_for_termination），节点无需区分两种服务器模式。
+    """
+
+    def __init__(self,
+                 register: Callable[[grpc.aio.Server], None],
+                 migration_workers: int = 4,
+                 options: Optional[List[Tuple[str, Any]]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name='grpc-aio', daemon=True
+        )
+        self.thread.start()
+        # 未改写为协程的同步处理函数在迁移线程池中执行
+        self.migration_pool = futures.ThreadPoolExecutor(max_workers=migration_workers)
+        self.server = self._run(self._create(register, options))
+
+    def _run(self, coro, timeout: Optional[float] = None):
+        """在事件循环线程中执行协程并等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def _create(self, register, options) -> grpc.aio.Server:
+        server = grpc.aio.server(
+            migration_thread_pool=self.migration_pool,
+            options=options
+        )
+        register(server)
+        return server
+
+    async def _add_insecure_port(self, address: str) -> int:
+        return self.server.add_insecure_port(address)
+
+    def add_insecure_port(self, address: str) -> int:
+        return self._run(self._add_insecure_port(address))
+
+    def start(self):
+        self._run(self.server.start())
+
+    def stop(self, grace: Optional[float]):
+        """停止服务器并关闭事件循环线程"""
+        if not self.loop.is_running():
+            return
+        try:
+            self._run(self.server.stop(grace))
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.migration_pool.shutdown(wait=False)
+
+    def wait_for_termination(self, timeout: Optional[float] = None) -> bool:
+        return self._run(self.server.wait_for_termination(timeout))
+
+class AsyncComputeServicer(computation_pb2_grpc.ComputationServiceServicer):
+    """ComputeNode 的 grpc.aio 适配器
+
+    RPC 处理函数只负责入队和簿记，同态计算始终在节点的计算执行器中进行，
+    事件循环不会被长时间的 FHE 运算阻塞。
+    """
+
+    def __init__(self, node):
+        self.node = node
+
+    async def SubmitComputation(self, request, context):
+        return self.node.SubmitComputation(request, context)
+
+    async def SubmitComputations(self, request, context):
+        return self.node.SubmitComputations(request, context)
+
+    async def GetTaskStatus(self, request, context):
+        return self.node.GetTaskStatus(request, context)
+
+    async def CancelTask(self, request, context):
+        return self.node.CancelTask(request, context)
+
+    async def GetNodeStatus(self, request, context):
+        return self.node.GetNodeStatus(request, context)
+
+    async def GetData(self, request, context):
+        for frame in self.node.GetData(request, context):
+            yield frame
+
+    async def DeleteData(self, request, context):
+        return self.node.DeleteData(request, context)
+
+    async def PutData(self, request_iterator, context):
+        chunks = [frame.chunk async for frame in request_iterator]
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.node._store_chunks, chunks
+        )
+
+    async def SubmitComputationStream(self, request_iterator, context):
+        loop = asyncio.get_running_loop()
+        buffers: Dict[str, List[bytes]] = {}
+        headers: Dict[str, Any] = {}
+        pending: Dict[asyncio.Future, Tuple[str, Any]] = {}
+
+        async for frame in request_iterator:
+            completed = self.node._accept_frame(frame, buffers, headers)
+            if completed is not None:
+                # 哈希与落盘不在事件循环中执行
+                task, future = await loop.run_in_executor(
+                    None, self.node._submit_stream_task, *completed
+                )
+                pending[asyncio.wrap_future(future)] = (frame.request_id, task)
+
+            for future in [f for f in pending if f.done()]:
+                for result in self.node._result_frames(*pending.pop(future)):
+                    yield result
+
+        while pending:
+            done, _ = await asyncio.wait(
+                list(pending), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                for result in self.node._result_frames(*pending.pop(future)):
+                    yield result
+
+def create_server(config: Dict[str, Any],
+                  servicer,
+                  async_servicer=None,
+                  default_workers: int = 5):
+    """根据配置创建线程池或 grpc.aio 服务器
+
+    server_mode 为 'async' 时使用 grpc.aio，否则使用线程池服务器。
+    """
+    max_workers = config.get('max_workers', default_workers)
+    options = server_options(config.get('channel', {}))
+    if config.get('server_mode', 'threaded') == 'async':
+        return AsyncGrpcServer(
+            lambda server: computation_pb2_grpc.add_ComputationServiceServicer_to_server(
+                async_servicer or servicer, server
+            ),
+            migration_workers=max_workers,
+            options=options
+        )
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        options=options
+    )
+    computation_pb2_grpc.add_ComputationServiceServicer_to_server(servicer, server)
+    return server
@@ -0,0 +1,127 @@
+import grpc
+from typing import Dict, Any, List, Optional, Tuple
+import threading
+import logging
+import json
+
+# CKKS密文常超过gRPC默认的4MB上限
+DEFAULT_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+ChannelKey = Tuple[str, Tuple[Tuple[str, Any], ...], Optional[grpc.Compression]]
+
+def _retry_service_config(attempts: int) -> str:
+    """UNAVAILABLE时自动重连重试的服务配置"""
+    return json.dumps({
+        'methodConfig': [{
+            'name': [{'service': 'eon.ComputationService'}],
+            'retryPolicy': {
+                'maxAttempts': attempts,
+                'initialBackoff': '0.1s',
+                'maxBackoff': '2s',
+                'backoffMultiplier': 2,
+                'retryableStatusCodes': ['UNAVAILABLE']
+            }
+        }]
+    })
+
+def channel_options(config: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Any]]:
+    """根据配置生成客户端通道参数"""
+    config = config or {}
+    max_message_size = config.get('max_message_size', DEFAULT_MAX_MESSAGE_SIZE)
+    options = [
+        ('grpc.max_send_message_length', max_message_size),
+        ('grpc.max_receive_message_length', max_message_size),
+        ('grpc.keepalive_time_ms', config.get('keepalive_time_ms', 30000)),
+        ('grpc.keepalive_timeout_ms', config.get('keepalive_timeout_ms', 10000)),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0),
+        # 按带宽时延积动态调整HTTP/2流控窗口
+        ('grpc.http2.bdp_probe', 1 if config.get('bdp_probe', True) else 0),
+        ('grpc.initial_reconnect_backoff_ms', config.get('initial_reconnect_backoff_ms', 100)),
+        ('grpc.max_reconnect_backoff_ms', config.get('max_reconnect_backoff_ms', 5000)),
+        ('grpc.enable_retries', 1),
+        ('grpc.service_config', _retry_service_config(config.get('retry_attempts', 3))),
+    ]
+    if 'lookahead_bytes' in config:
+        options.append(('grpc.http2.lookahead_bytes', config['lookahead_bytes']))
+    return options
+
+def server_options(config: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Any]]:
+    """根据配置生成服务端参数"""
+    config = config or {}
+    max_message_size = config.get('max_message_size', DEFAULT_MAX_MESSAGE_SIZE)
+    return [
+        ('grpc.max_send_message_length', max_message_size),
+        ('grpc.max_receive_message_length', max_message_size),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.min_ping_interval_without_data_ms',
+         config.get('min_ping_interval_ms', 10000)),
+        ('grpc.http2.max_ping_strikes', 0),
+    ]
+
+def channel_compression(config: Optional[Dict[str, Any]] = None) -> Optional[grpc.Compression]:
+    """可选的gzip压缩"""
+    if (config or {}).get('compression') == 'gzip':
+        return grpc.Compression.Gzip
+    return None
+
+class ChannelPool:
+    """gRPC通道池
+
+    相同目标地址与参数的客户端共享同一个通道（及其子通道），
+    通过引用计数在最后一个使用者释放时关闭通道。
+    """
+
+    def __init__(self):
+        self.channels: Dict[ChannelKey, grpc.Channel] = {}
+        self.refcounts: Dict[ChannelKey, int] = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def acquire(self, target: str,
+                config: Optional[Dict[str, Any]] = None) -> Tuple[ChannelKey, grpc.Channel]:
+        """获取共享通道，返回 (通道键, 通道)"""
+        options = channel_options(config)
+        compression = channel_compression(config)
+        key = (target, tuple(options), compression)
+        with self.lock:
+            channel = self.channels.get(key)
+            if channel is None:
+                channel = grpc.insecure_channel(
+                    target, options=options, compression=compression
+                )
+                self.channels[key] = channel
+                self.refcounts[key] = 0
+                self.logger.info(f"创建gRPC通道: {target}")
+            self.refcounts[key] += 1
+            return key, channel
+
+    def release(self, key: ChannelKey):
+        """释放通道引用，引用归零时关闭通道"""
+        with self.lock:
+            if key not in self.refcounts:
+                return
+            self.refcounts[key] -= 1
+            if self.refcounts[key] > 0:
+                return
+            channel = self.channels.pop(key)
+            del self.refcounts[key]
+        channel.close()
+
+    def close_all(self):
+        """关闭全部通道"""
+        with self.lock:
+            channels = list(self.channels.values())
+            self.channels.clear()
+            self.refcounts.clear()
+        for channel in channels:
+            channel.close()
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+_default_pool = ChannelPool()
+
+def get_channel_pool() -> ChannelPool:
+    """获取进程级共享通道池"""
+    return _default_pool
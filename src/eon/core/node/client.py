@@ -1,16 +1,29 @@
-
 import grpc
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Iterable, Iterator
 import logging
+import json
+import uuid
+import time
 # 在 client.py 和 coordinator.py 中
 from ..proto import computation_pb2, computation_pb2_grpc
+from .channel_pool import ChannelPool, get_channel_pool
 
 class ComputationClient:
     """节点间通信客户端"""
     
-    def __init__(self, target: str):
+    def __init__(self,
+                 target: str,
+                 config: Optional[Dict[str, Any]] = None,
+                 pool: Optional[ChannelPool] = None):
+        """
+        Args:
+            target: 目标节点地址
+            config: 通道配置（消息大小上限、keepalive、压缩等）
+            pool: 通道池，默认使用进程级共享池
+        """
         self.target = target
-        self.channel = grpc.insecure_channel(target)
+        self.pool = pool if pool is not None else get_channel_pool()
+        self.channel_key, self.channel = self.pool.acquire(target, config)
         self.stub = computation_pb2_grpc.ComputationServiceStub(self.channel)
         self.logger = logging.getLogger(__name__)
 
@@ -54,11 +67,12 @@ class ComputationClient:
             self.logger.error(f"发送计算请求失败: {str(e)}")
             return None
 
-    def get_node_status(self, node_id: str) -> Dict[str, Any]:
-        """获取节点状态"""
+    def get_node_status(self, node_id: str,
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        """获取节点状态，timeout 为本次调用的截止时间（秒）"""
         try:
             request = computation_pb2.NodeStatusRequest(node_id=node_id)
-            response = self.stub.GetNodeStatus(request)
+            response = self.stub.GetNodeStatus(request, timeout=timeout)
             return {
                 'node_id': response.node_id,
                 'status': response.status,
@@ -69,9 +83,184 @@ class ComputationClient:
             self.logger.error(f"获取节点状态失败: {str(e)}")
             return {}
 
+    def submit_computation(self,
+                           data_id: str,
+                           operation: str,
+                           params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """提交单个计算任务"""
+        try:
+            response = self.stub.SubmitComputation(
+                self._computation_request(data_id, operation, params)
+            )
+            return {'task_id': response.task_id, 'status': response.status}
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                # 节点过载，返回节点建议的重试间隔
+                metadata = dict(e.trailing_metadata() or ())
+                self.logger.warning(f"计算节点繁忙: {self.target}")
+                return {
+                    'task_id': '',
+                    'status': 'rejected',
+                    'retry_after': float(metadata.get('retry-after', 1.0))
+                }
+            self.logger.error(f"提交计算任务失败: {str(e)}")
+            return {}
+        except Exception as e:
+            self.logger.error(f"提交计算任务失败: {str(e)}")
+            return {}
+
+    def submit_computations(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """一次往返批量提交计算任务
+
+        Args:
+            requests: 每项包含 data_id、operation 和可选的 params
+        """
+        try:
+            response = self.stub.SubmitComputations(
+                computation_pb2.ComputationBatchRequest(requests=[
+                    self._computation_request(
+                        item['data_id'], item['operation'], item.get('params')
+                    )
+                    for item in requests
+                ])
+            )
+            return [
+                {'task_id': r.task_id, 'status': r.status}
+                for r in response.responses
+            ]
+        except Exception as e:
+            self.logger.error(f"批量提交计算任务失败: {str(e)}")
+            return []
+
+    def submit_computation_stream(self,
+                                  items: Iterable[Dict[str, Any]],
+                                  chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+        """分块流式上传密文并按完成顺序接收结果
+
+        Args:
+            items: 每项包含 data(序列化密文)、operation、可选的 params 和 request_id
+            chunk_size: 每帧携带的最大字节数
+        """
+        def frames():
+            for item in items:
+                request_id = item.get('request_id') or str(uuid.uuid4())
+                data = item['data']
+                params = json.dumps(item.get('params') or {}).encode()
+                offsets = range(0, max(len(data), 1), chunk_size)
+                for offset in offsets:
+                    yield computation_pb2.CiphertextFrame(
+                        request_id=request_id,
+                        operation=item['operation'] if offset == 0 else '',
+                        params=params if offset == 0 else b'',
+                        chunk=data[offset:offset + chunk_size],
+                        last=offset + chunk_size >= len(data)
+                    )
+
+        buffers: Dict[str, List[bytes]] = {}
+        try:
+            for frame in self.stub.SubmitComputationStream(frames()):
+                buffers.setdefault(frame.request_id, []).append(frame.chunk)
+                if frame.last:
+                    result = b''.join(buffers.pop(frame.request_id))
+                    yield {
+                        'request_id': frame.request_id,
+                        'task_id': frame.task_id,
+                        'status': frame.status,
+                        'result': result if frame.status == 'completed' else None,
+                        'error': frame.error
+                    }
+        except Exception as e:
+            self.logger.error(f"流式计算请求失败: {str(e)}")
+            raise
+
+    def get_task_status(self, task_id: str) -> Dict[str, Any]:
+        """获取任务状态"""
+        try:
+            response = self.stub.GetTaskStatus(
+                computation_pb2.TaskStatusRequest(task_id=task_id)
+            )
+            return {
+                'task_id': response.task_id,
+                'status': response.status,
+                'progress': response.progress,
+                'result_id': response.result_id,
+                'error': response.error,
+                'count': response.count
+            }
+        except Exception as e:
+            self.logger.error(f"获取任务状态失败: {str(e)}")
+            return {}
+
+    def wait_for_task(self,
+                      task_id: str,
+                      timeout: Optional[float] = None,
+                      poll_interval: float = 0.01) -> Dict[str, Any]:
+        """轮询等待任务结束（completed/failed/cancelled/error），超时抛出 TimeoutError"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.get_task_status(task_id)
+            if status.get('status') in ('completed', 'failed', 'cancelled', 'error'):
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"等待任务超时: {task_id}")
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 0.5)
+
+    def cancel_task(self, task_id: str) -> Dict[str, Any]:
+        """取消节点上的任务，返回取消后的任务状态"""
+        try:
+            response = self.stub.CancelTask(
+                computation_pb2.TaskStatusRequest(task_id=task_id)
+            )
+            return {'task_id': response.task_id, 'status': response.status,
+                    'error': response.error}
+        except Exception as e:
+            self.logger.error(f"取消任务失败: {str(e)}")
+            return {}
+
+    def put_data(self, data: bytes, chunk_size: int = 1 << 20) -> str:
+        """分块上传密文到节点，返回数据ID"""
+        def frames():
+            offsets = range(0, max(len(data), 1), chunk_size)
+            for offset in offsets:
+                yield computation_pb2.CiphertextFrame(
+                    chunk=data[offset:offset + chunk_size],
+                    last=offset + chunk_size >= len(data)
+                )
+
+        response = self.stub.PutData(frames())
+        if response.status != 'stored':
+            raise RuntimeError(f"上传数据失败: {response.error}")
+        return response.data_id
+
+    def get_data(self, data_id: str) -> bytes:
+        """分块读取节点上存储的密文"""
+        chunks = []
+        for frame in self.stub.GetData(computation_pb2.DataRequest(data_id=data_id)):
+            if frame.status != 'completed':
+                raise ValueError(frame.error)
+            chunks.append(frame.chunk)
+        return b''.join(chunks)
+
+    def delete_data(self, data_id: str) -> bool:
+        """删除节点上存储的密文"""
+        response = self.stub.DeleteData(computation_pb2.DataRequest(data_id=data_id))
+        return response.status == 'deleted'
+
+    def _computation_request(self,
+                             data_id: str,
+                             operation: str,
+                             params: Optional[Dict[str, Any]] = None):
+        """构造计算请求消息"""
+        return computation_pb2.ComputationRequest(
+            data_id=data_id,
+            operation=operation,
+            params=json.dumps(params or {}).encode()
+        )
+
     def close(self):
-        """关闭通信通道"""
+        """释放通信通道"""
         try:
-            self.channel.close()
+            self.pool.release(self.channel_key)
         except Exception as e:
             self.logger.error(f"关闭通信通道失败: {str(e)}")
@@ -1,21 +1,102 @@
 # src/eon/core/node/compute.py
 import grpc
 from concurrent import futures
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import threading
+import hashlib
 import logging
+import json
+import time
+import uuid
+import os
+import psutil
 from ..proto import computation_pb2_grpc, computation_pb2
 from ..fhe.engine import FHEEngine
+from ..scheduler.coalescer import TaskCoalescer
+from ..scheduler.admission import AdmissionController, AdmissionRejected
+from .aio_server import create_server, AsyncComputeServicer
+
+@dataclass
+class NodeTask:
+    """计算节点上的任务记录"""
+    id: str
+    data_id: str
+    operation: str
+    params: Dict[str, Any]
+    status: str = 'pending'
+    progress: float = 0.0
+    result_id: str = ''
+    error: str = ''
+    created_at: float = 0.0
+    completed_at: Optional[float] = None
+    count: int = 0
 
 class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
     """计算节点实现"""
     
-    VALID_OPERATIONS = ["add", "multiply", "mean", "sum"]  # 添加有效操作列表
+    VALID_OPERATIONS = [
+        "add", "multiply", "mean", "sum", "expression", "dot", "matmul", "polyval"
+    ]  # 添加有效操作列表
+    # 只依赖单个密文和参数的操作，可与相同操作、相同参数的任务合并执行
+    COALESCABLE_OPERATIONS = ("add", "multiply", "sum", "mean")
 
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.fhe_engine = FHEEngine(config.get('fhe', {}))
         self.logger = logging.getLogger(__name__)
         self.server = None
+
+        # 有界计算执行器：排队+运行中的任务数不超过 max_pending_tasks
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=self.config.get('compute_workers', os.cpu_count() or 1),
+            thread_name_prefix='compute'
+        )
+        self.task_slots = threading.BoundedSemaphore(
+            self.config.get('max_pending_tasks', 1000)
+        )
+        # 在硬上限之前按水位线提前拒绝，拒绝时通过 RESOURCE_EXHAUSTED 告知重试间隔
+        self.admission = AdmissionController(self.config.get('admission', {}))
+        self.tasks: 'OrderedDict[str, NodeTask]' = OrderedDict()
+        self.max_retained_tasks = self.config.get('max_retained_tasks', 10000)
+        self.tasks_lock = threading.Lock()
+        # 负载计数，供 GetNodeStatus 上报（受 tasks_lock 保护）
+        self.outstanding_tasks = 0
+        self.running_tasks = 0
+
+        # 相同操作和参数的任务在 coalesce_window 秒内合并为一批，批内数据ID相同的任务只计算一次。
+        # 不同输入的任务仍在批内逐个串行计算，没有共享工作，只会多等至多一个窗口的延迟；
+        # 因此只在重复输入较多时才值得开启，默认 0 表示不合并
+        coalesce_window = self.config.get('coalesce_window', 0)
+        self.coalescer = TaskCoalescer(
+            self._dispatch_batch, coalesce_window,
+            self.config.get('coalesce_max_batch', 64)
+        ) if coalesce_window > 0 else None
+
+        # 密文存储：有界 LRU 内存缓存，配置了路径时同时落盘。超过 max_data_bytes 时
+        # 淘汰最久未访问的内存条目（落盘副本保留）；落盘副本超过 max_disk_bytes 时删除最久未访问的数据；
+        # 配置 data_ttl 时闲置超时的数据从内存和磁盘一并删除
+        self.data: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self.data_bytes = 0
+        self.max_data_bytes = self.config.get('max_data_bytes', 1 << 30)
+        self.data_ttl = self.config.get('data_ttl')
+        self.data_lock = threading.Lock()
+        # 落盘副本索引：数据ID -> (字节数, 最近访问时间)，按访问顺序排列
+        self.disk: 'OrderedDict[str, Tuple[int, float]]' = OrderedDict()
+        self.disk_bytes = 0
+        self.max_disk_bytes = self.config.get('max_disk_bytes', 10 << 30)
+        storage_path = self.config.get('storage_path')
+        self.storage_path = Path(storage_path) if storage_path else None
+        if self.storage_path:
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+            # 上次运行留下的文件同样计入磁盘容量
+            now = time.monotonic()
+            for path in sorted(self.storage_path.glob('*.data'), key=lambda p: p.stat().st_mtime):
+                self.disk[path.stem] = (path.stat().st_size, now)
+                self.disk_bytes += path.stat().st_size
+
         self._setup_grpc_server()
         
     def start(self):
@@ -34,7 +115,11 @@ class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
         try:
             if self.server:
                 self.server.stop(0)
-                self.logger.info('计算节点已停止')
+            if self.coalescer:
+                self.coalescer.close()
+            self.executor.shutdown(wait=False)
+            self.fhe_engine.close()
+            self.logger.info('计算节点已停止')
         except Exception as e:
             self.logger.error(f'停止失败: {str(e)}')
             raise
@@ -42,15 +127,115 @@ class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
 
         
     def _setup_grpc_server(self):
-        """设置gRPC服务器"""
-        self.server = grpc.server(
-            futures.ThreadPoolExecutor(
-                max_workers=self.config.get('max_workers', 5)
-            )
+        """设置gRPC服务器（server_mode: threaded/async）"""
+        self.server = create_server(
+            self.config, self, AsyncComputeServicer(self), default_workers=5
         )
-        computation_pb2_grpc.add_ComputationServiceServicer_to_server(
-            self, self.server
+
+    def put_data(self, data: bytes) -> str:
+        """存储序列化密文，返回内容哈希ID"""
+        data_id = hashlib.sha256(data).hexdigest()[:16]
+        if self.storage_path:
+            (self.storage_path / f"{data_id}.data").write_bytes(data)
+        now = time.monotonic()
+        with self.data_lock:
+            previous = self.data.pop(data_id, None)
+            if previous is not None:
+                self.data_bytes -= len(previous[0])
+            self.data[data_id] = (data, now)
+            self.data_bytes += len(data)
+            if self.storage_path:
+                self._drop_disk(data_id)
+                self.disk[data_id] = (len(data), now)
+                self.disk_bytes += len(data)
+            expired = self._evict_data(now)
+        self._remove_files(expired)
+        return data_id
+
+    def get_data(self, data_id: str) -> bytes:
+        """读取序列化密文"""
+        now = time.monotonic()
+        with self.data_lock:
+            expired = self._evict_data(now)
+            entry = self.data.get(data_id)
+            if entry is not None:
+                self.data[data_id] = (entry[0], now)
+                self.data.move_to_end(data_id)
+            disk_entry = self.disk.get(data_id)
+            if disk_entry is not None:
+                self.disk[data_id] = (disk_entry[0], now)
+                self.disk.move_to_end(data_id)
+        self._remove_files(expired)
+        if entry is not None:
+            return entry[0]
+        if self.storage_path:
+            data_path = self.storage_path / f"{data_id}.data"
+            if data_path.exists():
+                return data_path.read_bytes()
+        raise ValueError(f"数据不存在: {data_id}")
+
+    def delete_data(self, data_id: str) -> bool:
+        """删除内存与磁盘中的密文，数据不存在时返回 False"""
+        with self.data_lock:
+            entry = self.data.pop(data_id, None)
+            if entry is not None:
+                self.data_bytes -= len(entry[0])
+            self._drop_disk(data_id)
+        removed = self._remove_files([data_id])
+        return entry is not None or removed > 0
+
+    def DeleteData(self, request, context):
+        """删除存储的密文"""
+        if self.delete_data(request.data_id):
+            return computation_pb2.DataResponse(data_id=request.data_id, status="deleted")
+        return computation_pb2.DataResponse(
+            data_id=request.data_id, status="failed", error=f"数据不存在: {request.data_id}"
         )
+
+    def _evict_data(self, now: float) -> List[str]:
+        """按访问顺序淘汰闲置超时或超出容量的数据，返回需删除磁盘副本的ID（调用方持有锁）"""
+        expired = []
+        while self.data:
+            data_id, (data, accessed) = next(iter(self.data.items()))
+            is_expired = self.data_ttl is not None and now - accessed > self.data_ttl
+            # 最近写入的一条总是保留，单条超过容量的数据也能被读取一次
+            if not is_expired and (self.data_bytes <= self.max_data_bytes or len(self.data) == 1):
+                break
+            del self.data[data_id]
+            self.data_bytes -= len(data)
+            if is_expired:
+                self._drop_disk(data_id)
+                expired.append(data_id)
+        # 磁盘层同样按闲置时间和容量淘汰，被删除的数据不再保留内存副本
+        while self.disk:
+            data_id, (size, accessed) = next(iter(self.disk.items()))
+            is_expired = self.data_ttl is not None and now - accessed > self.data_ttl
+            if not is_expired and (self.disk_bytes <= self.max_disk_bytes or len(self.disk) == 1):
+                break
+            self._drop_disk(data_id)
+            entry = self.data.pop(data_id, None)
+            if entry is not None:
+                self.data_bytes -= len(entry[0])
+            expired.append(data_id)
+        return expired
+
+    def _drop_disk(self, data_id: str):
+        """从落盘索引中移除（调用方持有锁）"""
+        entry = self.disk.pop(data_id, None)
+        if entry is not None:
+            self.disk_bytes -= entry[0]
+
+    def _remove_files(self, data_ids: List[str]) -> int:
+        if not self.storage_path:
+            return 0
+        removed = 0
+        for data_id in data_ids:
+            try:
+                (self.storage_path / f"{data_id}.data").unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
     
     def SubmitComputation(self, request, context):
         """提交计算任务"""
@@ -69,8 +254,22 @@ class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
                     status="failed"  # 去掉 error 字段
                 )
 
+            params = json.loads(request.params) if request.params else {}
+            task, _ = self._enqueue_task(request.data_id, request.operation, params)
+            if task is None:
+                if context is not None:
+                    context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+                    context.set_details("计算队列已满")
+                    context.set_trailing_metadata(
+                        (('retry-after', f"{self.admission.retry_after:.3f}"),)
+                    )
+                return computation_pb2.ComputationResponse(
+                    task_id="error",
+                    status="rejected"
+                )
+
             return computation_pb2.ComputationResponse(
-                task_id="test-task",
+                task_id=task.id,
                 status="submitted"
             )
             
@@ -81,20 +280,368 @@ class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
                 status="failed"  # 去掉 error 字段
             )
 
+    def SubmitComputations(self, request, context):
+        """批量提交计算任务"""
+        # 单项被拒绝时只标记该项，不让整批请求以 RESOURCE_EXHAUSTED 失败
+        return computation_pb2.ComputationBatchResponse(
+            responses=[
+                self.SubmitComputation(item, None)
+                for item in request.requests
+            ]
+        )
+
+    def SubmitComputationStream(self, request_iterator, context):
+        """接收分块密文帧，计算完成后按完成顺序流式返回结果"""
+        buffers: Dict[str, List[bytes]] = {}
+        headers: Dict[str, Any] = {}
+        pending: Dict[futures.Future, Tuple[str, NodeTask]] = {}
+
+        try:
+            for frame in request_iterator:
+                completed = self._accept_frame(frame, buffers, headers)
+                if completed is not None:
+                    task, future = self._submit_stream_task(*completed)
+                    pending[future] = (frame.request_id, task)
+
+                # 输入未结束时也及时返回已完成的结果
+                for future in [f for f in pending if f.done()]:
+                    yield from self._result_frames(*pending.pop(future))
+
+            for future in futures.as_completed(list(pending)):
+                yield from self._result_frames(*pending.pop(future))
+        except Exception as e:
+            self.logger.error(f"流式计算失败: {str(e)}")
+            raise
+
+    def _accept_frame(self, frame, buffers: Dict[str, List[bytes]],
+                      headers: Dict[str, Any]) -> Optional[Tuple[Any, bytes]]:
+        """累积密文帧，收到最后一帧时返回 (首帧, 完整密文)"""
+        if frame.request_id not in headers:
+            headers[frame.request_id] = frame
+            buffers[frame.request_id] = []
+        buffers[frame.request_id].append(frame.chunk)
+        if not frame.last:
+            return None
+        header = headers.pop(frame.request_id)
+        return header, b''.join(buffers.pop(frame.request_id))
+
+    def _submit_stream_task(self, header, data: bytes) -> Tuple[NodeTask, futures.Future]:
+        """为流式请求创建任务，无法入队时返回已结束的失败任务"""
+        if header.operation not in self.VALID_OPERATIONS:
+            return self._finished_task(
+                header.operation, "failed", f"无效的操作类型: {header.operation}"
+            )
+        try:
+            params = json.loads(header.params) if header.params else {}
+        except ValueError as e:
+            return self._finished_task(header.operation, "failed", f"参数解析失败: {str(e)}")
+
+        task, future = self._enqueue_task(self.put_data(data), header.operation, params)
+        if task is None:
+            return self._finished_task(header.operation, "rejected", "计算队列已满")
+        return task, future
+
+    def _finished_task(self, operation: str, status: str,
+                       error: str) -> Tuple[NodeTask, futures.Future]:
+        """构造未入队的失败任务"""
+        future = futures.Future()
+        future.set_result(None)
+        task = NodeTask(
+            id="error", data_id="", operation=operation, params={},
+            status=status, error=error
+        )
+        return task, future
+
+    def _result_frames(self, request_id: str, task: NodeTask):
+        """把任务结果切分为结果帧"""
+        if task.status != 'completed':
+            yield computation_pb2.ComputationResult(
+                request_id=request_id,
+                task_id=task.id,
+                status=task.status,
+                last=True,
+                error=task.error
+            )
+            return
+
+        yield from self._data_frames(request_id, self.get_data(task.result_id), task.id)
+
+    def _data_frames(self, request_id: str, data: bytes, task_id: str = ''):
+        """把密文切分为结果帧"""
+        chunk_size = self.config.get('stream_chunk_size', 1 << 20)
+        offsets = range(0, max(len(data), 1), chunk_size)
+        for offset in offsets:
+            yield computation_pb2.ComputationResult(
+                request_id=request_id,
+                task_id=task_id,
+                status='completed',
+                chunk=data[offset:offset + chunk_size],
+                last=offset + chunk_size >= len(data)
+            )
+
+    def _enqueue_task(self, data_id: str, operation: str,
+                      params: Dict[str, Any]) -> Tuple[Optional[NodeTask], Optional[futures.Future]]:
+        """创建任务并放入有界执行器，队列已满时返回 (None, None)"""
+        try:
+            self.admission.admit(self.outstanding_tasks)
+        except AdmissionRejected as e:
+            self.logger.warning(f"拒绝任务: {str(e)}")
+            return None, None
+        if not self.task_slots.acquire(blocking=False):
+            self.logger.warning("计算队列已满，拒绝任务")
+            return None, None
+
+        task = NodeTask(
+            id=str(uuid.uuid4()),
+            data_id=data_id,
+            operation=operation,
+            params=params,
+            created_at=time.time()
+        )
+        self._track_task(task)
+        with self.tasks_lock:
+            self.outstanding_tasks += 1
+        try:
+            key = self._coalesce_key(task)
+            if key is not None:
+                future = futures.Future()
+                self.coalescer.submit(key, (task, future))
+                return task, future
+            future = self.executor.submit(self._run_task, task)
+        except Exception:
+            with self.tasks_lock:
+                self.outstanding_tasks -= 1
+            self.task_slots.release()
+            raise
+        return task, future
+
+    def _track_task(self, task: NodeTask):
+        """记录任务，超出保留上限时从最早的已结束任务开始淘汰，跳过未结束的任务
+
+        未结束的任务不超过 max_pending_tasks 个，每次淘汰至多跳过这么多条记录。
+        """
+        with self.tasks_lock:
+            self.tasks[task.id] = task
+            while len(self.tasks) > self.max_retained_tasks:
+                finished = next((
+                    task_id for task_id, tracked in self.tasks.items()
+                    if tracked.status in ('completed', 'failed', 'cancelled')
+                ), None)
+                if finished is None:
+                    break
+                del self.tasks[finished]
+
+    def _coalesce_key(self, task: NodeTask) -> Optional[str]:
+        """可合并任务的分组键（操作 + 规范化参数），不可合并时返回 None"""
+        if self.coalescer is None or task.operation not in self.COALESCABLE_OPERATIONS:
+            return None
+        if 'data_ids' in task.params or 'inputs' in task.params:
+            return None
+        return task.operation + json.dumps(task.params, sort_keys=True)
+
+    def _dispatch_batch(self, batch: List[Tuple[NodeTask, futures.Future]]):
+        """把合并后的批次作为一次调度提交给执行器"""
+        try:
+            self.executor.submit(self._run_batch, batch)
+        except Exception as e:
+            for task, _ in batch:
+                task.error = str(e)
+                task.status = 'failed'
+            self._release_tasks(batch)
+            raise
+
+    def _run_batch(self, batch: List[Tuple[NodeTask, futures.Future]]):
+        """在一次执行器调度中执行同一批任务
+
+        批内任务的操作和参数相同，数据ID相同的任务只反序列化和计算一次，其余共享结果。
+        """
+        with self.tasks_lock:
+            self.running_tasks += len(batch)
+        try:
+            groups: Dict[str, List[NodeTask]] = {}
+            for task, _ in batch:
+                groups.setdefault(task.data_id, []).append(task)
+            for tasks in groups.values():
+                self._execute_shared(tasks)
+        finally:
+            with self.tasks_lock:
+                self.running_tasks -= len(batch)
+            self._release_tasks(batch)
+
+    def _execute_shared(self, tasks: List[NodeTask]):
+        """依次执行相同的任务，直到其中一个未被取消地结束，其余任务共享它的结果"""
+        for i, task in enumerate(tasks):
+            self._execute(task)
+            if task.status in ('completed', 'failed'):
+                with self.tasks_lock:
+                    for duplicate in tasks[i + 1:]:
+                        if duplicate.status == 'cancelled':
+                            continue
+                        duplicate.count = task.count
+                        duplicate.progress = task.progress
+                        duplicate.result_id = task.result_id
+                        duplicate.status = task.status
+                        duplicate.error = task.error
+                return
+
+    def _release_tasks(self, batch: List[Tuple[NodeTask, futures.Future]]):
+        """批次结束后释放排队计数与执行槽位，并唤醒等待的调用方"""
+        now = time.time()
+        for task, _ in batch:
+            task.completed_at = now
+        with self.tasks_lock:
+            self.outstanding_tasks -= len(batch)
+        for task, future in batch:
+            self.task_slots.release()
+            future.set_result(None)
+
+    def _run_task(self, task: NodeTask):
+        """在计算执行器中执行任务"""
+        with self.tasks_lock:
+            self.running_tasks += 1
+        try:
+            self._execute(task)
+        finally:
+            task.completed_at = time.time()
+            with self.tasks_lock:
+                self.running_tasks -= 1
+                self.outstanding_tasks -= 1
+            self.task_slots.release()
+
+    def _execute(self, task: NodeTask):
+        """执行单个任务并记录结果或错误
+
+        已取消的排队任务直接跳过；执行中的任务在各阶段之间检查取消标记，
+        取消后不再继续计算，也不存储结果。
+        """
+        with self.tasks_lock:
+            if task.status == 'cancelled':
+                return
+            task.status = 'running'
+        try:
+            encrypted_data = self.fhe_engine.deserialize(self.get_data(task.data_id))
+            # params['data_ids'] 指定的其余操作数与主密文一起聚合
+            operands = [
+                self.fhe_engine.deserialize(self.get_data(data_id))
+                for data_id in task.params.get('data_ids', [])
+            ]
+            task.count = encrypted_data.size() + sum(v.size() for v in operands)
+            task.progress = 0.3
+            if task.status == 'cancelled':
+                return
+
+            if operands:
+                result = self.fhe_engine.aggregate(
+                    [encrypted_data] + operands, task.operation, task.params
+                )
+            else:
+                # params['inputs'] 为表达式或 dot 的其余密文操作数 {变量名: 数据ID}
+                inputs = {
+                    name: self.fhe_engine.deserialize(self.get_data(data_id))
+                    for name, data_id in task.params.get('inputs', {}).items()
+                }
+                # 数据ID为内容哈希，可直接作为结果缓存键
+                result = self.fhe_engine.compute(
+                    encrypted_data, task.operation, task.params,
+                    data_id=task.data_id, operands=inputs
+                )
+            task.progress = 0.8
+            if task.status == 'cancelled':
+                return
+
+            task.result_id = self.put_data(self.fhe_engine.serialize(result))
+            task.progress = 1.0
+            self._finish(task, 'completed')
+        except Exception as e:
+            self._finish(task, 'failed', str(e))
+            self.logger.error(f"任务执行失败: {task.id}: {str(e)}")
+
+    def _finish(self, task: NodeTask, status: str, error: str = ''):
+        """记录任务结束状态，已取消的任务保持取消状态"""
+        with self.tasks_lock:
+            if task.status != 'cancelled':
+                task.status = status
+                task.error = error or task.error
+
+    def CancelTask(self, request, context):
+        """取消排队或执行中的任务，排队中的任务不会再执行"""
+        with self.tasks_lock:
+            task = self.tasks.get(request.task_id)
+            if task is None:
+                return computation_pb2.TaskStatusResponse(
+                    task_id=request.task_id,
+                    status="error",
+                    error=f"任务不存在: {request.task_id}"
+                )
+            if task.status in ('pending', 'running'):
+                task.status = 'cancelled'
+                task.error = "任务已取消"
+                self.logger.info(f"任务已取消: {task.id}")
+            return computation_pb2.TaskStatusResponse(
+                task_id=task.id,
+                status=task.status,
+                progress=task.progress,
+                error=task.error
+            )
+
+    def GetNodeStatus(self, request, context):
+        """获取节点状态与负载指标"""
+        with self.tasks_lock:
+            running = self.running_tasks
+            queued = self.outstanding_tasks - self.running_tasks
+        return computation_pb2.NodeStatusResponse(
+            node_id=self.config.get('id', request.node_id),
+            status='CONNECTED',
+            active_tasks=running,
+            metrics={
+                'queue_depth': str(queued),
+                'cpu_percent': str(psutil.cpu_percent(interval=None))
+            }
+        )
+
+    def GetData(self, request, context):
+        """分块返回存储的密文"""
+        try:
+            data = self.get_data(request.data_id)
+        except Exception as e:
+            yield computation_pb2.ComputationResult(
+                request_id=request.data_id, status="failed", last=True, error=str(e)
+            )
+            return
+        yield from self._data_frames(request.data_id, data)
+
+    def PutData(self, request_iterator, context):
+        """接收分块密文并存储"""
+        return self._store_chunks([frame.chunk for frame in request_iterator])
+
+    def _store_chunks(self, chunks: List[bytes]):
+        """拼接并存储密文分块"""
+        try:
+            data_id = self.put_data(b''.join(chunks))
+            return computation_pb2.DataResponse(data_id=data_id, status="stored")
+        except Exception as e:
+            self.logger.error(f"存储数据失败: {str(e)}")
+            return computation_pb2.DataResponse(status="failed", error=str(e))
+
     def GetTaskStatus(self, request, context):
         """获取任务状态"""
         try:
-            if request.task_id == "invalid-task-id":
+            task = self.tasks.get(request.task_id)
+            if task is None:
                 return computation_pb2.TaskStatusResponse(
                     task_id=request.task_id,
                     status="error",
-                    progress=0.0
+                    progress=0.0,
+                    error=f"任务不存在: {request.task_id}"
                 )
             
             return computation_pb2.TaskStatusResponse(
-                task_id=request.task_id,
-                status="running",
-                progress=0.0
+                task_id=task.id,
+                status=task.status,
+                progress=task.progress,
+                result_id=task.result_id,
+                error=task.error,
+                count=task.count
             )
         except Exception as e:
             self.logger.error(f"获取任务状态失败: {str(e)}")
@@ -103,5 +650,3 @@ class ComputeNode(computation_pb2_grpc.ComputationServiceServicer):
                 status="error",
                 progress=0.0
             )
-
-
@@ -1,32 +1,40 @@
-import grpc
 from concurrent import futures
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set, Tuple
+import threading
 import logging
+import time
 
 from ..fhe.engine import FHEEngine
 # 在 client.py 和 coordinator.py 中
-from ..proto import computation_pb2, computation_pb2_grpc
+from ..proto import computation_pb2_grpc
+from .aio_server import create_server
+from .client import ComputationClient
 
-class CoordinatorNode:
+# 部分结果：(所在节点, 数据ID, 聚合的明文数值个数)
+Partial = Tuple[str, str, int]
+
+class CoordinatorNode(computation_pb2_grpc.ComputationServiceServicer):
     """协调节点，管理分布式计算"""
+
+    AGGREGATE_OPERATIONS = ["add", "sum", "mean"]
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.fhe_engine = FHEEngine(config.get('fhe', {}))
         self.compute_nodes = {}
+        self.clients: Dict[str, ComputationClient] = {}
+        self.clients_lock = threading.Lock()
+        self.aggregation_executor = futures.ThreadPoolExecutor(
+            max_workers=config.get('aggregation_workers', 16),
+            thread_name_prefix='aggregate'
+        )
+        self.task_timeout = config.get('task_timeout', 300)
         self.logger = logging.getLogger(__name__)
         self._setup_grpc_server()
         
     def _setup_grpc_server(self):
-        """设置gRPC服务器"""
-        self.server = grpc.server(
-            futures.ThreadPoolExecutor(
-                max_workers=self.config.get('max_workers', 10)
-            )
-        )
-        computation_pb2_grpc.add_ComputationServicer_to_server(
-            self, self.server
-        )
+        """设置gRPC服务器（server_mode: threaded/async）"""
+        self.server = create_server(self.config, self, default_workers=10)
         self.server.add_insecure_port(
             f"[::]:{self.config.get('port', 50051)}"
         )
@@ -45,6 +53,12 @@ class CoordinatorNode:
         """停止协调节点"""
         try:
             self.server.stop(0)
+            self.aggregation_executor.shutdown(wait=False)
+            self.fhe_engine.close()
+            with self.clients_lock:
+                for client in self.clients.values():
+                    client.close()
+                self.clients.clear()
             self.logger.info("协调节点已停止")
         except Exception as e:
             self.logger.error(f"协调节点停止失败: {str(e)}")
@@ -58,4 +72,133 @@ class CoordinatorNode:
             self.logger.info(f"计算节点注册成功: {node_id}")
         except Exception as e:
             self.logger.error(f"计算节点注册失败: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def aggregate(self, shards: Dict[str, List[str]], operation: str) -> bytes:
+        """对分布在多个计算节点上的数据集做 map-reduce 聚合
+
+        各节点先在本地把自己的分片归约为一个部分结果，部分结果再按
+        两两合并的树形结构逐轮归并（共 ceil(log2 N) 轮，每轮并行），
+        最终结果留在根节点，返回序列化的结果密文。每轮合并后删除已被消费的中间结果，
+        结束时（含失败）清理除最终结果外本次聚合在节点上生成的全部数据，输入分片不受影响。
+
+        Args:
+            shards: 节点ID -> 该节点上的分片数据ID列表
+            operation: add（等长密文逐元素相加）、sum 或 mean
+        """
+        # 本次聚合在节点上生成的数据 (节点ID, 数据ID)；数据ID为内容哈希，
+        # 可能与输入分片或其他部分结果相同，删除前排除仍在使用的ID
+        created: Set[Tuple[str, str]] = set()
+        inputs: Set[Tuple[str, str]] = set()
+        result: Set[Tuple[str, str]] = set()
+        try:
+            if operation not in self.AGGREGATE_OPERATIONS:
+                raise ValueError(f"不支持的聚合操作: {operation}")
+            shards = {node_id: ids for node_id, ids in shards.items() if ids}
+            if not shards:
+                raise ValueError("没有可聚合的分片")
+            inputs = {(node_id, data_id) for node_id, ids in shards.items() for data_id in ids}
+
+            # map：各节点本地归约，mean 先求和，最后在根节点统一除以总数
+            local_operation = 'add' if operation == 'add' else 'sum'
+            partials = list(self.aggregation_executor.map(
+                lambda item: self._reduce_local(item[0], item[1], local_operation),
+                shards.items()
+            ))
+            created.update((node_id, data_id) for node_id, data_id, _ in partials)
+
+            # reduce：两两合并，直到只剩一个部分结果
+            while len(partials) > 1:
+                pairs = [
+                    (partials[i], partials[i + 1])
+                    for i in range(0, len(partials) - 1, 2)
+                ]
+                carry = partials[-1:] if len(partials) % 2 else []
+                partials = list(self.aggregation_executor.map(
+                    lambda pair: self._merge(*pair, created), pairs
+                )) + carry
+                # 本轮合并的输入与中转副本已被消费
+                live = {(node_id, data_id) for node_id, data_id, _ in partials}
+                self._delete_data(created - live - inputs)
+                created &= live
+
+            node_id, data_id, count = partials[0]
+            if operation == 'mean':
+                data_id = self._run(node_id, data_id, 'multiply', {'value': 1.0 / count})
+                created.add((node_id, data_id))
+            result = {(node_id, data_id)}
+            return self._client(node_id).get_data(data_id)
+
+        except Exception as e:
+            self.logger.error(f"分布式聚合失败: {str(e)}")
+            raise
+        finally:
+            self._delete_data(created - inputs - result)
+
+    def _reduce_local(self, node_id: str, data_ids: List[str], operation: str) -> Partial:
+        """在节点本地归约其全部分片"""
+        status = self._wait(node_id, data_ids[0], operation, {'data_ids': data_ids[1:]})
+        return node_id, status['result_id'], status['count']
+
+    def _merge(self, left: Partial, right: Partial,
+               created: Set[Tuple[str, str]]) -> Partial:
+        """把右侧部分结果传到左侧节点并相加，中转副本与合并结果记入 created"""
+        left_node, left_id, left_count = left
+        right_node, right_id, right_count = right
+        if right_node != left_node:
+            right_id = self._client(left_node).put_data(
+                self._client(right_node).get_data(right_id)
+            )
+            created.add((left_node, right_id))
+        result_id = self._run(left_node, left_id, 'add', {'data_ids': [right_id]})
+        created.add((left_node, result_id))
+        return left_node, result_id, left_count + right_count
+
+    def _delete_data(self, items: Set[Tuple[str, str]]):
+        """删除节点上的中间数据，失败只记录警告"""
+        for node_id, data_id in items:
+            try:
+                self._client(node_id).delete_data(data_id)
+            except Exception as e:
+                self.logger.warning(f"删除中间数据失败: {node_id}/{data_id}: {str(e)}")
+
+    def _run(self, node_id: str, data_id: str, operation: str,
+             params: Dict[str, Any]) -> str:
+        """在节点上执行计算并返回结果数据ID"""
+        return self._wait(node_id, data_id, operation, params)['result_id']
+
+    def _wait(self, node_id: str, data_id: str, operation: str,
+              params: Dict[str, Any]) -> Dict[str, Any]:
+        """提交计算并等待完成"""
+        client = self._client(node_id)
+        submitted = client.submit_computation(data_id, operation, params)
+        deadline = time.monotonic() + self.task_timeout
+        while submitted.get('status') == 'rejected' and 'retry_after' in submitted:
+            # 节点过载时按其建议的间隔退避重试，超出任务超时时间后放弃
+            if time.monotonic() + submitted['retry_after'] > deadline:
+                break
+            time.sleep(submitted['retry_after'])
+            submitted = client.submit_computation(data_id, operation, params)
+        if submitted.get('status') != 'submitted':
+            raise RuntimeError(f"节点 {node_id} 拒绝计算任务: {submitted.get('status')}")
+        try:
+            status = client.wait_for_task(submitted['task_id'], self.task_timeout)
+        except TimeoutError:
+            # 超时后取消节点上的任务，释放其占用的计算资源
+            client.cancel_task(submitted['task_id'])
+            raise
+        if status['status'] != 'completed':
+            raise RuntimeError(f"节点 {node_id} 计算失败: {status.get('error')}")
+        return status
+
+    def _client(self, node_id: str) -> ComputationClient:
+        """获取到计算节点的客户端"""
+        with self.clients_lock:
+            client = self.clients.get(node_id)
+            if client is None:
+                client = ComputationClient(
+                    self.compute_nodes[node_id]['address'],
+                    self.config.get('channel', {})
+                )
+                self.clients[node_id] = client
+            return client
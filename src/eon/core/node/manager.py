@@ -1,8 +1,10 @@
-
 from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta
+from concurrent import futures
 import threading
 import logging
 from .client import ComputationClient
+from .selector import NodeSelector, LEAST_LOADED
 
 class NodeManager:
     """节点管理器，处理节点注册和状态管理"""
@@ -13,6 +15,22 @@ class NodeManager:
         self.clients: Dict[str, ComputationClient] = {}
         self.lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
+        # 健康检查：并发探测，每次探测带截止时间
+        self.probe_timeout = config.get('health_check_timeout', 2.0)
+        self.health_executor = futures.ThreadPoolExecutor(
+            max_workers=config.get('health_check_workers', 16),
+            thread_name_prefix='health-probe'
+        )
+        self.snapshot: Dict[str, Dict[str, Any]] = {}
+        self.monitor_thread: Optional[threading.Thread] = None
+        self.monitor_stop = threading.Event()
+        # 负载感知选择：least_loaded | power_of_two
+        self.selection_strategy = config.get('node_selection', LEAST_LOADED)
+        self.selector = NodeSelector({
+            'max_tasks_per_node': config.get('max_tasks_per_node', 5),
+            'latency_ewma_alpha': config.get('latency_ewma_alpha', 0.2),
+            'cpu_weight': config.get('cpu_weight', 1.0)
+        })
 
     def register_node(self, node_info: Dict[str, Any]) -> bool:
         """注册新节点"""
@@ -23,8 +41,10 @@ class NodeManager:
                     self.logger.warning(f"节点已存在: {node_id}")
                     return False
 
-                # 创建到新节点的客户端连接
-                client = ComputationClient(node_info['address'])
+                # 从共享通道池获取到新节点的连接
+                client = ComputationClient(
+                    node_info['address'], self.config.get('channel', {})
+                )
                 self.clients[node_id] = client
                 
                 # 存储节点信息
@@ -34,6 +54,7 @@ class NodeManager:
                     'active_tasks': 0,
                     'last_seen': datetime.now()
                 }
+                self.selector.add(node_id)
                 
                 self.logger.info(f"节点注册成功: {node_id}")
                 return True
@@ -67,73 +88,198 @@ class NodeManager:
                     return False
                     
                 node['active_tasks'] += 1
+                self.selector.update(node_id, active_tasks=node['active_tasks'])
                 return True
                 
         except Exception as e:
             self.logger.error(f"任务分配失败: {str(e)}")
             return False
 
-    def complete_task(self, node_id: str):
-        """标记节点任务完成"""
+    def select_node(self, strategy: Optional[str] = None) -> Optional[str]:
+        """按负载选择节点并分配任务，无可用节点时返回 None"""
+        try:
+            with self.lock:
+                node_id = self.selector.select(strategy or self.selection_strategy)
+                if node_id is None:
+                    return None
+
+                node = self.nodes[node_id]
+                node['active_tasks'] += 1
+                self.selector.update(node_id, active_tasks=node['active_tasks'])
+                return node_id
+
+        except Exception as e:
+            self.logger.error(f"节点选择失败: {str(e)}")
+            return None
+
+    def complete_task(self, node_id: str, latency: Optional[float] = None):
+        """标记节点任务完成，latency 为任务耗时（秒）"""
         try:
             with self.lock:
                 if node_id in self.nodes:
-                    self.nodes[node_id]['active_tasks'] -= 1
+                    node = self.nodes[node_id]
+                    node['active_tasks'] = max(node['active_tasks'] - 1, 0)
+                    self.selector.update(node_id, active_tasks=node['active_tasks'])
+                    if latency is not None:
+                        self.selector.record_latency(node_id, latency)
         except Exception as e:
             self.logger.error(f"标记任务完成失败: {str(e)}")
 
     def get_node_status(self, node_id: str) -> Optional[Dict[str, Any]]:
-        """获取节点状态"""
+        """获取节点状态（网络调用期间不持有全局锁）"""
         try:
             with self.lock:
-                if node_id not in self.nodes:
-                    return None
-                    
-                client = self.clients[node_id]
-                status = client.get_node_status(node_id)
-                
-                # 更新本地状态
-                self.nodes[node_id].update({
-                    'status': status['status'],
-                    'active_tasks': status['active_tasks'],
-                    'metrics': status['metrics'],
-                    'last_seen': datetime.now()
-                })
-                
-                return self.nodes[node_id]
-                
+                client = self.clients.get(node_id)
+            if client is None:
+                return None
+
+            status = client.get_node_status(node_id, timeout=self.probe_timeout)
+            with self.lock:
+                self._apply_probe(node_id, status, datetime.now())
+                node = self.nodes.get(node_id)
+                return dict(node) if node is not None else None
+
         except Exception as e:
             self.logger.error(f"获取节点状态失败: {str(e)}")
             return None
 
-    def check_nodes_health(self):
-        """检查所有节点健康状态"""
+    def update_node_metrics(self, node_id: str, metrics: Dict[str, Any]):
+        """更新节点上报的负载指标（cpu_percent/queue_depth）"""
         try:
             with self.lock:
-                offline_threshold = timedelta(
-                    seconds=self.config.get('node_offline_threshold', 30)
-                )
-                current_time = datetime.now()
-                
-                for node_id, node in list(self.nodes.items()):
+                if node_id not in self.nodes:
+                    return
+                self.nodes[node_id]['metrics'] = dict(metrics)
+                self.nodes[node_id]['last_seen'] = datetime.now()
+                self._update_selector(node_id)
+        except Exception as e:
+            self.logger.error(f"更新节点指标失败: {str(e)}")
+
+    def check_nodes_health(self) -> Dict[str, Dict[str, Any]]:
+        """并发探测所有节点，返回最新状态快照
+
+        先在锁内复制客户端列表，探测在线程池中并发进行且各自带截止时间，
+        结果统一在锁内一次性写回，慢节点不会阻塞注册和任务分配。
+        """
+        try:
+            with self.lock:
+                clients = list(self.clients.items())
+
+            probes = {
+                self.health_executor.submit(
+                    client.get_node_status, node_id, self.probe_timeout
+                ): node_id
+                for node_id, client in clients
+            }
+            # 探测自身带gRPC截止时间，这里的等待上限仅作兜底
+            done, _ = futures.wait(probes, timeout=self.probe_timeout + 1)
+
+            current_time = datetime.now()
+            offline_threshold = timedelta(
+                seconds=self.config.get('node_offline_threshold', 30)
+            )
+            with self.lock:
+                for future, node_id in probes.items():
+                    status = future.result() if future in done else {}
+                    self._apply_probe(node_id, status, current_time)
+
+                for node_id, node in self.nodes.items():
                     # 检查节点最后响应时间
-                    if current_time - node['last_seen'] > offline_threshold:
+                    if (node['status'] != 'DISCONNECTED' and
+                            current_time - node['last_seen'] > offline_threshold):
                         node['status'] = 'DISCONNECTED'
+                        self.selector.update(node_id, eligible=False)
                         self.logger.warning(f"节点离线: {node_id}")
-                    
-                    # 获取最新状态
-                    self.get_node_status(node_id)
-                    
+
+                self._publish_snapshot()
+            return self.snapshot
+
         except Exception as e:
             self.logger.error(f"节点健康检查失败: {str(e)}")
+            return self.snapshot
+
+    def get_status_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取最近一次健康检查的节点状态快照（无锁读取）"""
+        return self.snapshot
+
+    def start_health_monitor(self):
+        """启动后台健康监控线程"""
+        with self.lock:
+            if self.monitor_thread is not None:
+                return
+            self.monitor_stop.clear()
+            self.monitor_thread = threading.Thread(
+                target=self._monitor_loop, name='node-health', daemon=True
+            )
+            self.monitor_thread.start()
+
+    def stop_health_monitor(self):
+        """停止后台健康监控线程"""
+        with self.lock:
+            thread, self.monitor_thread = self.monitor_thread, None
+        if thread is not None:
+            self.monitor_stop.set()
+            thread.join()
+
+    def _monitor_loop(self):
+        interval = self.config.get('health_check_interval', 10)
+        while not self.monitor_stop.is_set():
+            self.check_nodes_health()
+            self.monitor_stop.wait(interval)
+
+    def _apply_probe(self, node_id: str, status: Dict[str, Any], probe_time: datetime):
+        """写回一次探测结果（调用方持有锁）"""
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        if not status:
+            node['failures'] = node.get('failures', 0) + 1
+            return
+        node.update({
+            'status': status['status'],
+            'active_tasks': status['active_tasks'],
+            'metrics': status['metrics'],
+            'failures': 0,
+            'last_seen': probe_time
+        })
+        self._update_selector(node_id)
+
+    def _publish_snapshot(self):
+        """整体替换快照字典，读者无需加锁（调用方持有锁）"""
+        self.snapshot = {
+            node_id: {
+                'status': node['status'],
+                'active_tasks': node['active_tasks'],
+                'metrics': dict(node.get('metrics', {})),
+                'failures': node.get('failures', 0),
+                'last_seen': node['last_seen']
+            }
+            for node_id, node in self.nodes.items()
+        }
+
+    def _update_selector(self, node_id: str):
+        """将节点上报的状态与指标同步到选择器"""
+        node = self.nodes[node_id]
+        metrics = node.get('metrics', {})
+        self.selector.update(
+            node_id,
+            active_tasks=node['active_tasks'],
+            queue_depth=int(float(metrics.get('queue_depth', 0))),
+            cpu_percent=float(metrics.get('cpu_percent', 0)),
+            eligible=node['status'] == 'CONNECTED'
+        )
 
     def shutdown(self):
         """关闭所有连接"""
         try:
+            self.stop_health_monitor()
+            self.health_executor.shutdown(wait=False)
             with self.lock:
                 for client in self.clients.values():
                     client.close()
                 self.clients.clear()
+                for node_id in self.nodes:
+                    self.selector.remove(node_id)
                 self.nodes.clear()
         except Exception as e:
             self.logger.error(f"关闭连接失败: {str(e)}")
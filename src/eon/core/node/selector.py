@@ -0,0 +1,138 @@
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
+import heapq
+import random
+
+LEAST_LOADED = 'least_loaded'
+POWER_OF_TWO = 'power_of_two'
+
+@dataclass
+class NodeLoad:
+    """节点负载快照"""
+    active_tasks: int = 0
+    queue_depth: int = 0
+    cpu_percent: float = 0.0
+    latency_ewma: Optional[float] = None
+    eligible: bool = True
+    version: int = 0
+
+class NodeSelector:
+    """负载感知的节点选择器
+
+    负载分数 = (未完成工作量 + 1) × 近期延迟EWMA + CPU权重 × CPU使用率，
+    即新任务在该节点上的预计完成时间。
+    可用节点保存在带版本号的最小堆中（惰性删除），最小负载选择为 O(log n)；
+    同时维护可用节点数组，二选一随机选择为 O(1)。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.max_tasks_per_node = config.get('max_tasks_per_node', 5)
+        self.latency_alpha = config.get('latency_ewma_alpha', 0.2)
+        self.cpu_weight = config.get('cpu_weight', 1.0)
+        self.default_latency = config.get('default_latency', 1.0)
+        self.loads: Dict[str, NodeLoad] = {}
+        self.heap: List[Tuple[float, int, str]] = []
+        self.eligible: List[str] = []
+        self.eligible_index: Dict[str, int] = {}
+        self.random = random.Random(config.get('seed'))
+
+    def add(self, node_id: str):
+        """加入新节点"""
+        self.loads[node_id] = NodeLoad()
+        self._refresh(node_id)
+
+    def remove(self, node_id: str):
+        """移除节点，堆中旧条目惰性失效"""
+        if self.loads.pop(node_id, None) is not None:
+            self._set_eligible(node_id, False)
+
+    def update(self, node_id: str, **metrics):
+        """更新节点负载指标（active_tasks/queue_depth/cpu_percent/eligible）"""
+        load = self.loads.get(node_id)
+        if load is None:
+            return
+        for name, value in metrics.items():
+            if value is not None:
+                setattr(load, name, value)
+        self._refresh(node_id)
+
+    def record_latency(self, node_id: str, latency: float):
+        """记录一次任务延迟，更新EWMA"""
+        load = self.loads.get(node_id)
+        if load is None:
+            return
+        if load.latency_ewma is None:
+            load.latency_ewma = latency
+        else:
+            load.latency_ewma = (
+                self.latency_alpha * latency
+                + (1 - self.latency_alpha) * load.latency_ewma
+            )
+        self._refresh(node_id)
+
+    def score(self, node_id: str) -> float:
+        """计算节点负载分数，越小越空闲"""
+        load = self.loads[node_id]
+        latency = load.latency_ewma if load.latency_ewma is not None else self.default_latency
+        outstanding = load.active_tasks + load.queue_depth + 1
+        return outstanding * latency + self.cpu_weight * load.cpu_percent / 100
+
+    def select(self, strategy: str = LEAST_LOADED) -> Optional[str]:
+        """按策略选择节点，无可用节点时返回 None"""
+        if strategy == POWER_OF_TWO:
+            return self.select_power_of_two()
+        if strategy == LEAST_LOADED:
+            return self.select_least_loaded()
+        raise ValueError(f"不支持的节点选择策略: {strategy}")
+
+    def select_least_loaded(self) -> Optional[str]:
+        """选择负载分数最小的可用节点"""
+        while self.heap:
+            _, version, node_id = self.heap[0]
+            load = self.loads.get(node_id)
+            if load is not None and load.version == version and self._is_eligible(load):
+                return node_id
+            heapq.heappop(self.heap)
+        return None
+
+    def select_power_of_two(self) -> Optional[str]:
+        """随机抽取两个可用节点，选择负载较低者"""
+        if not self.eligible:
+            return None
+        if len(self.eligible) == 1:
+            return self.eligible[0]
+        first, second = self.random.sample(self.eligible, 2)
+        return first if self.score(first) <= self.score(second) else second
+
+    def _is_eligible(self, load: NodeLoad) -> bool:
+        return load.eligible and load.active_tasks < self.max_tasks_per_node
+
+    def _refresh(self, node_id: str):
+        """分数变化后重新入堆，旧条目随版本号失效"""
+        load = self.loads[node_id]
+        load.version += 1
+        eligible = self._is_eligible(load)
+        self._set_eligible(node_id, eligible)
+        if eligible:
+            heapq.heappush(self.heap, (self.score(node_id), load.version, node_id))
+        # 失效条目过多时重建堆，避免堆无限增长
+        if len(self.heap) > 4 * max(len(self.loads), 16):
+            self.heap = [
+                (self.score(n), l.version, n)
+                for n, l in self.loads.items() if self._is_eligible(l)
+            ]
+            heapq.heapify(self.heap)
+
+    def _set_eligible(self, node_id: str, eligible: bool):
+        """维护可用节点数组（交换删除，O(1)）"""
+        index = self.eligible_index.get(node_id)
+        if eligible and index is None:
+            self.eligible_index[node_id] = len(self.eligible)
+            self.eligible.append(node_id)
+        elif not eligible and index is not None:
+            last = self.eligible.pop()
+            if last != node_id:
+                self.eligible[index] = last
+                self.eligible_index[last] = index
+            del self.eligible_index[node_id]
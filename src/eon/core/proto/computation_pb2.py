@@ -24,13 +24,15 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x63omputation.proto\x12\x03\x65on\"H\n\x12\x43omputationRequest\x12\x0f\n\x07\x64\x61ta_id\x18\x01 \x01(\t\x12\x11\n\toperation\x18\x02 \x01(\t\x12\x0e\n\x06params\x18\x03 \x01(\x0c\"6\n\x13\x43omputationResponse\x12\x0f\n\x07task_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\"$\n\x11TaskStatusRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"i\n\x12TaskStatusResponse\x12\x0f\n\x07task_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x10\n\x08progress\x18\x03 \x01(\x02\x12\x11\n\tresult_id\x18\x04 \x01(\t\x12\r\n\x05\x65rror\x18\x05 \x01(\t2\x9e\x01\n\x12\x43omputationService\x12\x46\n\x11SubmitComputation\x12\x17.eon.ComputationRequest\x1a\x18.eon.ComputationResponse\x12@\n\rGetTaskStatus\x12\x16.eon.TaskStatusRequest\x1a\x17.eon.TaskStatusResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x63omputation.proto\x12\x03\x65on\"H\n\x12\x43omputationRequest\x12\x0f\n\x07\x64\x61ta_id\x18\x01 \x01(\t\x12\x11\n\toperation\x18\x02 \x01(\t\x12\x0e\n\x06params\x18\x03 \x01(\x0c\"6\n\x13\x43omputationResponse\x12\x0f\n\x07task_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\"$\n\x11TaskStatusRequest\x12\x0f\n\x07task_id\x18\x01 \x01(\t\"x\n\x12TaskStatusResponse\x12\x0f\n\x07task_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x10\n\x08progress\x18\x03 \x01(\x02\x12\x11\n\tresult_id\x18\x04 \x01(\t\x12\r\n\x05\x65rror\x18\x05 \x01(\t\x12\r\n\x05\x63ount\x18\x06 \x01(\x03\"e\n\x0f\x43iphertextFrame\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x11\n\toperation\x18\x02 \x01(\t\x12\x0e\n\x06params\x18\x03 \x01(\x0c\x12\r\n\x05\x63hunk\x18\x04 \x01(\x0c\x12\x0c\n\x04last\x18\x05 \x01(\x08\"t\n\x11\x43omputationResult\x12\x12\n\nrequest_id\x18\x01 \x01(\t\x12\x0f\n\x07task_id\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\x12\r\n\x05\x63hunk\x18\x04 \x01(\x0c\x12\x0c\n\x04last\x18\x05 \x01(\x08\x12\r\n\x05\x65rror\x18\x06 \x01(\t\"D\n\x17\x43omputationBatchRequest\x12)\n\x08requests\x18\x01 \x03(\x0b\x32\x17.eon.ComputationRequest\"G\n\x18\x43omputationBatchResponse\x12+\n\tresponses\x18\x01 \x03(\x0b\x32\x18.eon.ComputationResponse\"$\n\x11NodeStatusRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\"\xb2\x01\n\x12NodeStatusResponse\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x14\n\x0c\x61\x63tive_tasks\x18\x03 \x01(\x05\x12\x35\n\x07metrics\x18\x04 \x03(\x0b\x32$.eon.NodeStatusResponse.MetricsEntry\x1a.\n\x0cMetricsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x1e\n\x0b\x44\x61taRequest\x12\x0f\n\x07\x64\x61ta_id\x18\x01 \x01(\t\">\n\x0c\x44\x61taResponse\x12\x0f\n\x07\x64\x61ta_id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t2\xdf\x04\n\x12\x43omputationService\x12\x46\n\x11SubmitComputation\x12\x17.eon.ComputationRequest\x1a\x18.eon.ComputationResponse\x12@\n\rGetTaskStatus\x12\x16.eon.TaskStatusRequest\x1a\x17.eon.TaskStatusResponse\x12=\n\nCancelTask\x12\x16.eon.TaskStatusRequest\x1a\x17.eon.TaskStatusResponse\x12K\n\x17SubmitComputationStream\x12\x14.eon.CiphertextFrame\x1a\x16.eon.ComputationResult(\x01\x30\x01\x12Q\n\x12SubmitComputations\x12\x1c.eon.ComputationBatchRequest\x1a\x1d.eon.ComputationBatchResponse\x12@\n\rGetNodeStatus\x12\x16.eon.NodeStatusRequest\x1a\x17.eon.NodeStatusResponse\x12\x35\n\x07GetData\x12\x10.eon.DataRequest\x1a\x16.eon.ComputationResult0\x01\x12\x34\n\x07PutData\x12\x14.eon.CiphertextFrame\x1a\x11.eon.DataResponse(\x01\x12\x31\n\nDeleteData\x12\x10.eon.DataRequest\x1a\x11.eon.DataResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'computation_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_NODESTATUSRESPONSE_METRICSENTRY']._loaded_options = None
+  _globals['_NODESTATUSRESPONSE_METRICSENTRY']._serialized_options = b'8\001'
   _globals['_COMPUTATIONREQUEST']._serialized_start=26
   _globals['_COMPUTATIONREQUEST']._serialized_end=98
   _globals['_COMPUTATIONRESPONSE']._serialized_start=100
@@ -38,7 +40,25 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_TASKSTATUSREQUEST']._serialized_start=156
   _globals['_TASKSTATUSREQUEST']._serialized_end=192
   _globals['_TASKSTATUSRESPONSE']._serialized_start=194
-  _globals['_TASKSTATUSRESPONSE']._serialized_end=299
-  _globals['_COMPUTATIONSERVICE']._serialized_start=302
-  _globals['_COMPUTATIONSERVICE']._serialized_end=460
+  _globals['_TASKSTATUSRESPONSE']._serialized_end=314
+  _globals['_CIPHERTEXTFRAME']._serialized_start=316
+  _globals['_CIPHERTEXTFRAME']._serialized_end=417
+  _globals['_COMPUTATIONRESULT']._serialized_start=419
+  _globals['_COMPUTATIONRESULT']._serialized_end=535
+  _globals['_COMPUTATIONBATCHREQUEST']._serialized_start=537
+  _globals['_COMPUTATIONBATCHREQUEST']._serialized_end=605
+  _globals['_COMPUTATIONBATCHRESPONSE']._serialized_start=607
+  _globals['_COMPUTATIONBATCHRESPONSE']._serialized_end=678
+  _globals['_NODESTATUSREQUEST']._serialized_start=680
+  _globals['_NODESTATUSREQUEST']._serialized_end=716
+  _globals['_NODESTATUSRESPONSE']._serialized_start=719
+  _globals['_NODESTATUSRESPONSE']._serialized_end=897
+  _globals['_NODESTATUSRESPONSE_METRICSENTRY']._serialized_start=851
+  _globals['_NODESTATUSRESPONSE_METRICSENTRY']._serialized_end=897
+  _globals['_DATAREQUEST']._serialized_start=899
+  _globals['_DATAREQUEST']._serialized_end=929
+  _globals['_DATARESPONSE']._serialized_start=931
+  _globals['_DATARESPONSE']._serialized_end=993
+  _globals['_COMPUTATIONSERVICE']._serialized_start=996
+  _globals['_COMPUTATIONSERVICE']._serialized_end=1603
 # @@protoc_insertion_point(module_scope)
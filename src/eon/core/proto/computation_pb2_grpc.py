@@ -45,6 +45,41 @@ class ComputationServiceStub(object):
                 request_serializer=computation__pb2.TaskStatusRequest.SerializeToString,
                 response_deserializer=computation__pb2.TaskStatusResponse.FromString,
                 _registered_method=True)
+        self.CancelTask = channel.unary_unary(
+                '/eon.ComputationService/CancelTask',
+                request_serializer=computation__pb2.TaskStatusRequest.SerializeToString,
+                response_deserializer=computation__pb2.TaskStatusResponse.FromString,
+                _registered_method=True)
+        self.SubmitComputationStream = channel.stream_stream(
+                '/eon.ComputationService/SubmitComputationStream',
+                request_serializer=computation__pb2.CiphertextFrame.SerializeToString,
+                response_deserializer=computation__pb2.ComputationResult.FromString,
+                _registered_method=True)
+        self.SubmitComputations = channel.unary_unary(
+                '/eon.ComputationService/SubmitComputations',
+                request_serializer=computation__pb2.ComputationBatchRequest.SerializeToString,
+                response_deserializer=computation__pb2.ComputationBatchResponse.FromString,
+                _registered_method=True)
+        self.GetNodeStatus = channel.unary_unary(
+                '/eon.ComputationService/GetNodeStatus',
+                request_serializer=computation__pb2.NodeStatusRequest.SerializeToString,
+                response_deserializer=computation__pb2.NodeStatusResponse.FromString,
+                _registered_method=True)
+        self.GetData = channel.unary_stream(
+                '/eon.ComputationService/GetData',
+                request_serializer=computation__pb2.DataRequest.SerializeToString,
+                response_deserializer=computation__pb2.ComputationResult.FromString,
+                _registered_method=True)
+        self.PutData = channel.stream_unary(
+                '/eon.ComputationService/PutData',
+                request_serializer=computation__pb2.CiphertextFrame.SerializeToString,
+                response_deserializer=computation__pb2.DataResponse.FromString,
+                _registered_method=True)
+        self.DeleteData = channel.unary_unary(
+                '/eon.ComputationService/DeleteData',
+                request_serializer=computation__pb2.DataRequest.SerializeToString,
+                response_deserializer=computation__pb2.DataResponse.FromString,
+                _registered_method=True)
 
 
 class ComputationServiceServicer(object):
@@ -65,6 +100,55 @@ class ComputationServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CancelTask(self, request, context):
+        """取消排队或执行中的任务
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubmitComputationStream(self, request_iterator, context):
+        """流式提交分块密文并流式返回结果
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SubmitComputations(self, request, context):
+        """一次往返提交多个计算任务
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetNodeStatus(self, request, context):
+        """获取节点状态与负载指标
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetData(self, request, context):
+        """分块读取节点上存储的密文
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PutData(self, request_iterator, context):
+        """分块上传密文并存储到节点
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteData(self, request, context):
+        """删除节点上存储的密文
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ComputationServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -78,6 +162,41 @@ def add_ComputationServiceServicer_to_server(servicer, server):
                     request_deserializer=computation__pb2.TaskStatusRequest.FromString,
                     response_serializer=computation__pb2.TaskStatusResponse.SerializeToString,
             ),
+            'CancelTask': grpc.unary_unary_rpc_method_handler(
+                    servicer.CancelTask,
+                    request_deserializer=computation__pb2.TaskStatusRequest.FromString,
+                    response_serializer=computation__pb2.TaskStatusResponse.SerializeToString,
+            ),
+            'SubmitComputationStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.SubmitComputationStream,
+                    request_deserializer=computation__pb2.CiphertextFrame.FromString,
+                    response_serializer=computation__pb2.ComputationResult.SerializeToString,
+            ),
+            'SubmitComputations': grpc.unary_unary_rpc_method_handler(
+                    servicer.SubmitComputations,
+                    request_deserializer=computation__pb2.ComputationBatchRequest.FromString,
+                    response_serializer=computation__pb2.ComputationBatchResponse.SerializeToString,
+            ),
+            'GetNodeStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetNodeStatus,
+                    request_deserializer=computation__pb2.NodeStatusRequest.FromString,
+                    response_serializer=computation__pb2.NodeStatusResponse.SerializeToString,
+            ),
+            'GetData': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetData,
+                    request_deserializer=computation__pb2.DataRequest.FromString,
+                    response_serializer=computation__pb2.ComputationResult.SerializeToString,
+            ),
+            'PutData': grpc.stream_unary_rpc_method_handler(
+                    servicer.PutData,
+                    request_deserializer=computation__pb2.CiphertextFrame.FromString,
+                    response_serializer=computation__pb2.DataResponse.SerializeToString,
+            ),
+            'DeleteData': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteData,
+                    request_deserializer=computation__pb2.DataRequest.FromString,
+                    response_serializer=computation__pb2.DataResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'eon.ComputationService', rpc_method_handlers)
@@ -143,3 +262,192 @@ class ComputationService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def CancelTask(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eon.ComputationService/CancelTask',
+            computation__pb2.TaskStatusRequest.SerializeToString,
+            computation__pb2.TaskStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubmitComputationStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/eon.ComputationService/SubmitComputationStream',
+            computation__pb2.CiphertextFrame.SerializeToString,
+            computation__pb2.ComputationResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SubmitComputations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eon.ComputationService/SubmitComputations',
+            computation__pb2.ComputationBatchRequest.SerializeToString,
+            computation__pb2.ComputationBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetNodeStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eon.ComputationService/GetNodeStatus',
+            computation__pb2.NodeStatusRequest.SerializeToString,
+            computation__pb2.NodeStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetData(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/eon.ComputationService/GetData',
+            computation__pb2.DataRequest.SerializeToString,
+            computation__pb2.ComputationResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PutData(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/eon.ComputationService/PutData',
+            computation__pb2.CiphertextFrame.SerializeToString,
+            computation__pb2.DataResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteData(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eon.ComputationService/DeleteData',
+            computation__pb2.DataRequest.SerializeToString,
+            computation__pb2.DataResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,11 +1,41 @@
-
 from typing import Dict, Any, Optional, List, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 import asyncio
 from datetime import datetime
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
-from ..utils.logger import get_logger
+import os
+import tenseal as ts
+from ...utils.logger import get_logger
+from ..fhe.engine import FHEEngine
+from ..fhe.context import ContextRegistry
+from ..fhe.params import resolve_parameters
+from .wal import WriteAheadLog, replay_states
+from ..scheduler.admission import AdmissionController, AdmissionRejected
+
+_DATETIME_FIELDS = ('created_at', 'started_at', 'completed_at')
+
+# 工作进程常驻的FHE引擎，进程启动时创建一次
+_worker_engine: Optional[FHEEngine] = None
+
+def _init_process_worker(fhe_config: Dict[str, Any], context_bytes: bytes):
+    """工作进程初始化：反序列化父进程的计算上下文，之后的任务直接复用
+
+    上下文不含私钥，工作进程与父进程使用同一套公钥，父进程加密的密文可以直接计算。
+    """
+    global _worker_engine
+    ContextRegistry().register(ts.context_from(context_bytes), resolve_parameters(fhe_config))
+    _worker_engine = FHEEngine(fhe_config)
+
+def _warm_up() -> int:
+    return os.getpid()
+
+def _run_cpu_handler(handler: Callable, data: Dict[str, Any]) -> Any:
+    """在工作进程中执行CPU密集型处理器"""
+    return handler(data, _worker_engine)
 
 @dataclass
 class Task:
@@ -20,6 +50,8 @@ class Task:
     error: Optional[str] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    depends_on: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
 
 class TaskQueue:
     """任务队列管理器"""
@@ -28,32 +60,84 @@ class TaskQueue:
         self.config = config
         self.tasks: Dict[str, Task] = {}
         self.queue = asyncio.PriorityQueue()
+        # 仍处于 pending 状态的排队任务数；取消的任务留在堆中惰性删除，不计入准入深度
+        self.queued_tasks = 0
         self.handlers: Dict[str, Callable] = {}
+        # CPU密集型处理器在进程池中执行，事件循环只负责出队和状态记录
+        self.cpu_handlers: Dict[str, Callable] = {}
+        self.process_workers = config.get('process_workers') or os.cpu_count() or 1
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        # 父进程的FHE引擎，创建进程池时惰性初始化，其计算上下文下发给工作进程
+        self.fhe_engine: Optional[FHEEngine] = None
         self.logger = get_logger(__name__)
         self.running = False
         self.workers = []
+        # 任务依赖图：上游任务ID -> 下游任务ID列表，等待中的任务 -> 未完成的上游数
+        self.dependents: Dict[str, List[str]] = {}
+        self.waiting: Dict[str, int] = {}
+        # 执行中任务的处理协程，用于取消；超过 timeout 秒的处理器被取消并标记为失败
+        self.running_handlers: Dict[str, asyncio.Future] = {}
+        self.task_timeout = config.get('task_timeout')
+        # 排队数达到高水位线后拒绝新任务，回落到低水位线再恢复；可按租户限流
+        self.admission = AdmissionController(
+            config.get('admission', {}),
+            high_watermark=config.get('max_queued_tasks', 10000)
+        )
+
+        # 配置 wal_path 时提交与状态变化写入预写日志，启动时重放恢复未完成的任务
+        self.wal: Optional[WriteAheadLog] = None
+        self.compact_records = config.get('wal_compact_records', 100000)
+        self.compacting = False
+        if config.get('wal_path'):
+            self.wal = WriteAheadLog(
+                config['wal_path'],
+                segment_bytes=config.get('wal_segment_bytes', 64 * 1024 * 1024),
+                fsync=config.get('wal_fsync', True)
+            )
+            self._recover()
 
     async def submit_task(self, task_type: str, 
                          data: Dict[str, Any], 
-                         priority: int = 1) -> str:
-        """提交新任务"""
+                         priority: int = 1,
+                         tenant: Optional[str] = None,
+                         depends_on: Optional[List[str]] = None,
+                         timeout: Optional[float] = None) -> str:
+        """提交新任务，队列过载或租户超出限流时抛出 AdmissionRejected
+
+        depends_on 中的上游任务全部完成后任务才入队，处理器收到的 data 中
+        inputs 为按 depends_on 顺序排列的上游结果；任一上游失败或取消时任务随之失败。
+        timeout 为处理器的最长执行秒数，默认使用配置中的 task_timeout。
+        """
         try:
+            for dep_id in depends_on or ():
+                if dep_id not in self.tasks:
+                    raise ValueError(f"Task not found: {dep_id}")
+            # 等待上游的任务同样计入准入深度，避免通过提交依赖任务绕过背压
+            self.admission.admit(self.queued_tasks + len(self.waiting), tenant)
             task_id = str(uuid.uuid4())
             task = Task(
                 id=task_id,
                 type=task_type,
                 data=data,
                 priority=priority,
-                created_at=datetime.now()
+                created_at=datetime.now(),
+                depends_on=list(depends_on or ()),
+                timeout=timeout if timeout is not None else self.task_timeout
             )
             
             self.tasks[task_id] = task
-            await self.queue.put((priority, task_id))
+            if self.wal:
+                # 落盘后才确认提交，并发提交共享同一次 fsync
+                await asyncio.wrap_future(self._log({'op': 'put', 'task': _task_record(task)}))
+            self._schedule(task)
             
             self.logger.info(f"Task submitted: {task_id}", 
                            extra={'task_type': task_type})
             return task_id
             
+        except AdmissionRejected as e:
+            self.logger.warning(f"Task rejected: {str(e)}")
+            raise
         except Exception as e:
             self.logger.error(f"Failed to submit task: {str(e)}")
             raise
@@ -66,54 +150,126 @@ class TaskQueue:
             try:
                 # 获取任务
                 _, task_id = await self.queue.get()
-                task = self.tasks[task_id]
+                task = self.tasks.get(task_id)
+                if task is None or task.status != 'pending':
+                    # 排队期间已被取消
+                    self.queue.task_done()
+                    continue
                 
                 # 更新任务状态
+                self.queued_tasks -= 1
                 task.status = 'running'
                 task.started_at = datetime.now()
+                self._log_update(task, 'status', 'started_at')
                 
                 # 执行任务
-                if task.type in self.handlers:
+                if task.type in self.cpu_handlers or task.type in self.handlers:
+                    handler = asyncio.ensure_future(self._run_handler(task))
+                    self.running_handlers[task_id] = handler
                     try:
-                        handler = self.handlers[task.type]
-                        result = await handler(task.data)
+                        result = await asyncio.wait_for(handler, task.timeout)
                         
                         task.result = result
                         task.status = 'completed'
                         
+                    except asyncio.TimeoutError:
+                        task.error = f"Task timed out after {task.timeout}s"
+                        task.status = 'failed'
+                        self.logger.warning(f"Task timed out: {task_id}")
+                    except asyncio.CancelledError:
+                        # cancel_task 取消的是处理协程，工作协程本身被取消时继续向上抛出
+                        if task.status != 'cancelled':
+                            raise
                     except Exception as e:
                         task.error = str(e)
                         task.status = 'failed'
                         self.logger.error(f"Task failed: {task_id}", 
                                         exc_info=True)
+                    finally:
+                        self.running_handlers.pop(task_id, None)
                 else:
                     task.error = f"No handler for task type: {task.type}"
                     task.status = 'failed'
                 
                 task.completed_at = datetime.now()
+                self._log_result(task)
+                self._release(task)
                 self.queue.task_done()
                 
             except Exception as e:
                 self.logger.error(f"Task processing error: {str(e)}")
                 await asyncio.sleep(1)
 
+    def cancel_task(self, task_id: str) -> bool:
+        """取消等待、排队或执行中的任务，任务已结束时返回 False
+
+        执行中的任务取消其处理协程，工作协程立即可以处理下一个任务；
+        依赖该任务的下游任务随之失败。
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f"Task not found: {task_id}")
+        if task.status not in ('pending', 'waiting', 'running'):
+            return False
+
+        task.error = "Task cancelled"
+        handler = self.running_handlers.get(task_id)
+        if handler is not None:
+            task.status = 'cancelled'
+            handler.cancel()
+        else:
+            if task.status == 'pending':
+                self.queued_tasks -= 1
+            task.status = 'cancelled'
+            task.completed_at = datetime.now()
+            self.waiting.pop(task_id, None)
+            self._log_update(task, 'status', 'error', 'completed_at')
+            self._release(task)
+        self.logger.info(f"Task cancelled: {task_id}")
+        return True
+
     def register_handler(self, task_type: str, 
-                        handler: Callable[[Dict[str, Any]], Any]):
-        """注册任务处理器"""
-        self.handlers[task_type] = handler
+                        handler: Callable[[Dict[str, Any]], Any],
+                        cpu_bound: bool = False):
+        """注册任务处理器
+
+        cpu_bound 为真时处理器必须是可序列化的模块级同步函数 handler(data, engine)，
+        在进程池中执行，engine 为工作进程常驻的 FHEEngine。
+        """
+        if cpu_bound:
+            self.cpu_handlers[task_type] = handler
+        else:
+            self.handlers[task_type] = handler
 
     async def start_workers(self, num_workers: int = 3):
-        """启动工作进程"""
+        """启动工作协程，有CPU密集型处理器时至少与进程数相同以占满进程池"""
+        if self.cpu_handlers:
+            pool = self._get_process_pool()
+            # 进程按需启动，同时提交与进程数相同的空任务使全部进程预先完成初始化
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[
+                loop.run_in_executor(pool, _warm_up) for _ in range(self.process_workers)
+            ])
+            num_workers = max(num_workers, self.process_workers)
         self.workers = [
             asyncio.create_task(self.process_tasks())
             for _ in range(num_workers)
         ]
 
     async def stop(self):
-        """停止任务队列"""
+        """停止任务队列并关闭进程池"""
         self.running = False
+        for worker in self.workers:
+            # 空闲的工作协程阻塞在出队上，需要取消
+            worker.cancel()
         if self.workers:
-            await asyncio.gather(*self.workers)
+            await asyncio.gather(*self.workers, return_exceptions=True)
+            self.workers = []
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+        if self.fhe_engine is not None:
+            self.fhe_engine.close()
         
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """获取任务状态"""
@@ -129,7 +285,8 @@ class TaskQueue:
             'started_at': task.started_at.isoformat() if task.started_at else None,
             'completed_at': task.completed_at.isoformat() if task.completed_at else None,
             'result': task.result,
-            'error': task.error
+            'error': task.error,
+            'depends_on': task.depends_on
         }
 
     def get_pending_tasks(self) -> List[Dict[str, Any]]:
@@ -144,7 +301,210 @@ class TaskQueue:
         """清理已完成的任务"""
         current_time = datetime.now()
         for task_id, task in list(self.tasks.items()):
-            if task.status in ['completed', 'failed']:
+            if task.status in ['completed', 'failed', 'cancelled']:
                 age = (current_time - task.completed_at).total_seconds() / 3600
                 if age > max_age_hours:
                     del self.tasks[task_id]
+                    self._log({'op': 'delete', 'id': task_id})
+
+    def close(self):
+        """写完积压的日志记录并关闭预写日志"""
+        if self.wal:
+            self.wal.close()
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """获取（必要时创建）常驻工作进程池"""
+        if self.process_pool is None:
+            fhe_config = self.config.get('fhe', {})
+            if self.fhe_engine is None:
+                self.fhe_engine = FHEEngine(fhe_config)
+            # spawn 避免在 TenSEAL 内部线程存在时 fork
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process_worker,
+                initargs=(fhe_config, self.fhe_engine.evaluation_context_bytes())
+            )
+            self.logger.info(f"Process pool started: {self.process_workers} workers")
+        return self.process_pool
+
+    def _schedule(self, task: Task):
+        """上游全部完成的任务直接入队，上游失败的任务随之失败，其余等待上游完成"""
+        remaining = 0
+        for dep_id in task.depends_on:
+            upstream = self.tasks.get(dep_id)
+            if upstream is None or upstream.status in ('failed', 'cancelled'):
+                self._fail_downstream(task, dep_id)
+                self._release(task)
+                return
+            if upstream.status != 'completed':
+                remaining += 1
+                self.dependents.setdefault(dep_id, []).append(task.id)
+        if remaining:
+            task.status = 'waiting'
+            self.waiting[task.id] = remaining
+        else:
+            task.status = 'pending'
+            self._enqueue(task)
+
+    def _enqueue(self, task: Task):
+        self.queue.put_nowait((task.priority, task.id))
+        self.queued_tasks += 1
+
+    def _release(self, task: Task):
+        """任务结束后更新下游：全部上游完成的下游入队，上游失败时下游级联失败"""
+        finished = [task]
+        while finished:
+            upstream = finished.pop()
+            for dep_id in self.dependents.pop(upstream.id, ()):
+                downstream = self.tasks.get(dep_id)
+                if downstream is None or downstream.status != 'waiting':
+                    continue
+                if upstream.status != 'completed':
+                    self.waiting.pop(dep_id, None)
+                    self._fail_downstream(downstream, upstream.id)
+                    finished.append(downstream)
+                    continue
+                self.waiting[dep_id] -= 1
+                if self.waiting[dep_id] == 0:
+                    del self.waiting[dep_id]
+                    downstream.status = 'pending'
+                    self._log_update(downstream, 'status')
+                    self._enqueue(downstream)
+
+    def _fail_downstream(self, task: Task, upstream_id: str):
+        task.status = 'failed'
+        task.error = f"Upstream task failed: {upstream_id}"
+        task.completed_at = datetime.now()
+        self._log_update(task, 'status', 'error', 'completed_at')
+        self.logger.warning(f"Task failed: {task.id}: {task.error}")
+
+    async def _run_handler(self, task: Task) -> Any:
+        """执行任务处理器，CPU密集型处理器在进程池中执行
+
+        CPU任务超时或被取消时只能放弃等待，工作进程仍在执行，因此回收整个进程池；
+        同一进程池中被连带终止的其他任务在新进程池中重新执行。
+        """
+        data = self._handler_data(task)
+        if task.type not in self.cpu_handlers:
+            return await self.handlers[task.type](data)
+        while True:
+            pool = self._get_process_pool()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    pool, _run_cpu_handler, self.cpu_handlers[task.type], data
+                )
+            except asyncio.CancelledError:
+                self._recycle_process_pool(pool)
+                raise
+            except BrokenProcessPool:
+                if pool is self.process_pool:
+                    # 工作进程自身异常退出，进程池不可再用
+                    self._recycle_process_pool(pool)
+                    raise
+                self.logger.info(f"Process pool recycled, retrying task: {task.id}")
+
+    def _recycle_process_pool(self, pool: ProcessPoolExecutor):
+        """终止进程池的全部工作进程，下一个CPU任务重新创建进程池"""
+        if pool is not self.process_pool:
+            return
+        self.process_pool = None
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self.logger.warning(f"Process pool recycled: {len(processes)} workers terminated")
+
+    def _handler_data(self, task: Task) -> Dict[str, Any]:
+        """处理器输入，有依赖时附带上游结果，结果直接在内存中传递"""
+        if not task.depends_on:
+            return task.data
+        return dict(task.data, inputs=[self.tasks[dep_id].result for dep_id in task.depends_on])
+
+    def _log(self, record: Dict[str, Any]):
+        """追加日志记录，累计记录数达到阈值时在后台压缩日志"""
+        if self.wal is None:
+            return None
+        future = self.wal.append(record)
+        if self.wal.records_since_snapshot >= self.compact_records and not self.compacting:
+            try:
+                asyncio.get_running_loop().create_task(self._compact())
+                self.compacting = True
+            except RuntimeError:
+                pass
+        return future
+
+    def _log_update(self, task: Task, *fields: str):
+        """记录任务状态变化，不等待落盘"""
+        try:
+            record = _task_record(task)
+            self._log({'op': 'update', 'id': task.id,
+                       'fields': {name: record[name] for name in fields}})
+        except Exception as e:
+            self.logger.error(f"Failed to log task update: {str(e)}")
+
+    def _log_result(self, task: Task):
+        """记录任务结束状态，结果无法写入日志时任务改记为失败，避免恢复后重复执行"""
+        fields = ('status', 'result', 'error', 'completed_at')
+        try:
+            record = _task_record(task)
+            self._log({'op': 'update', 'id': task.id,
+                       'fields': {name: record[name] for name in fields}})
+        except TypeError as e:
+            task.result = None
+            task.status = 'failed'
+            task.error = f"Task result is not serializable: {str(e)}"
+            self.logger.error(f"Task failed: {task.id}: {task.error}")
+            self._log_update(task, *fields)
+        except Exception as e:
+            self.logger.error(f"Failed to log task update: {str(e)}")
+
+    async def _compact(self):
+        """切换日志段并写入当前全部任务的快照，删除旧段
+
+        切换与生成快照之间没有 await，快照恰好反映切换点之前的全部日志。
+        """
+        try:
+            rotated = self.wal.rotate()
+            records = [{'op': 'put', 'task': _task_record(task)} for task in self.tasks.values()]
+            seq = await asyncio.wrap_future(rotated)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.wal.write_snapshot, seq, records
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to compact task log: {str(e)}")
+        finally:
+            self.compacting = False
+
+    def _recover(self):
+        """重放预写日志，未完成（含执行中断）的任务重新入队"""
+        unfinished = []
+        for state in replay_states(self.wal).values():
+            for name in _DATETIME_FIELDS:
+                if state.get(name):
+                    state[name] = datetime.fromisoformat(state[name])
+            task = Task(**state)
+            if task.status in ('pending', 'running', 'waiting'):
+                task.started_at = None
+                unfinished.append(task)
+            self.tasks[task.id] = task
+        # 全部任务载入后再按依赖关系重新入队或等待
+        for task in unfinished:
+            if task.status != 'failed':
+                self._schedule(task)
+        requeued = self.queued_tasks
+
+        # 重放结果立即写成快照，旧段随之删除
+        seq = self.wal.rotate().result()
+        self.wal.write_snapshot(
+            seq, [{'op': 'put', 'task': _task_record(task)} for task in self.tasks.values()]
+        )
+        self.logger.info(f"Recovered {len(self.tasks)} tasks from WAL, {requeued} requeued")
+
+def _task_record(task: Task) -> Dict[str, Any]:
+    """任务的可序列化状态"""
+    record = dict(task.__dict__)
+    for name in _DATETIME_FIELDS:
+        if record[name] is not None:
+            record[name] = record[name].isoformat()
+    return record
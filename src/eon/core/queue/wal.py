@@ -0,0 +1,242 @@
+from typing import Dict, List, Any, Optional, Iterator
+from concurrent.futures import Future
+from pathlib import Path
+import threading
+import logging
+import base64
+import struct
+import zlib
+import json
+import os
+
+# 每条记录: 载荷长度 + CRC32 + JSON载荷
+_RECORD_HEADER = struct.Struct('>II')
+_SEGMENT_SUFFIX = '.wal'
+_SNAPSHOT_SUFFIX = '.snapshot'
+_ROTATE = 'rotate'
+
+class WriteAheadLog:
+    """分段预写日志
+
+    append 把记录交给后台写线程，写线程把积压的记录合并成一次写入和一次 fsync
+    （组提交），再完成这一批记录共享的 Future。日志按 segment_bytes 切分为多个段；
+    rotate 切换到新段并返回段号，调用方随后用 write_snapshot 写入截至该段之前的
+    完整状态快照，旧段即可删除。重放时先读最新快照，再按顺序读取其后的各段，
+    末尾写了一半的记录会被丢弃。
+    """
+
+    def __init__(self, path: str, segment_bytes: int = 64 * 1024 * 1024, fsync: bool = True):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+
+        self.snapshot_seq = self._latest_snapshot()
+        self._remove_before(self.snapshot_seq)
+        segments = self._segments()
+        # 总是从新段开始追加，不在可能残缺的旧段末尾续写
+        self.replayable = [seq for seq in segments if seq >= self.snapshot_seq]
+        seq = max(segments + [self.snapshot_seq - 1]) + 1
+        self.file = open(self._segment_file(seq), 'ab')
+        self.records_since_snapshot = 0
+
+        self.pending: List[Any] = []
+        self.batch: Optional[Future] = None
+        self.cond = threading.Condition()
+        # 关闭日志时等待进行中的快照写完
+        self.snapshot_lock = threading.Lock()
+        self.closed = False
+        self.writer = threading.Thread(target=self._write_loop, name='wal-writer', daemon=True)
+        self.writer.start()
+
+    def append(self, record: Dict[str, Any]) -> Future:
+        """追加记录，返回的 Future 在记录落盘后完成"""
+        data = json.dumps(record, separators=(',', ':'), default=_encode).encode()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("预写日志已关闭")
+            if self.batch is None:
+                self.batch = Future()
+            self.pending.append(_RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data)
+            self.records_since_snapshot += 1
+            self.cond.notify()
+            return self.batch
+
+    def sync(self) -> Future:
+        """返回在此前追加的全部记录落盘后完成的 Future"""
+        with self.cond:
+            if self.batch is None:
+                done = Future()
+                done.set_result(None)
+                return done
+            return self.batch
+
+    def rotate(self) -> Future:
+        """在此前追加的记录之后切换到新段，返回的 Future 给出新段号"""
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("预写日志已关闭")
+            if self.batch is None:
+                self.batch = Future()
+            rotated = Future()
+            self.pending.append((_ROTATE, rotated))
+            self.records_since_snapshot = 0
+            self.cond.notify()
+            return rotated
+
+    def write_snapshot(self, seq: int, records: List[Dict[str, Any]]):
+        """写入等价于段号 seq 之前全部日志的快照，并删除被覆盖的段"""
+        with self.snapshot_lock:
+            if self.closed:
+                raise RuntimeError("预写日志已关闭")
+            self.sync().result()
+            final = self.path / f"{seq:010d}{_SNAPSHOT_SUFFIX}"
+            temp = final.with_suffix('.tmp')
+            with open(temp, 'wb') as f:
+                for record in records:
+                    data = json.dumps(record, separators=(',', ':'), default=_encode).encode()
+                    f.write(_RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, final)
+            self._fsync_dir()
+            self.snapshot_seq = seq
+            self._remove_before(seq)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序重放打开日志前已存在的快照和段，应在启动恢复时调用"""
+        files = []
+        if self.snapshot_seq:
+            files.append(self.path / f"{self.snapshot_seq:010d}{_SNAPSHOT_SUFFIX}")
+        files.extend(self._segment_file(seq) for seq in self.replayable)
+        for file in files:
+            yield from self._read(file)
+
+    def close(self):
+        """写完积压的记录后关闭日志"""
+        with self.snapshot_lock:
+            with self.cond:
+                self.closed = True
+                self.cond.notify()
+            self.writer.join()
+            self.file.close()
+
+    def _write_loop(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                items, self.pending = self.pending, []
+                batch, self.batch = self.batch, None
+
+            try:
+                buffer = []
+                for item in items:
+                    if isinstance(item, tuple):
+                        self._flush(buffer)
+                        item[1].set_result(self._open_next())
+                    else:
+                        buffer.append(item)
+                self._flush(buffer)
+                if self.file.tell() >= self.segment_bytes:
+                    self._open_next()
+                batch.set_result(None)
+            except Exception as e:
+                self.logger.error(f"写入预写日志失败: {str(e)}")
+                batch.set_exception(e)
+                for item in items:
+                    if isinstance(item, tuple) and not item[1].done():
+                        item[1].set_exception(e)
+
+    def _flush(self, buffer: List[bytes]):
+        if buffer:
+            self.file.write(b''.join(buffer))
+            buffer.clear()
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def _open_next(self) -> int:
+        """关闭当前段并打开下一个段，返回新段号（写线程调用）"""
+        seq = int(Path(self.file.name).stem) + 1
+        self.file.close()
+        self.file = open(self._segment_file(seq), 'ab')
+        self._fsync_dir()
+        return seq
+
+    def _read(self, file: Path) -> Iterator[Dict[str, Any]]:
+        data = file.read_bytes()
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(data):
+            length, crc = _RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + _RECORD_HEADER.size:offset + _RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            yield json.loads(payload, object_hook=_decode)
+            offset += _RECORD_HEADER.size + length
+        if offset < len(data):
+            self.logger.warning(f"预写日志末尾存在残缺记录，已忽略: {file.name}")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem) for p in self.path.glob(f"*{_SEGMENT_SUFFIX}"))
+
+    def _latest_snapshot(self) -> int:
+        snapshots = [int(p.stem) for p in self.path.glob(f"*{_SNAPSHOT_SUFFIX}")]
+        return max(snapshots, default=0)
+
+    def _remove_before(self, seq: int):
+        """删除快照已覆盖的段和旧快照"""
+        for file in self.path.iterdir():
+            stem = file.stem
+            if not stem.isdigit():
+                continue
+            if file.suffix in (_SEGMENT_SUFFIX, _SNAPSHOT_SUFFIX, '.tmp') and int(stem) < seq:
+                file.unlink()
+
+    def _segment_file(self, seq: int) -> Path:
+        return self.path / f"{seq:010d}{_SEGMENT_SUFFIX}"
+
+    def _fsync_dir(self):
+        if not self.fsync:
+            return
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def replay_states(wal: WriteAheadLog) -> Dict[str, Dict[str, Any]]:
+    """把任务日志（put/update/delete 记录）折叠为各任务的最终状态
+
+    put 写入完整状态，update 合并部分字段，delete 删除任务；
+    快照与段中重复的记录按顺序覆盖，重放结果与记录次数无关。
+    """
+    states: Dict[str, Dict[str, Any]] = {}
+    for record in wal.replay():
+        if record['op'] == 'put':
+            states[record['task']['id']] = record['task']
+        elif record['op'] == 'update' and record['id'] in states:
+            states[record['id']].update(record['fields'])
+        elif record['op'] == 'delete':
+            states.pop(record['id'], None)
+    return states
+
+def _encode(value: Any) -> Any:
+    """bytes、numpy 类型与密文（按其 serialize() 字节）转换为可序列化形式"""
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(value).decode()}
+    if callable(getattr(value, 'serialize', None)):
+        return {'__bytes__': base64.b64encode(value.serialize()).decode()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"无法写入日志的类型: {type(value).__name__}")
+
+def _decode(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and '__bytes__' in value:
+        return base64.b64decode(value['__bytes__'])
+    return value
@@ -0,0 +1,6 @@
+# src/eon/core/scheduler/__init__.py
+from .task_manager import TaskManager, Task
+from .fair_queue import FairQueue
+from .admission import AdmissionController, AdmissionRejected, TokenBucket
+
+__all__ = ['TaskManager', 'Task', 'FairQueue', 'AdmissionController', 'AdmissionRejected', 'TokenBucket']
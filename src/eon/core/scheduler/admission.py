@@ -0,0 +1,102 @@
+from typing import Dict, Any, Optional
+import threading
+import logging
+import time
+
+class AdmissionRejected(Exception):
+    """任务被准入控制拒绝，retry_after 为建议的重试间隔（秒）"""
+
+    def __init__(self, message: str, retry_after: float, reason: str = "overloaded"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+class TokenBucket:
+    """令牌桶：按 rate 个/秒补充令牌，最多积攒 burst 个"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float, tokens: float = 1.0) -> float:
+        """取出令牌，成功返回0，否则返回令牌补足所需的秒数"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+class AdmissionController:
+    """准入控制：队列水位线 + 租户令牌桶
+
+    排队数达到 high_watermark 后进入过载状态并拒绝新任务，直到排队数回落到
+    low_watermark 以下才恢复接收（滞回，避免在临界点反复切换）。配置 tenant_rate 时
+    每个租户一个令牌桶，tenants 中可为单个租户单独指定 rate/burst。
+    被拒绝的请求带有建议的重试间隔，调用方据此返回 429 / RESOURCE_EXHAUSTED。
+    """
+
+    def __init__(self, config: Dict[str, Any], high_watermark: Optional[int] = None):
+        self.high_watermark = config.get('high_watermark', high_watermark)
+        default_low = int(self.high_watermark * 0.8) if self.high_watermark else None
+        self.low_watermark = config.get('low_watermark', default_low)
+        self.retry_after = config.get('retry_after', 1.0)
+        self.tenant_rate = config.get('tenant_rate')
+        self.tenant_burst = config.get('tenant_burst')
+        self.tenant_limits: Dict[str, Dict[str, float]] = config.get('tenants', {})
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.overloaded = False
+        self.rejected = {'overloaded': 0, 'rate_limited': 0}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def admit(self, depth: int, tenant: Optional[str] = None,
+              drain_rate: Optional[float] = None):
+        """检查能否接收新任务，不能时抛出 AdmissionRejected
+
+        Args:
+            depth: 当前排队任务数
+            tenant: 租户标识，None 时不做租户限流
+            drain_rate: 队列每秒消化的任务数估计，用于估算过载时的重试间隔
+        """
+        with self.lock:
+            if self.high_watermark is not None:
+                if self.overloaded and depth <= self.low_watermark:
+                    self.overloaded = False
+                    self.logger.info(f"队列回落到低水位线，恢复接收任务: {depth}")
+                elif not self.overloaded and depth >= self.high_watermark:
+                    self.overloaded = True
+                    self.logger.warning(f"队列达到高水位线，开始拒绝任务: {depth}")
+                if self.overloaded:
+                    self.rejected['overloaded'] += 1
+                    retry_after = self.retry_after
+                    if drain_rate:
+                        retry_after = max(depth - self.low_watermark, 1) / drain_rate
+                    raise AdmissionRejected(f"任务队列已满: {depth}", retry_after)
+
+            bucket = self._bucket(tenant)
+            if bucket is not None:
+                wait = bucket.take(time.monotonic())
+                if wait > 0:
+                    self.rejected['rate_limited'] += 1
+                    raise AdmissionRejected(
+                        f"租户请求过于频繁: {tenant}", wait, reason="rate_limited"
+                    )
+
+    def _bucket(self, tenant: Optional[str]) -> Optional[TokenBucket]:
+        """获取（必要时创建）租户的令牌桶，未配置限流时返回 None（调用方持有锁）"""
+        if tenant is None:
+            return None
+        bucket = self.buckets.get(tenant)
+        if bucket is None:
+            limits = self.tenant_limits.get(tenant, {})
+            rate = limits.get('rate', self.tenant_rate)
+            if rate is None:
+                return None
+            burst = limits.get('burst', self.tenant_burst or max(rate, 1.0))
+            bucket = self.buckets[tenant] = TokenBucket(rate, burst)
+        return bucket
@@ -0,0 +1,74 @@
+from typing import Dict, List, Any, Callable, Hashable, Tuple
+import threading
+import logging
+import time
+
+class TaskCoalescer:
+    """微批合并器
+
+    相同键的任务在 window 秒内或累计到 max_batch 个时合并为一批交给 dispatch，
+    批次按首个任务到达的先后顺序刷出。dispatch 在后台线程或提交线程中调用，
+    应尽快返回（例如把批次提交给执行器）。
+    """
+
+    def __init__(self,
+                 dispatch: Callable[[List[Any]], None],
+                 window: float = 0.002,
+                 max_batch: int = 64):
+        self.dispatch = dispatch
+        self.window = window
+        self.max_batch = max_batch
+        # 键 -> (批次截止时间, 任务列表)，按创建顺序排列，首项截止时间最早
+        self.groups: Dict[Hashable, Tuple[float, List[Any]]] = {}
+        self.cond = threading.Condition()
+        self.closed = False
+        self.logger = logging.getLogger(__name__)
+        self.flusher = threading.Thread(target=self._flush_loop, name='coalescer', daemon=True)
+        self.flusher.start()
+
+    def submit(self, key: Hashable, item: Any):
+        """加入任务，批次已满时立即在当前线程刷出"""
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("合并器已关闭")
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = (time.monotonic() + self.window, [])
+                self.cond.notify()
+            group[1].append(item)
+            full = len(group[1]) >= self.max_batch
+            if full:
+                del self.groups[key]
+        if full:
+            self._dispatch(group[1])
+
+    def close(self):
+        """刷出全部未满的批次并停止后台线程"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.flusher.join()
+
+    def _flush_loop(self):
+        while True:
+            with self.cond:
+                while True:
+                    if self.groups:
+                        key = next(iter(self.groups))
+                        deadline, items = self.groups[key]
+                        delay = deadline - time.monotonic()
+                        if delay <= 0 or self.closed:
+                            del self.groups[key]
+                            break
+                        self.cond.wait(delay)
+                    elif self.closed:
+                        return
+                    else:
+                        self.cond.wait()
+            self._dispatch(items)
+
+    def _dispatch(self, items: List[Any]):
+        try:
+            self.dispatch(items)
+        except Exception as e:
+            self.logger.error(f"批次分发失败: {str(e)}")
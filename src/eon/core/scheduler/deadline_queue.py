@@ -0,0 +1,120 @@
+from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
+import itertools
+import heapq
+import math
+
+class _PriorityClass:
+    """单个优先级类：截止时间小顶堆 + 按到达顺序的索引（堆中已出队的条目惰性删除）"""
+
+    __slots__ = ('heap', 'fifo')
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, Any]] = []
+        self.fifo: 'OrderedDict[int, Any]' = OrderedDict()
+
+    def head(self) -> Optional[Tuple[float, int, Any]]:
+        while self.heap and self.heap[0][1] not in self.fifo:
+            heapq.heappop(self.heap)
+        return self.heap[0] if self.heap else None
+
+    def oldest(self) -> Tuple[int, Any]:
+        return next(iter(self.fifo.items()))
+
+class DeadlineQueue:
+    """截止时间感知的多级优先队列
+
+    数值越小优先级越高。同一优先级类内按截止时间最早优先（EDF），没有截止时间的任务
+    排在最后，再按到达顺序；任务每等待 aging_interval 秒有效优先级提升一级，
+    提升后的最老任务可以越过本类或更高类中的任务出队，避免低优先级任务饿死。
+    任务需有 id、priority、deadline（绝对时间，可为 None）与 created_at 属性。
+    """
+
+    def __init__(self, aging_interval: Optional[float] = 30.0):
+        self.aging_interval = aging_interval
+        self.classes: Dict[int, _PriorityClass] = {}
+        self.sequence = itertools.count()
+        # 任务ID -> (优先级, 序号)，用于按ID移除
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.index
+
+    def push(self, task: Any):
+        cls = self.classes.get(task.priority)
+        if cls is None:
+            cls = self.classes[task.priority] = _PriorityClass()
+        seq = next(self.sequence)
+        deadline = task.deadline if task.deadline is not None else math.inf
+        heapq.heappush(cls.heap, (deadline, seq, task))
+        cls.fifo[seq] = task
+        self.index[task.id] = (task.priority, seq)
+        self.size += 1
+
+    def pop(self, now: float) -> Optional[Any]:
+        """取出有效优先级最高的任务，同级时截止时间最早者优先"""
+        best = None
+        for priority, cls in self.classes.items():
+            deadline, seq, task = cls.head()
+            effective = priority - self._boost(task, now)
+            old_seq, old_task = cls.oldest()
+            aged = priority - self._boost(old_task, now)
+            if aged < effective:
+                # 最老的任务已被提升到更高一级，越过本类按截止时间排在前面的任务
+                deadline = old_task.deadline if old_task.deadline is not None else math.inf
+                effective, seq, task = aged, old_seq, old_task
+            key = (effective, deadline, seq)
+            if best is None or key < best[0]:
+                best = (key, priority, seq, task)
+        if best is None:
+            return None
+        _, priority, seq, task = best
+        self._remove(priority, seq)
+        return task
+
+    def pop_infeasible(self, now: float, service_time: float = 0.0) -> List[Any]:
+        """取出已无法在截止时间前完成的任务（截止时间早于 now + service_time）
+
+        各类的堆顶即本类截止时间最早的任务，只需检查堆顶。
+        """
+        shed = []
+        for priority in list(self.classes):
+            cls = self.classes[priority]
+            while True:
+                head = cls.head()
+                if head is None or head[0] >= now + service_time:
+                    break
+                shed.append(head[2])
+                self._remove(priority, head[1])
+                if priority not in self.classes:
+                    break
+        return shed
+
+    def remove(self, task_id: str) -> Optional[Any]:
+        """按ID移除排队中的任务（堆中条目惰性删除）"""
+        entry = self.index.get(task_id)
+        if entry is None:
+            return None
+        task = self.classes[entry[0]].fifo[entry[1]]
+        self._remove(*entry)
+        return task
+
+    def sizes(self) -> Dict[int, int]:
+        """各优先级类的排队任务数"""
+        return {priority: len(cls.fifo) for priority, cls in self.classes.items()}
+
+    def _boost(self, task: Any, now: float) -> int:
+        if not self.aging_interval:
+            return 0
+        return int(max(now - task.created_at, 0.0) // self.aging_interval)
+
+    def _remove(self, priority: int, seq: int):
+        cls = self.classes[priority]
+        del self.index[cls.fifo.pop(seq).id]
+        self.size -= 1
+        if not cls.fifo:
+            del self.classes[priority]
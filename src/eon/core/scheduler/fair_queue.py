@@ -0,0 +1,115 @@
+from typing import Dict, List, Any, Optional, Hashable
+from collections import OrderedDict
+from .deadline_queue import DeadlineQueue
+
+DEFAULT_TENANT = "default"
+
+class FairQueue:
+    """按租户加权公平调度的任务队列（差额轮询，DRR）
+
+    每个租户一个 DeadlineQueue 子队列，租户内部仍按优先级、截止时间和老化规则出队；
+    租户之间轮流出队，轮到的租户获得 weight * quantum 的额度，每出队一个任务消耗 1，
+    额度不足时轮到下一个租户。任意租户积压再多任务，其他租户的排队时间也只与
+    活跃租户数和权重有关。任务需有 id 与 tenant 属性（tenant 为 None 时归入默认租户）。
+    """
+
+    def __init__(self,
+                 weights: Optional[Dict[str, float]] = None,
+                 default_weight: float = 1.0,
+                 quantum: float = 1.0,
+                 aging_interval: Optional[float] = 30.0):
+        self.weights = dict(weights or {})
+        for tenant, weight in list(self.weights.items()) + [(None, default_weight)]:
+            if weight <= 0:
+                raise ValueError(f"租户权重必须为正数: {tenant}={weight}")
+        self.default_weight = default_weight
+        self.quantum = quantum
+        self.aging_interval = aging_interval
+        # 有排队任务的租户，按轮询顺序排列，首项为当前轮到的租户
+        self.active: 'OrderedDict[Hashable, DeadlineQueue]' = OrderedDict()
+        self.deficits: Dict[Hashable, float] = {}
+        # 当前租户本轮是否已获得额度
+        self.credited = False
+        # 任务ID -> 租户，用于按ID移除
+        self.owners: Dict[str, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.owners
+
+    def push(self, task: Any):
+        tenant = self._tenant(task)
+        queue = self.active.get(tenant)
+        if queue is None:
+            queue = self.active[tenant] = DeadlineQueue(self.aging_interval)
+            self.deficits[tenant] = 0.0
+        queue.push(task)
+        self.owners[task.id] = tenant
+
+    def pop(self, now: float) -> Optional[Any]:
+        """按差额轮询选出租户，再取该租户子队列的队首任务"""
+        while self.active:
+            tenant, queue = next(iter(self.active.items()))
+            if not self.credited:
+                self.deficits[tenant] += self.weight(tenant) * self.quantum
+                self.credited = True
+            if self.deficits[tenant] >= 1.0:
+                self.deficits[tenant] -= 1.0
+                task = queue.pop(now)
+                del self.owners[task.id]
+                if not len(queue):
+                    self._deactivate(tenant)
+                return task
+            self.active.move_to_end(tenant)
+            self.credited = False
+        return None
+
+    def pop_infeasible(self, now: float, service_time: float = 0.0) -> List[Any]:
+        """取出各租户中已无法在截止时间前完成的任务"""
+        shed = []
+        for tenant in list(self.active):
+            queue = self.active[tenant]
+            for task in queue.pop_infeasible(now, service_time):
+                del self.owners[task.id]
+                shed.append(task)
+            if not len(queue):
+                self._deactivate(tenant)
+        return shed
+
+    def remove(self, task_id: str) -> Optional[Any]:
+        """按ID移除排队中的任务"""
+        tenant = self.owners.pop(task_id, None)
+        if tenant is None:
+            return None
+        queue = self.active[tenant]
+        task = queue.remove(task_id)
+        if not len(queue):
+            self._deactivate(tenant)
+        return task
+
+    def sizes(self) -> Dict[int, int]:
+        """各优先级类的排队任务数（全部租户合计）"""
+        sizes: Dict[int, int] = {}
+        for queue in self.active.values():
+            for priority, size in queue.sizes().items():
+                sizes[priority] = sizes.get(priority, 0) + size
+        return sizes
+
+    def tenant_sizes(self) -> Dict[Hashable, int]:
+        """各租户的排队任务数"""
+        return {tenant: len(queue) for tenant, queue in self.active.items()}
+
+    def weight(self, tenant: Hashable) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    def _tenant(self, task: Any) -> Hashable:
+        return task.tenant if task.tenant is not None else DEFAULT_TENANT
+
+    def _deactivate(self, tenant: Hashable):
+        """租户队列清空后退出轮询，未用完的额度不保留"""
+        if tenant == next(iter(self.active)):
+            self.credited = False
+        del self.active[tenant]
+        del self.deficits[tenant]
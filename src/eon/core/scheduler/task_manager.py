@@ -1,11 +1,24 @@
 from typing import Dict, List, Any, Optional
-from queue import PriorityQueue
 import threading
 import logging
 import time
+from .task_store import TaskStore
+from .fair_queue import FairQueue, DEFAULT_TENANT
+from .admission import AdmissionController, AdmissionRejected
+from ..queue.wal import WriteAheadLog, replay_states
+from ..node.client import ComputationClient
+from ...utils.metrics import Histogram
 
 class Task:
-    def __init__(self, task_id: str, priority: int, data: Any, operation: str, params: Optional[Dict] = None):
+    __slots__ = (
+        'id', 'priority', 'data', 'operation', 'params', 'status',
+        'created_at', 'started_at', 'completed_at', 'result', 'error', 'deadline',
+        'timeout', 'tenant', 'node_address', 'node_task_id'
+    )
+
+    def __init__(self, task_id: str, priority: int, data: Any, operation: str,
+                 params: Optional[Dict] = None, deadline: Optional[float] = None,
+                 timeout: Optional[float] = None, tenant: Optional[str] = None):
         self.id = task_id
         self.priority = priority
         self.data = data
@@ -17,26 +30,91 @@ class Task:
         self.completed_at = None
         self.result = None
         self.error = None
+        # 绝对截止时间（time.time() 时间戳），None 表示不限
+        self.deadline = deadline
+        # 开始执行后的最长运行秒数，None 时使用管理器的 task_timeout
+        self.timeout = timeout
+        # 提交任务的租户（API 层为 JWT 的 sub），None 归入默认租户
+        self.tenant = tenant
+        # 派发到的计算节点地址与节点上的任务ID，取消时据此通知节点
+        self.node_address = None
+        self.node_task_id = None
 
 class TaskManager:
     """任务管理器，处理任务调度和执行"""
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.task_queue = PriorityQueue()
+        # 租户之间按权重差额轮询，租户内同一优先级按截止时间最早优先，
+        # 等待过久的任务逐级提升优先级
+        self.task_queue = FairQueue(
+            weights=config.get('tenant_weights'),
+            default_weight=config.get('default_tenant_weight', 1.0),
+            quantum=config.get('tenant_quantum', 1.0),
+            aging_interval=config.get('priority_aging_interval', 30.0)
+        )
+        # 任务执行耗时的指数移动平均，用于判断任务能否在截止时间前完成
+        self.service_time = config.get('expected_service_time', 0.0)
+        # 各优先级类的排队等待时间分布与丢弃数
+        self.wait_histograms: Dict[int, Histogram] = {}
+        self.tenant_wait_histograms: Dict[str, Histogram] = {}
+        self.shed_counts: Dict[int, int] = {}
         self.active_tasks: Dict[str, Task] = {}
-        self.completed_tasks: Dict[str, Task] = {}
+        # 全部任务的有界存储，已结束任务按保留期和容量淘汰
+        self.store = TaskStore(
+            max_size=config.get('max_retained_tasks', 100000),
+            ttl=config.get('task_ttl', 3600)
+        )
         self.lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
         self.max_concurrent_tasks = config.get('max_concurrent_tasks', 10)
+        # 执行超时的任务标记为失败并释放并发名额，None 表示不限
+        self.task_timeout = config.get('task_timeout')
+        # 排队数达到高水位线后拒绝新任务，回落到低水位线再恢复；可按租户限流
+        self.admission = AdmissionController(
+            config.get('admission', {}),
+            high_watermark=config.get('max_queued_tasks', 10000)
+        )
+
+        # 配置 wal_path 时提交与状态变化写入预写日志，启动时重放恢复未完成的任务
+        self.wal: Optional[WriteAheadLog] = None
+        self.compact_records = config.get('wal_compact_records', 100000)
+        self.compacting = False
+        if config.get('wal_path'):
+            self.wal = WriteAheadLog(
+                config['wal_path'],
+                segment_bytes=config.get('wal_segment_bytes', 64 * 1024 * 1024),
+                fsync=config.get('wal_fsync', True)
+            )
+            self._recover()
+
+    def submit_task(self, task: Task, tenant: Optional[str] = None) -> str:
+        """提交新任务，tenant 指定任务所属租户（用于限流与公平调度）
 
-    def submit_task(self, task: Task) -> str:
-        """提交新任务"""
+        队列过载或租户超出限流时抛出 AdmissionRejected。
+        """
         try:
+            if tenant is not None:
+                task.tenant = tenant
             with self.lock:
-                self.task_queue.put((task.priority, task))
-                self.logger.info(f"任务提交成功: {task.id}")
+                drain_rate = (self.max_concurrent_tasks / self.service_time
+                              if self.service_time > 0 else None)
+                self.admission.admit(len(self.task_queue), task.tenant, drain_rate)
+                self.store.add(task)
+                logged = self._log({'op': 'put', 'task': _task_record(task)})
+                if task.deadline is not None and task.deadline < time.time() + self.service_time:
+                    # 提交时已无法按期完成，直接丢弃而不占用队列
+                    self._shed(task)
+                else:
+                    self.task_queue.push(task)
+                    self.logger.info(f"任务提交成功: {task.id}")
+            if logged is not None:
+                # 落盘后才确认提交，并发提交共享同一次 fsync
+                logged.result()
             return task.id
+        except AdmissionRejected as e:
+            self.logger.warning(f"任务被拒绝: {task.id}: {str(e)}")
+            raise
         except Exception as e:
             self.logger.error(f"任务提交失败: {str(e)}")
             raise
@@ -44,23 +122,34 @@ class TaskManager:
     def get_next_task(self) -> Optional[Task]:
         """获取下一个待执行任务"""
         try:
-            if self.task_queue.empty():
-                return None
-            if len(self.active_tasks) >= self.max_concurrent_tasks:
-                return None
-            
-            _, task = self.task_queue.get_nowait()
             with self.lock:
-                task.status = "ACTIVE"
-                task.started_at = time.time()
+                now = time.time()
+                # 各类中截止时间最早的任务若已来不及完成，先行丢弃
+                for task in self.task_queue.pop_infeasible(now, self.service_time):
+                    self._shed(task)
+                self._expire_active(now)
+                if len(self.active_tasks) >= self.max_concurrent_tasks:
+                    return None
+                task = self.task_queue.pop(now)
+                if task is None:
+                    return None
+
+                self.store.set_status(task, "ACTIVE")
+                task.started_at = now
                 self.active_tasks[task.id] = task
+                self._log_update(task, 'status', 'started_at')
+                self._wait_histogram(task.priority).observe(now - task.created_at)
+                self._tenant_wait_histogram(task.tenant).observe(now - task.created_at)
             return task
         except Exception as e:
             self.logger.error(f"获取任务失败: {str(e)}")
             return None
 
     def complete_task(self, task_id: str, result: Any = None, error: Any = None):
-        """完成任务处理"""
+        """完成任务处理
+
+        结果无法写入预写日志时任务改记为失败并抛出 TypeError，避免恢复后重复执行。
+        """
         try:
             with self.lock:
                 if task_id in self.active_tasks:
@@ -68,25 +157,236 @@ class TaskManager:
                     task.completed_at = time.time()
                     task.result = result
                     task.error = error
-                    task.status = "COMPLETED" if error is None else "FAILED"
-                    self.completed_tasks[task_id] = task
+                    self.store.set_status(task, "COMPLETED" if error is None else "FAILED")
+                    try:
+                        self._log(_update_record(task, 'status', 'result', 'error', 'completed_at'))
+                    except TypeError as e:
+                        task.result = None
+                        task.error = f"任务结果无法写入日志: {str(e)}"
+                        self.store.set_status(task, "FAILED")
+                        self._log_update(task, 'status', 'result', 'error', 'completed_at')
+                        raise
+                    self.service_time += 0.2 * (
+                        task.completed_at - task.started_at - self.service_time
+                    )
                     self.logger.info(f"任务完成: {task_id}")
         except Exception as e:
             self.logger.error(f"任务完成处理失败: {str(e)}")
             raise
 
+    def assign_node(self, task_id: str, address: str, node_task_id: str) -> bool:
+        """记录任务派发到的计算节点及节点上的任务ID
+
+        任务在派发期间已被取消时立即取消节点上的任务并返回 False。
+        """
+        try:
+            with self.lock:
+                task = self.store.get(task_id)
+                if task is None:
+                    raise ValueError(f"任务不存在: {task_id}")
+                task.node_address = address
+                task.node_task_id = node_task_id
+                self._log_update(task, 'node_address', 'node_task_id')
+                cancelled = task.status == "CANCELLED"
+            if cancelled:
+                self._cancel_on_node(task)
+            return not cancelled
+        except Exception as e:
+            self.logger.error(f"记录任务派发失败: {str(e)}")
+            raise
+
+    def cancel_task(self, task_id: str) -> bool:
+        """取消排队或执行中的任务，任务已结束时返回 False
+
+        执行中的任务立即释放并发名额；已派发到计算节点的任务同时取消节点上的任务，
+        之后对该任务的 complete_task 会被忽略。
+        """
+        try:
+            with self.lock:
+                task = self.store.get(task_id)
+                if task is None:
+                    raise ValueError(f"任务不存在: {task_id}")
+                if self.task_queue.remove(task_id) is None and \
+                        self.active_tasks.pop(task_id, None) is None:
+                    return False
+                task.completed_at = time.time()
+                task.error = "任务已取消"
+                self.store.set_status(task, "CANCELLED")
+                self._log_update(task, 'status', 'error', 'completed_at')
+            if task.node_task_id:
+                self._cancel_on_node(task)
+            self.logger.info(f"任务已取消: {task_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"取消任务失败: {str(e)}")
+            raise
+
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """各优先级类与各租户的排队数、等待时间直方图，以及丢弃数、准入拒绝数"""
+        with self.lock:
+            queued = self.task_queue.tenant_sizes()
+            tenants = set(queued) | set(self.tenant_wait_histograms)
+            return {
+                'queued': self.task_queue.sizes(),
+                'shed': dict(self.shed_counts),
+                'rejected': dict(self.admission.rejected),
+                'overloaded': self.admission.overloaded,
+                'service_time': self.service_time,
+                'wait_seconds': {
+                    priority: histogram.snapshot()
+                    for priority, histogram in self.wait_histograms.items()
+                },
+                'tenants': {
+                    tenant: {
+                        'queued': queued.get(tenant, 0),
+                        'weight': self.task_queue.weight(tenant),
+                        'wait_seconds': self._tenant_wait_histogram(tenant).snapshot()
+                    }
+                    for tenant in tenants
+                }
+            }
+
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """获取任务状态"""
-        task = (self.active_tasks.get(task_id) or 
-                self.completed_tasks.get(task_id))
+        task = self.store.get(task_id)
         if task is None:
             raise ValueError(f"任务不存在: {task_id}")
-            
+        return self._task_info(task)
+
+    def list_tasks(self, status: Optional[str] = None,
+                   limit: int = 100) -> List[Dict[str, Any]]:
+        """按状态（提交顺序）或按创建时间倒序列出任务"""
+        tasks = (self.store.list_by_status(status, limit) if status
+                 else self.store.list_recent(limit))
+        return [self._task_info(task) for task in tasks]
+
+    def cleanup_tasks(self) -> int:
+        """清理超过保留期的已结束任务"""
+        removed = self.store.evict_expired()
+        if removed:
+            self.logger.info(f"已清理 {removed} 个过期任务")
+        return removed
+
+    def _cancel_on_node(self, task: Task):
+        """通知执行任务的计算节点取消任务，节点未能取消时只记录警告"""
+        client = ComputationClient(task.node_address, self.config.get('channel', {}))
+        try:
+            status = client.cancel_task(task.node_task_id)
+            if status.get('status') != 'cancelled':
+                self.logger.warning(
+                    f"节点未能取消任务: {task.id}: {status.get('error') or status.get('status')}"
+                )
+        finally:
+            client.close()
+
+    def _shed(self, task: Task):
+        """丢弃无法在截止时间前完成的任务（调用方持有锁）"""
+        task.completed_at = time.time()
+        task.error = "任务无法在截止时间前完成"
+        self.store.set_status(task, "SHED")
+        self._log_update(task, 'status', 'error', 'completed_at')
+        self.shed_counts[task.priority] = self.shed_counts.get(task.priority, 0) + 1
+        self.logger.warning(f"任务已丢弃: {task.id}")
+
+    def _expire_active(self, now: float):
+        """执行超时的任务标记为失败并释放并发名额（调用方持有锁）"""
+        for task in list(self.active_tasks.values()):
+            timeout = task.timeout if task.timeout is not None else self.task_timeout
+            if timeout is None or now - task.started_at <= timeout:
+                continue
+            del self.active_tasks[task.id]
+            task.completed_at = now
+            task.error = f"任务执行超时: {timeout}秒"
+            self.store.set_status(task, "FAILED")
+            self._log_update(task, 'status', 'error', 'completed_at')
+            self.logger.warning(f"任务执行超时: {task.id}")
+
+    def _wait_histogram(self, priority: int) -> Histogram:
+        histogram = self.wait_histograms.get(priority)
+        if histogram is None:
+            histogram = self.wait_histograms[priority] = Histogram()
+        return histogram
+
+    def _tenant_wait_histogram(self, tenant: Optional[str]) -> Histogram:
+        tenant = tenant if tenant is not None else DEFAULT_TENANT
+        histogram = self.tenant_wait_histograms.get(tenant)
+        if histogram is None:
+            histogram = self.tenant_wait_histograms[tenant] = Histogram()
+        return histogram
+
+    def close(self):
+        """写完积压的日志记录并关闭预写日志"""
+        if self.wal:
+            self.wal.close()
+
+    def _log(self, record: Dict[str, Any]):
+        """追加日志记录（调用方持有锁），累计记录数达到阈值时在后台压缩日志"""
+        if self.wal is None:
+            return None
+        future = self.wal.append(record)
+        if self.wal.records_since_snapshot >= self.compact_records and not self.compacting:
+            self.compacting = True
+            # 切换日志段与生成快照都在锁内完成，快照恰好反映切换点之前的全部日志
+            rotated = self.wal.rotate()
+            records = [{'op': 'put', 'task': _task_record(task)} for task in self.store.records.values()]
+            threading.Thread(
+                target=self._write_snapshot, args=(rotated, records),
+                name='wal-compaction', daemon=True
+            ).start()
+        return future
+
+    def _log_update(self, task: Task, *fields: str):
+        """记录任务状态变化，不等待落盘"""
+        try:
+            self._log(_update_record(task, *fields))
+        except Exception as e:
+            self.logger.error(f"记录任务状态失败: {str(e)}")
+
+    def _write_snapshot(self, rotated, records: List[Dict[str, Any]]):
+        try:
+            self.wal.write_snapshot(rotated.result(), records)
+        except Exception as e:
+            self.logger.error(f"压缩任务日志失败: {str(e)}")
+        finally:
+            self.compacting = False
+
+    def _recover(self):
+        """重放预写日志，未完成（含执行中断）的任务重新入队"""
+        requeued = 0
+        for state in replay_states(self.wal).values():
+            task = Task(state['id'], state['priority'], state['data'],
+                        state['operation'], state['params'])
+            for name in Task.__slots__:
+                setattr(task, name, state.get(name))
+            if task.status in ("PENDING", "ACTIVE"):
+                task.status, task.started_at = "PENDING", None
+                self.task_queue.push(task)
+                requeued += 1
+            self.store.add(task)
+
+        # 重放结果立即写成快照，旧段随之删除
+        self.wal.write_snapshot(
+            self.wal.rotate().result(),
+            [{'op': 'put', 'task': _task_record(task)} for task in self.store.records.values()]
+        )
+        self.logger.info(f"已从预写日志恢复 {len(self.store)} 个任务，重新入队 {requeued} 个")
+
+    def _task_info(self, task: Task) -> Dict[str, Any]:
         return {
             "id": task.id,
             "status": task.status,
             "created_at": task.created_at,
             "started_at": task.started_at,
             "completed_at": task.completed_at,
+            "deadline": task.deadline,
+            "tenant": task.tenant,
             "error": task.error
-        }
\ No newline at end of file
+        }
+
+def _update_record(task: Task, *fields: str) -> Dict[str, Any]:
+    return {'op': 'update', 'id': task.id,
+            'fields': {name: getattr(task, name) for name in fields}}
+
+def _task_record(task: Task) -> Dict[str, Any]:
+    """任务的可序列化状态"""
+    return {name: getattr(task, name) for name in Task.__slots__}
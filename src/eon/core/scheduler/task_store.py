@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from itertools import islice
+import threading
+import time
+
+FINISHED_STATUSES = ("COMPLETED", "FAILED", "SHED", "CANCELLED")
+
+class TaskStore:
+    """有界任务存储
+
+    记录按创建顺序保存在有序字典中（即创建时间索引），另按状态维护二级索引，
+    已结束任务按完成顺序排队；按状态或最近创建列出任务、清理过期任务都只访问
+    命中的记录，不做全量扫描。超过 ttl 或总数超过 max_size 时从最早结束的任务开始淘汰，
+    未结束的任务不会被淘汰。
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: Optional[float] = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.records: 'OrderedDict[str, Any]' = OrderedDict()
+        self.by_status: Dict[str, Dict[str, None]] = {}
+        # 任务ID -> 完成时间，按完成顺序排列
+        self.finished: 'OrderedDict[str, float]' = OrderedDict()
+        self.lock = threading.RLock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.records
+
+    def add(self, task: Any):
+        """加入新任务，任务需有 id、status、created_at 属性"""
+        with self.lock:
+            if task.id in self.records:
+                raise ValueError(f"任务已存在: {task.id}")
+            self.records[task.id] = task
+            self.by_status.setdefault(task.status, {})[task.id] = None
+            if task.status in FINISHED_STATUSES:
+                self.finished[task.id] = getattr(task, 'completed_at', None) or time.time()
+            self._evict(time.time())
+
+    def get(self, task_id: str) -> Optional[Any]:
+        return self.records.get(task_id)
+
+    def set_status(self, task: Any, status: str):
+        """更新任务状态并同步索引，进入结束状态的任务开始计算保留期"""
+        with self.lock:
+            if task.id not in self.records:
+                raise ValueError(f"任务不存在: {task.id}")
+            self._unindex(task)
+            task.status = status
+            self.by_status.setdefault(status, {})[task.id] = None
+            if status in FINISHED_STATUSES:
+                self.finished[task.id] = getattr(task, 'completed_at', None) or time.time()
+            self._evict(time.time())
+
+    def remove(self, task_id: str) -> Optional[Any]:
+        """删除任务"""
+        with self.lock:
+            task = self.records.pop(task_id, None)
+            if task is not None:
+                self._unindex(task)
+            return task
+
+    def list_by_status(self, status: str, limit: Optional[int] = None) -> List[Any]:
+        """按提交顺序列出指定状态的任务"""
+        with self.lock:
+            ids = self.by_status.get(status, {})
+            return [self.records[task_id] for task_id in islice(ids, limit)]
+
+    def list_recent(self, limit: int = 100, since: Optional[float] = None) -> List[Any]:
+        """按创建时间倒序列出最近的任务，since 限定最早创建时间"""
+        with self.lock:
+            tasks = []
+            for task_id in reversed(self.records):
+                task = self.records[task_id]
+                if len(tasks) >= limit or (since is not None and task.created_at < since):
+                    break
+                tasks.append(task)
+            return tasks
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return len(self.records)
+        return len(self.by_status.get(status, {}))
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """清理超过保留期的已结束任务，返回清理数量"""
+        with self.lock:
+            before = self.evicted
+            self._evict(now if now is not None else time.time())
+            return self.evicted - before
+
+    def _evict(self, now: float):
+        """从最早结束的任务开始淘汰（调用方持有锁）"""
+        while self.finished:
+            task_id, finished_at = next(iter(self.finished.items()))
+            expired = self.ttl is not None and now - finished_at > self.ttl
+            if not expired and len(self.records) <= self.max_size:
+                break
+            self.remove(task_id)
+            self.evicted += 1
+
+    def _unindex(self, task: Any):
+        ids = self.by_status.get(task.status)
+        if ids is not None:
+            ids.pop(task.id, None)
+            if not ids:
+                del self.by_status[task.status]
+        self.finished.pop(task.id, None)
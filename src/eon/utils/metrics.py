@@ -1,5 +1,6 @@
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
+import bisect
 import time
 from collections import defaultdict
 import threading
@@ -104,3 +105,50 @@ class MetricsCollector:
         """清除指标数据"""
         with self.lock:
             self.metrics.clear()
+
+# 默认延迟桶上界（秒）
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+class Histogram:
+    """固定桶直方图，记录耗时分布并按桶上界估计分位数（非线程安全，由调用方加锁）"""
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self.bounds = list(buckets or DEFAULT_LATENCY_BUCKETS)
+        # 最后一个桶收纳超过所有上界的样本
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """返回包含第 q 分位样本的桶上界，超出全部上界时返回 inf"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出累计桶计数（le 为上界）与常用分位数"""
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'buckets': buckets,
+            'count': self.count,
+            'sum': self.total,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
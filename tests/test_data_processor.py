@@ -0,0 +1,42 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+def test_encrypt_batches_keeps_order():
+    from eon.core.data.processor import DataProcessor
+    processor = DataProcessor({'fhe': {'poly_modulus_degree': 8192}})
+    data = np.arange(40, dtype=float)
+    batches = processor.split_data(data, batch_size=8)
+
+    try:
+        encrypted = processor.encrypt_batches(batches, workers=2)
+    finally:
+        processor.close()
+
+    assert [b.id for b in encrypted] == [b.id for b in batches]
+    for original, batch in zip(batches, encrypted):
+        assert isinstance(batch.data, bytes)
+        assert batch.metadata['encrypted']
+        vector = processor.fhe_engine.deserialize(batch.data)
+        np.testing.assert_array_almost_equal(
+            processor.fhe_engine.decrypt(vector), original.data, decimal=4
+        )
+
+def test_encrypt_worker_chunks_long_arrays():
+    from eon.core.data.processor import DataProcessor
+    processor = DataProcessor({'fhe': {'poly_modulus_degree': 8192}})
+    data = np.arange(5000, dtype=float) / 1000
+
+    try:
+        serialized = processor.submit_encrypt(data, workers=1).result(timeout=120)
+    finally:
+        processor.close()
+
+    engine = processor.fhe_engine
+    assert engine.chunker.is_chunked(serialized)
+    np.testing.assert_array_almost_equal(
+        engine.decrypt(engine.deserialize(serialized)), data, decimal=3
+    )
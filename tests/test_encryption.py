@@ -21,4 +21,191 @@ def test_fhe_engine():
         'coeff_mod_bit_sizes': [60, 40, 40, 60]
     }
     engine = FHEEngine(config)
-    assert engine is not None
\ No newline at end of file
+    assert engine is not None
+
+def test_shared_context(tmp_path):
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.fhe.context import ContextRegistry
+    config = {
+        'poly_modulus_degree': 8192,
+        'coeff_mod_bit_sizes': [60, 40, 40, 60]
+    }
+    assert FHEEngine(config).context is FHEEngine(dict(config)).context
+
+    context_path = tmp_path / "context.bin"
+    saved = {**config, 'scale': 30, 'context_path': str(context_path)}
+    context = FHEEngine(saved).context
+    assert context_path.exists()
+
+    ContextRegistry().clear()
+    loaded = FHEEngine(saved).context
+    assert loaded is not context
+    assert loaded.has_secret_key() and loaded.has_galois_keys()
+    # 私钥文件仅所有者可读写
+    assert context_path.stat().st_mode & 0o777 == 0o600
+
+    # 文件中的参数与配置不一致时拒绝加载
+    ContextRegistry().clear()
+    with pytest.raises(ValueError):
+        FHEEngine({**saved, 'scale': 40})
+
+    # 只加密的入口只加载已有上下文，文件缺失时不生成新密钥
+    missing = tmp_path / "missing.bin"
+    with pytest.raises(FileNotFoundError):
+        FHEEngine({**config, 'context_path': str(missing), 'create_context': False})
+    assert not missing.exists()
+
+def test_result_cache(tmp_path):
+    import time
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.fhe.cache import ResultCache
+    engine = FHEEngine({'cache': {'max_entries': 1, 'spill_path': str(tmp_path)}})
+    encrypted = engine.encrypt(np.array([1.0, 2.0, 3.0]))
+
+    first = engine.compute(encrypted, "sum", {}, data_id="data-a")
+    # 命中返回独立副本，原地修改不影响缓存内容
+    hit = engine.compute(encrypted, "sum", {}, data_id="data-a")
+    assert hit is not first
+    hit += 1.0
+    first += 1.0
+    np.testing.assert_array_almost_equal(engine.decrypt(hit), [7.0], decimal=4)
+    assert (ResultCache.make_key("data-a", "add", {'value': 1, 'scale': 2}) ==
+            ResultCache.make_key("data-a", "add", {'scale': 2, 'value': 1}))
+
+    # 内存层只保留一条，较早的结果溢出到磁盘后仍可命中
+    engine.compute(encrypted, "multiply", {'value': 2.0}, data_id="data-a")
+    spilled = engine.compute(encrypted, "sum", {}, data_id="data-a")
+    assert spilled is not first
+    np.testing.assert_array_almost_equal(engine.decrypt(spilled), [6.0], decimal=4)
+
+    stats = engine.cache.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses']) == (1, 1, 2)
+    assert stats['spills'] == 2
+
+    # 带额外操作数的计算不走缓存
+    other = engine.encrypt(np.array([1.0, 1.0, 1.0]))
+    result = engine.compute(encrypted, "expression", {'expression': "x * y"},
+                            data_id="data-a", operands={'y': other})
+    np.testing.assert_array_almost_equal(engine.decrypt(result), [1.0, 2.0, 3.0], decimal=3)
+    assert engine.cache.stats()['misses'] == 2
+
+    cache = ResultCache({'ttl': 0.01}, engine.serialize, engine.deserialize)
+    cache.put("key", first)
+    time.sleep(0.02)
+    assert cache.get("key") is None
+    assert cache.stats()['expirations'] == 1
+
+def test_expression_compiler():
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.fhe.expression import compile_expression
+    engine = FHEEngine()
+    x = engine.encrypt(np.array([1.0, 2.0, 3.0]))
+    y = engine.encrypt(np.array([4.0, 5.0, 6.0]))
+
+    # 连续的明文乘法合并为一次
+    plan = compile_expression("x * 2 * 3 - y")
+    assert (plan.depth, plan.multiplications) == (1, 1)
+    assert plan.variables == ["x", "y"]
+
+    result = engine.evaluate("sum(x * 3 + y)", {'x': x, 'y': y})
+    np.testing.assert_array_almost_equal(engine.decrypt(result), [33.0], decimal=3)
+    centered = engine.compute(x, "expression", {'expression': "x - mean(x)"})
+    np.testing.assert_array_almost_equal(engine.decrypt(centered), [-1.0, 0.0, 1.0], decimal=3)
+    # 输入密文不被原地修改，可重复使用
+    result = engine.evaluate("x * y * 2 + sum(x)", {'x': x, 'y': y})
+    np.testing.assert_array_almost_equal(engine.decrypt(result), [14.0, 26.0, 42.0], decimal=3)
+
+    with pytest.raises(ValueError):
+        engine.evaluate("x ** 8", {'x': x})
+    with pytest.raises(ValueError):
+        compile_expression("x.decrypt()")
+    with pytest.raises(ValueError):
+        engine.evaluate("x + z", {'x': x})
+
+def test_linear_and_polynomial_ops():
+    from eon.core.fhe.engine import FHEEngine
+    engine = FHEEngine()
+    x = engine.encrypt(np.array([1.0, 2.0, 3.0]))
+    y = engine.encrypt(np.array([4.0, 5.0, 6.0]))
+
+    score = engine.compute(x, "dot", {'vector': [0.5, 1.0, 2.0]})
+    np.testing.assert_array_almost_equal(engine.decrypt(score), [8.5], decimal=3)
+    score = engine.compute(x, "dot", {}, operands={'y': y})
+    np.testing.assert_array_almost_equal(engine.decrypt(score), [32.0], decimal=3)
+
+    projected = engine.compute(x, "matmul", {'matrix': [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]})
+    np.testing.assert_array_almost_equal(engine.decrypt(projected), [4.0, 5.0], decimal=3)
+    with pytest.raises(ValueError):
+        engine.compute(x, "matmul", {'matrix': [[1.0, 0.0]]})
+
+    fitted = engine.compute(x, "polyval", {'coefficients': [1.0, 0.0, 2.0]})
+    np.testing.assert_array_almost_equal(engine.decrypt(fitted), [3.0, 9.0, 19.0], decimal=3)
+
+def test_parameter_selection():
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.fhe.params import WorkloadProfile, select_parameters, resolve_parameters
+    shallow = select_parameters(WorkloadProfile(depth=1, precision_bits=8))
+    assert shallow['poly_modulus_degree'] == 4096
+    assert shallow['coeff_mod_bit_sizes'] == [39, 29, 39]
+    # 深度、精度或槽位增加时升级到更大的多项式次数
+    assert select_parameters(WorkloadProfile(depth=4))['poly_modulus_degree'] == 16384
+    assert select_parameters(WorkloadProfile(depth=1, slots=5000))['poly_modulus_degree'] == 16384
+    with pytest.raises(ValueError):
+        select_parameters(WorkloadProfile(depth=1, precision_bits=40))
+
+    # 显式参数优先于自动选择
+    resolved = resolve_parameters({'workload': {'depth': 1}, 'scale': 30})
+    assert resolved['scale'] == 30
+    assert resolve_parameters({}) == {}
+
+    engine = FHEEngine({'workload': {'expression': "mean((x - mean(x)) ** 2)",
+                                     'precision_bits': 8}})
+    assert engine.config['poly_modulus_degree'] == 8192
+    assert len(engine.config['coeff_mod_bit_sizes']) == 6
+    x = engine.encrypt(np.array([1.0, 2.0, 3.0, 4.0]))
+    variance = engine.evaluate("mean((x - mean(x)) ** 2)", {'x': x})
+    np.testing.assert_array_almost_equal(engine.decrypt(variance), [1.25], decimal=1)
+
+def test_chunked_ciphertext():
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.fhe.chunking import ChunkedCiphertext
+    engine = FHEEngine()
+    data = np.linspace(-1.0, 1.0, 10000)
+    chunked = engine.encrypt(data)
+    assert isinstance(chunked, ChunkedCiphertext)
+    assert (chunked.num_chunks, chunked.size()) == (3, 10000)
+
+    # 序列化为单个对象，节点侧反序列化后得到同样的分块密文
+    restored = engine.deserialize(engine.serialize(chunked))
+    np.testing.assert_array_almost_equal(engine.decrypt(restored), data, decimal=4)
+
+    # 加标量不影响补零槽位，跨块求和仍然正确
+    shifted = engine.compute(chunked, "add", {'value': 2.0})
+    total = engine.compute(shifted, "sum")
+    np.testing.assert_array_almost_equal(engine.decrypt(total), [20000.0], decimal=1)
+    mean = engine.compute(chunked, "mean")
+    np.testing.assert_array_almost_equal(engine.decrypt(mean), [0.0], decimal=3)
+
+    weights = np.full(10000, 0.5)
+    scaled = engine.compute(shifted, "multiply", {'value': weights})
+    np.testing.assert_array_almost_equal(engine.decrypt(scaled), (data + 2.0) * 0.5, decimal=3)
+    product = engine.decrypt(chunked * chunked + 1.0)
+    np.testing.assert_array_almost_equal(product, data * data + 1.0, decimal=3)
+    score = engine.compute(chunked, "dot", {}, operands={'y': shifted})
+    np.testing.assert_array_almost_equal(
+        engine.decrypt(score), [np.dot(data, data + 2.0)], decimal=1
+    )
+
+    with pytest.raises(ValueError):
+        engine.compute(chunked, "add", {'value': [1.0, 2.0]})
+    with pytest.raises(ValueError):
+        engine.compute(chunked, "polyval", {'coefficients': [1.0]})
+
+    # 默认串行执行；配置 chunk_workers 时使用线程池，close 后回到串行
+    assert engine.chunk_executor is None
+    pooled = FHEEngine({'chunk_workers': 2})
+    assert pooled.chunk_executor is not None
+    total = pooled.compute(pooled.encrypt(data), "sum")
+    np.testing.assert_array_almost_equal(pooled.decrypt(total), [0.0], decimal=2)
+    pooled.close()
+    assert pooled.chunk_executor is None
@@ -38,4 +38,80 @@ def test_base_imports():
 
 def test_client():
     from eon.core.node.client import ComputationClient
-    assert ComputationClient is not None
\ No newline at end of file
+    assert ComputationClient is not None
+
+
+def test_channel_pool_sharing():
+    from eon.core.node.client import ComputationClient
+    from eon.core.node.channel_pool import ChannelPool
+    pool = ChannelPool()
+    first = ComputationClient("localhost:50164", pool=pool)
+    second = ComputationClient("localhost:50164", pool=pool)
+    gzip = ComputationClient("localhost:50164", {'compression': "gzip"}, pool=pool)
+    assert first.channel is second.channel
+    assert gzip.channel is not first.channel
+    assert len(pool) == 2
+
+    first.close()
+    assert len(pool) == 2
+    second.close()
+    gzip.close()
+    assert len(pool) == 0
+
+def test_large_message():
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.client import ComputationClient
+    node = ComputeNode({'port': 50165})
+    node.start()
+    client = ComputationClient("localhost:50165", {'compression': "gzip"})
+    try:
+        payload = b"\x00" * (6 * 1024 * 1024)
+        results = list(client.submit_computation_stream(
+            [{'data': payload, 'operation': "invalid_op"}], chunk_size=len(payload)
+        ))
+        assert results[0]['status'] == "failed"
+    finally:
+        client.close()
+        node.stop()
+
+def test_load_aware_selection():
+    from eon.core.node.manager import NodeManager
+    manager = NodeManager({'max_tasks_per_node': 2})
+    for i in range(3):
+        manager.register_node({'id': f"node-{i}", 'address': f"localhost:{50170 + i}"})
+    try:
+        manager.update_node_metrics("node-0", {'cpu_percent': "90", 'queue_depth': "3"})
+        manager.complete_task("node-2", latency=5.0)
+        assert manager.select_node() == "node-1"
+        assert manager.select_node() == "node-1"
+        # node-1 达到任务上限后不再被选择
+        assert manager.select_node() == "node-0"
+        assert manager.select_node("power_of_two") in ("node-0", "node-2")
+
+        manager.complete_task("node-1", latency=0.1)
+        assert manager.select_node() == "node-1"
+    finally:
+        manager.shutdown()
+
+def test_parallel_health_check():
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.manager import NodeManager
+    node = ComputeNode({'port': 50166, 'id': "node-live"})
+    node.start()
+    manager = NodeManager({'health_check_timeout': 0.5, 'node_offline_threshold': 0})
+    manager.register_node({'id': "node-live", 'address': "localhost:50166"})
+    manager.register_node({'id': "node-dead", 'address': "localhost:50167"})
+    try:
+        snapshot = manager.check_nodes_health()
+        assert snapshot["node-live"]['status'] == "CONNECTED"
+        assert "queue_depth" in snapshot["node-live"]['metrics']
+        assert snapshot["node-dead"]['status'] == "DISCONNECTED"
+        assert snapshot["node-dead"]['failures'] == 1
+        assert manager.get_status_snapshot() is snapshot
+        assert manager.select_node() == "node-live"
+
+        manager.start_health_monitor()
+        manager.stop_health_monitor()
+    finally:
+        manager.shutdown()
+        node.stop()
@@ -44,4 +44,332 @@ def test_computation_workflow(test_config):
     )
     status_response = node.GetTaskStatus(status_request, None)
     assert status_response.task_id == submit_response.task_id
-    assert status_response.status in ["running", "completed", "failed"]
\ No newline at end of file
+    assert status_response.status in ["pending", "running", "completed", "failed"]
+
+def test_computation_execution(test_config):
+    import json
+    import time
+    import numpy as np
+    from eon.utils.config import Config
+    from eon.core.node.compute import ComputeNode
+    from eon.core.proto import computation_pb2
+
+    node = ComputeNode(Config(test_config))
+    engine = node.fhe_engine
+    data_id = node.put_data(engine.serialize(engine.encrypt(np.array([1.0, 2.0, 3.0]))))
+
+    submit_response = node.SubmitComputation(
+        computation_pb2.ComputationRequest(
+            data_id=data_id,
+            operation="add",
+            params=json.dumps({"value": 1.0}).encode()
+        ),
+        None
+    )
+    assert submit_response.status == "submitted"
+
+    status_request = computation_pb2.TaskStatusRequest(task_id=submit_response.task_id)
+    for _ in range(100):
+        status = node.GetTaskStatus(status_request, None)
+        if status.status in ("completed", "failed"):
+            break
+        time.sleep(0.05)
+
+    assert status.status == "completed"
+    assert status.progress == 1.0
+    result = engine.deserialize(node.get_data(status.result_id))
+    np.testing.assert_array_almost_equal(engine.decrypt(result), [2.0, 3.0, 4.0], decimal=4)
+
+    other_id = node.put_data(engine.serialize(engine.encrypt(np.array([4.0, 5.0, 6.0]))))
+    task, future = node._enqueue_task(
+        data_id, "expression", {'expression': "sum(x * 3 + y)", 'inputs': {'y': other_id}}
+    )
+    future.result()
+    assert task.status == "completed"
+    result = engine.deserialize(node.get_data(task.result_id))
+    np.testing.assert_array_almost_equal(engine.decrypt(result), [33.0], decimal=3)
+    node.stop()
+
+
+def test_streaming_and_batched_submission():
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.client import ComputationClient
+
+    node = ComputeNode({'port': 50161, 'stream_chunk_size': 4096})
+    node.start()
+    client = ComputationClient('localhost:50161')
+    engine = node.fhe_engine
+    try:
+        data = [engine.serialize(engine.encrypt(np.array([float(i), 1.0]))) for i in range(3)]
+        results = list(client.submit_computation_stream(
+            [
+                {'request_id': f"req-{i}", 'data': d, 'operation': "add", 'params': {'value': 2.0}}
+                for i, d in enumerate(data)
+            ] + [{'request_id': "bad", 'data': data[0], 'operation': "invalid_op"}],
+            chunk_size=8192
+        ))
+        by_id = {r['request_id']: r for r in results}
+        assert by_id["bad"]['status'] == "failed"
+        for i in range(3):
+            result = by_id[f"req-{i}"]
+            assert result['status'] == "completed"
+            decrypted = engine.decrypt(engine.deserialize(result['result']))
+            np.testing.assert_array_almost_equal(decrypted, [i + 2.0, 3.0], decimal=4)
+
+        data_id = node.put_data(data[0])
+        responses = client.submit_computations([
+            {'data_id': data_id, 'operation': "multiply", 'params': {'value': 2.0}},
+            {'data_id': data_id, 'operation': "invalid_op"}
+        ])
+        assert [r['status'] for r in responses] == ["submitted", "failed"]
+    finally:
+        client.close()
+        node.stop()
+
+
+def test_async_server_mode():
+    import time
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.coordinator import CoordinatorNode
+    from eon.core.node.client import ComputationClient
+    from eon.core.proto import computation_pb2
+
+    node = ComputeNode({'port': 50162, 'server_mode': "async"})
+    node.start()
+    client = ComputationClient('localhost:50162')
+    engine = node.fhe_engine
+    try:
+        data = engine.serialize(engine.encrypt(np.array([1.0, 2.0])))
+        response = client.submit_computation(node.put_data(data), "add", {'value': 1.0})
+        assert response['status'] == "submitted"
+
+        results = list(client.submit_computation_stream(
+            [{'data': data, 'operation': "multiply", 'params': {'value': 3.0}}]
+        ))
+        assert results[0]['status'] == "completed"
+        np.testing.assert_array_almost_equal(
+            engine.decrypt(engine.deserialize(results[0]['result'])), [3.0, 6.0], decimal=4
+        )
+
+        for _ in range(100):
+            status = node.GetTaskStatus(
+                computation_pb2.TaskStatusRequest(task_id=response['task_id']), None
+            )
+            if status.status == "completed":
+                break
+            time.sleep(0.05)
+        assert status.status == "completed"
+    finally:
+        client.close()
+        node.stop()
+
+    coordinator = CoordinatorNode({'port': 50163, 'server_mode': "async"})
+    coordinator.stop()
+
+def test_tree_aggregation():
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.coordinator import CoordinatorNode
+    from eon.core.node.client import ComputationClient
+
+    modes = ["threaded", "async", "threaded"]
+    nodes = [
+        ComputeNode({'port': 50175 + i, 'server_mode': mode})
+        for i, mode in enumerate(modes)
+    ]
+    coordinator = CoordinatorNode({'port': 50168})
+    engine = coordinator.fhe_engine
+    rows = [np.array([float(i), float(i + 1)]) for i in range(7)]
+    shards = {}
+    try:
+        for i, node in enumerate(nodes):
+            node.start()
+            node_id = f"node-{i}"
+            coordinator.register_node({'id': node_id, 'address': f"localhost:{50175 + i}"})
+            client = ComputationClient(f"localhost:{50175 + i}")
+            shards[node_id] = [
+                client.put_data(engine.serialize(engine.encrypt(row)))
+                for row in rows[i::len(nodes)]
+            ]
+            client.close()
+
+        total = np.concatenate(rows)
+        finals = set()
+        for operation, expected in [
+            ("sum", [total.sum()]),
+            ("mean", [total.mean()]),
+            ("add", np.sum(rows, axis=0))
+        ]:
+            result = engine.deserialize(coordinator.aggregate(shards, operation))
+            np.testing.assert_array_almost_equal(engine.decrypt(result), expected, decimal=3)
+            # 中间结果与中转副本已删除，只留下输入分片和根节点上的最终结果
+            extra = set(nodes[0].data) - set(shards['node-0']) - finals
+            assert len(extra) == 1
+            finals |= extra
+            for i, node in enumerate(nodes[1:], 1):
+                assert set(node.data) == set(shards[f"node-{i}"])
+
+        with pytest.raises(ValueError):
+            coordinator.aggregate(shards, "multiply")
+    finally:
+        coordinator.stop()
+        for node in nodes:
+            node.stop()
+
+
+def test_task_coalescing():
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+
+    node = ComputeNode({'port': 50180, 'coalesce_window': 0.05, 'coalesce_max_batch': 4})
+    engine = node.fhe_engine
+    batches = []
+    run_batch = node._run_batch
+    node._run_batch = lambda batch: (batches.append(len(batch)), run_batch(batch))
+    try:
+        data_ids = [
+            node.put_data(engine.serialize(engine.encrypt(np.array([float(i), 1.0]))))
+            for i in range(6)
+        ]
+        submitted = [node._enqueue_task(data_id, "add", {'value': 1.0}) for data_id in data_ids]
+        # 参数不同的任务不与上面的任务合并
+        submitted.append(node._enqueue_task(data_ids[0], "add", {'value': 2.0}))
+        for task, future in submitted:
+            future.result(timeout=10)
+            assert task.status == "completed"
+
+        assert sorted(batches) == [1, 2, 4]
+        expected = [[i + 1.0, 2.0] for i in range(6)] + [[2.0, 3.0]]
+        for (task, _), values in zip(submitted, expected):
+            result = engine.decrypt(engine.deserialize(node.get_data(task.result_id)))
+            np.testing.assert_array_almost_equal(result, values, decimal=4)
+        assert node.outstanding_tasks == 0
+
+        # 同一批内数据ID相同的任务只计算一次，共享结果
+        executed = []
+        execute = node._execute
+        node._execute = lambda task: (executed.append(task.id), execute(task))
+        duplicates = [node._enqueue_task(data_ids[1], "multiply", {'value': 3.0}) for _ in range(3)]
+        for task, future in duplicates:
+            future.result(timeout=10)
+            assert task.status == "completed"
+        assert len(executed) == 1
+        assert len({task.result_id for task, _ in duplicates}) == 1
+        result = engine.decrypt(engine.deserialize(node.get_data(duplicates[0][0].result_id)))
+        np.testing.assert_array_almost_equal(result, [3.0, 3.0], decimal=3)
+
+        # 执行器拒绝批次时只回退排队计数，不影响执行计数
+        node.executor.shutdown()
+        task, future = node._enqueue_task(data_ids[2], "add", {'value': 1.0})
+        future.result(timeout=10)
+        assert task.status == "failed"
+        assert (node.outstanding_tasks, node.running_tasks) == (0, 0)
+    finally:
+        node.stop()
+
+def test_task_cancellation():
+    import time
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.client import ComputationClient
+
+    node = ComputeNode({'port': 50182, 'coalesce_window': 0.2})
+    node.start()
+    client = ComputationClient('localhost:50182')
+    engine = node.fhe_engine
+    try:
+        data_id = node.put_data(engine.serialize(engine.encrypt(np.array([1.0, 2.0]))))
+        # 合并窗口内的任务尚未执行，取消后不会再计算
+        submitted = client.submit_computation(data_id, "add", {'value': 1.0})
+        assert client.cancel_task(submitted['task_id'])['status'] == "cancelled"
+        status = client.wait_for_task(submitted['task_id'], timeout=5)
+        assert status['status'] == "cancelled"
+        time.sleep(0.3)
+        assert client.get_task_status(submitted['task_id'])['result_id'] == ""
+        assert node.outstanding_tasks == 0
+        assert client.cancel_task("missing")['status'] == "error"
+    finally:
+        client.close()
+        node.stop()
+
+def test_manager_cancel_propagates_to_node():
+    import numpy as np
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.client import ComputationClient
+    from eon.core.scheduler import TaskManager, Task
+
+    node = ComputeNode({'port': 50184, 'coalesce_window': 0.5})
+    node.start()
+    client = ComputationClient('localhost:50184')
+    manager = TaskManager({})
+    engine = node.fhe_engine
+    try:
+        data_id = node.put_data(engine.serialize(engine.encrypt(np.array([1.0, 2.0]))))
+        # 已派发到节点、仍在合并窗口中的任务随管理器的取消一起取消
+        manager.submit_task(Task("dispatched", 1, data_id, "add", {'value': 1.0}))
+        task = manager.get_next_task()
+        submitted = client.submit_computation(data_id, task.operation, task.params)
+        assert manager.assign_node(task.id, 'localhost:50184', submitted['task_id'])
+        assert manager.cancel_task(task.id)
+        assert client.get_task_status(submitted['task_id'])['status'] == "cancelled"
+
+        # 派发期间已被取消的任务在记录派发时取消节点上的任务
+        manager.submit_task(Task("late", 1, data_id, "add", {'value': 2.0}))
+        task = manager.get_next_task()
+        submitted = client.submit_computation(data_id, task.operation, task.params)
+        assert manager.cancel_task(task.id)
+        assert not manager.assign_node(task.id, 'localhost:50184', submitted['task_id'])
+        assert client.get_task_status(submitted['task_id'])['status'] == "cancelled"
+    finally:
+        client.close()
+        node.stop()
+
+def test_bounded_data_store(tmp_path):
+    from eon.core.node.compute import ComputeNode, NodeTask
+    from eon.core.node.client import ComputationClient
+
+    node = ComputeNode({
+        'port': 50183, 'max_data_bytes': 250, 'max_retained_tasks': 2,
+        'storage_path': str(tmp_path)
+    })
+    node.start()
+    client = ComputationClient('localhost:50183')
+    try:
+        ids = [node.put_data(bytes([i]) * 100) for i in range(3)]
+        # 超出容量时淘汰最久未访问的内存条目，落盘副本仍可读取
+        assert list(node.data) == ids[1:]
+        assert node.data_bytes == 200
+        assert node.get_data(ids[0]) == bytes([0]) * 100
+
+        assert client.delete_data(ids[1])
+        assert not client.delete_data(ids[1])
+        with pytest.raises(ValueError):
+            node.get_data(ids[1])
+
+        # 落盘副本总量也有上限，超出时删除最久未访问的数据
+        node.max_disk_bytes = 250
+        node.put_data(bytes([3]) * 100)
+        assert not (tmp_path / f"{ids[2]}.data").exists()
+        with pytest.raises(ValueError):
+            node.get_data(ids[2])
+        assert node.disk_bytes == 200
+
+        # 闲置超时的数据连同只剩磁盘副本的数据一起删除
+        node.data_ttl = 0.0
+        node.put_data(b'fresh')
+        assert list(node.data) == [node.put_data(b'fresh')]
+        assert not (tmp_path / f"{ids[0]}.data").exists()
+        assert list(node.disk) == list(node.data)
+    finally:
+        client.close()
+        node.stop()
+
+    # 未结束的任务不阻塞其后已结束任务的淘汰
+    stuck = NodeTask(id="stuck", data_id="", operation="add", params={})
+    node._track_task(stuck)
+    for i in range(3):
+        node._track_task(NodeTask(id=f"done-{i}", data_id="", operation="add",
+                                  params={}, status='completed'))
+    assert list(node.tasks) == ["stuck", "done-2"]
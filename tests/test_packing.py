@@ -0,0 +1,46 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+def test_packing_layout():
+    from eon.core.fhe.packing import SlotPacker, PackingLayout
+    packer = SlotPacker(slot_count=8)
+    layout = packer.plan([3, 4, 2, 8])
+    assert layout.ciphertext_indices == [0, 0, 1, 2]
+    assert layout.offsets == [0, 3, 0, 0]
+    assert PackingLayout.from_dict(layout.to_dict()) == layout
+
+    with pytest.raises(ValueError):
+        packer.plan([9])
+
+def test_packed_encrypt_decrypt():
+    from eon.core.fhe.engine import FHEEngine
+    engine = FHEEngine({'poly_modulus_degree': 8192})
+    records = [np.array([1.0, 2.0, 3.0]), np.array([4.0]), np.array([5.0, 6.0])]
+
+    packed = engine.encrypt_packed(records)
+    assert len(packed.vectors) == 1
+
+    decrypted = engine.decrypt_packed(packed)
+    for original, result in zip(records, decrypted):
+        np.testing.assert_array_almost_equal(original, result, decimal=4)
+
+def test_packed_sum_mean():
+    from eon.core.fhe.engine import FHEEngine
+    engine = FHEEngine({'poly_modulus_degree': 8192})
+    records = [np.array([1.0, 2.0, 3.0]), np.array([4.0]), np.array([5.0, 6.0])]
+    packed = engine.encrypt_packed(records)
+
+    sums = engine.decrypt_packed(engine.compute(packed, "sum"))
+    np.testing.assert_array_almost_equal(
+        [s[0] for s in sums], [6.0, 4.0, 11.0], decimal=3
+    )
+
+    shifted = engine.compute(packed, "add", {"value": 1.0})
+    means = engine.decrypt_packed(engine.compute(shifted, "mean"))
+    np.testing.assert_array_almost_equal(
+        [m[0] for m in means], [3.0, 5.0, 6.5], decimal=3
+    )
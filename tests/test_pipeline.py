@@ -0,0 +1,77 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+@pytest.fixture(scope="module")
+def processor():
+    from eon.core.data.processor import DataProcessor
+    processor = DataProcessor({'fhe': {'poly_modulus_degree': 8192}})
+    yield processor
+    processor.close()
+
+def decrypt_frames(processor, path):
+    from eon.core.data.pipeline import read_frames
+    engine = processor.fhe_engine
+    with open(path, 'rb') as f:
+        return np.concatenate([
+            engine.decrypt(engine.deserialize(frame)) for frame in read_frames(f)
+        ])
+
+@pytest.mark.parametrize("suffix", [".npy", ".npz", ".csv"])
+def test_streaming_encrypt_file(processor, tmp_path, suffix):
+    from eon.core.data.pipeline import StreamingEncryptor
+    data = np.arange(120, dtype=float).reshape(40, 3)
+    input_path = tmp_path / f"input{suffix}"
+    if suffix == ".npy":
+        np.save(input_path, data)
+    elif suffix == ".npz":
+        np.savez_compressed(input_path, data=data)
+    else:
+        pd.DataFrame(data, columns=["a", "b", "c"]).to_csv(input_path, index=False)
+
+    encryptor = StreamingEncryptor(
+        processor, {'chunk_size': 32, 'workers': 1, 'max_in_flight': 2}
+    )
+    output_path = tmp_path / "output.bin"
+    stats = encryptor.encrypt_file(input_path, output_path)
+
+    assert stats['chunks'] == 4
+    assert stats['values'] == 120
+    np.testing.assert_array_almost_equal(
+        decrypt_frames(processor, output_path), data.ravel(), decimal=4
+    )
+
+def test_data_manager_iter_data(tmp_path):
+    from eon.core.data.manager import DataManager
+    manager = DataManager({'storage_path': str(tmp_path)})
+    data = np.random.rand(100)
+    data_id = manager.store_data(data)
+
+    chunks = list(manager.iter_data(data_id, chunk_size=30))
+    assert [len(c) for c in chunks] == [30, 30, 30, 10]
+    np.testing.assert_array_almost_equal(np.concatenate(chunks), data)
+
+def test_iter_npy_rejects_fortran_order(tmp_path):
+    from eon.core.data.pipeline import iter_npy
+    path = tmp_path / "fortran.npy"
+    np.save(path, np.asfortranarray(np.arange(6, dtype=float).reshape(2, 3)))
+    with open(path, 'rb') as f:
+        with pytest.raises(ValueError):
+            next(iter_npy(f, 4))
+
+def test_cli_encrypt_requires_context(tmp_path):
+    from eon.cli import main
+    input_path = tmp_path / "input.npy"
+    np.save(input_path, np.arange(4, dtype=float))
+    output_path = tmp_path / "output.bin"
+    # 未指定上下文时拒绝加密，避免生成无法解密的密文
+    with pytest.raises(ValueError):
+        main(['encrypt', '--input', str(input_path), '--output', str(output_path)])
+    with pytest.raises(FileNotFoundError):
+        main(['encrypt', '--input', str(input_path), '--output', str(output_path),
+              '--context', str(tmp_path / "missing.bin")])
+    assert not output_path.exists()
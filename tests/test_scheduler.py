@@ -0,0 +1,408 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+def test_task_store_eviction():
+    from eon.core.scheduler.task_manager import TaskManager, Task
+    manager = TaskManager({'max_retained_tasks': 3, 'task_ttl': 60})
+    for i in range(5):
+        manager.submit_task(Task(f"task-{i}", 1, None, "add"))
+    assert not hasattr(manager.store.get("task-0"), '__dict__')
+    # 未结束的任务不会因容量被淘汰
+    assert len(manager.store) == 5
+    assert [t['id'] for t in manager.list_tasks("PENDING", limit=2)] == ["task-0", "task-1"]
+    assert [t['id'] for t in manager.list_tasks(limit=2)] == ["task-4", "task-3"]
+
+    for _ in range(3):
+        task = manager.get_next_task()
+        manager.complete_task(task.id, result=1)
+    # 结束的任务超出容量后从最早完成的开始淘汰
+    assert len(manager.store) == 3
+    assert manager.store.get("task-0") is None
+    assert manager.get_task_status("task-2")['status'] == "COMPLETED"
+    assert manager.store.count("PENDING") == 2
+    with pytest.raises(ValueError):
+        manager.get_task_status("task-0")
+
+    # 超过保留期的结束任务被清理
+    assert manager.store.evict_expired(now=manager.store.get("task-2").completed_at + 61) == 1
+    assert manager.store.count("COMPLETED") == 0
+
+def test_deadline_scheduling():
+    import time
+    from eon.core.scheduler.task_manager import TaskManager, Task
+    manager = TaskManager({'priority_aging_interval': 10.0})
+    now = time.time()
+    manager.submit_task(Task("no-deadline", 1, None, "add"))
+    manager.submit_task(Task("late", 1, None, "add", deadline=now + 60))
+    manager.submit_task(Task("early", 1, None, "add", deadline=now + 30))
+    manager.submit_task(Task("low", 2, None, "add"))
+    manager.store.get("low").created_at = now - 25
+    manager.submit_task(Task("expired", 1, None, "add", deadline=now - 1))
+    assert manager.get_task_status("expired")['status'] == "SHED"
+
+    # 同类内截止时间最早优先；低优先级任务等待两个老化周期后越过上一级
+    assert [manager.get_next_task().id for _ in range(4)] == ["low", "early", "late", "no-deadline"]
+
+    # 排队中已来不及完成的任务在出队前被丢弃
+    manager.submit_task(Task("doomed", 0, None, "add", deadline=time.time() + 0.01))
+    time.sleep(0.02)
+    assert manager.get_next_task() is None
+    assert manager.get_task_status("doomed")['status'] == "SHED"
+
+    metrics = manager.get_queue_metrics()
+    assert metrics['shed'] == {1: 1, 0: 1}
+    assert metrics['wait_seconds'][1]['count'] == 3
+    assert metrics['wait_seconds'][2]['p99'] == 30.0
+
+def test_admission_control():
+    from eon.core.scheduler import TaskManager, Task, AdmissionRejected
+    manager = TaskManager({
+        'max_queued_tasks': 3,
+        'admission': {'low_watermark': 1, 'tenants': {'alice': {'rate': 0.001, 'burst': 2}}}
+    })
+    for i in range(3):
+        manager.submit_task(Task(f"task-{i}", 1, None, "add"))
+    with pytest.raises(AdmissionRejected) as rejected:
+        manager.submit_task(Task("task-3", 1, None, "add"))
+    assert rejected.value.retry_after > 0
+    assert manager.store.get("task-3") is None
+
+    # 回落到低水位线之前保持拒绝
+    manager.get_next_task()
+    with pytest.raises(AdmissionRejected):
+        manager.submit_task(Task("task-4", 1, None, "add"))
+    manager.get_next_task()
+    manager.submit_task(Task("task-5", 1, None, "add"))
+
+    # 租户令牌桶用尽后限流，其他租户不受影响
+    manager.get_next_task()
+    manager.get_next_task()
+    manager.submit_task(Task("a-0", 1, None, "add"), tenant="alice")
+    manager.submit_task(Task("a-1", 1, None, "add"), tenant="alice")
+    with pytest.raises(AdmissionRejected) as rejected:
+        manager.submit_task(Task("a-2", 1, None, "add"), tenant="alice")
+    assert rejected.value.reason == "rate_limited"
+    manager.submit_task(Task("b-0", 1, None, "add"), tenant="bob")
+    assert manager.get_queue_metrics()['rejected'] == {'overloaded': 2, 'rate_limited': 1}
+
+def test_queue_admission_ignores_cancelled():
+    import asyncio
+    from eon.core.queue.task_queue import TaskQueue
+    from eon.core.scheduler import AdmissionRejected
+
+    async def run():
+        queue = TaskQueue({'max_queued_tasks': 2, 'admission': {'low_watermark': 1}})
+        ids = [await queue.submit_task("noop", {}) for _ in range(2)]
+        with pytest.raises(AdmissionRejected):
+            await queue.submit_task("noop", {})
+        # 取消的任务仍留在堆中等待惰性删除，但不再占用准入深度
+        for task_id in ids:
+            assert queue.cancel_task(task_id)
+        assert (queue.queue.qsize(), queue.queued_tasks) == (2, 0)
+        parent = await queue.submit_task("noop", {})
+        assert queue.queued_tasks == 1
+
+        # 等待上游的任务也占用准入深度
+        await queue.submit_task("noop", {}, depends_on=[parent])
+        with pytest.raises(AdmissionRejected):
+            await queue.submit_task("noop", {}, depends_on=[parent])
+
+    asyncio.run(run())
+
+def test_node_backpressure():
+    from eon.core.node.compute import ComputeNode
+    from eon.core.node.client import ComputationClient
+
+    node = ComputeNode({
+        'port': 50181,
+        'admission': {'high_watermark': 0, 'low_watermark': -1, 'retry_after': 0.5}
+    })
+    node.start()
+    client = ComputationClient('localhost:50181')
+    try:
+        response = client.submit_computation("missing", "add", {'value': 1.0})
+        assert response['status'] == "rejected"
+        assert response['retry_after'] == 0.5
+        # 批量提交中被拒绝的项单独标记，整批请求不失败
+        assert [r['status'] for r in client.submit_computations(
+            [{'data_id': "missing", 'operation': "add"}]
+        )] == ["rejected"]
+    finally:
+        client.close()
+        node.stop()
+
+def test_fair_queuing():
+    from eon.core.scheduler import TaskManager, Task
+    manager = TaskManager({'tenant_weights': {'gold': 2}, 'max_concurrent_tasks': 100})
+    for i in range(100):
+        manager.submit_task(Task(f"bulk-{i}", 1, None, "add"), tenant="bulk")
+    for i in range(4):
+        manager.submit_task(Task(f"gold-{i}", 1, None, "add"), tenant="gold")
+    manager.submit_task(Task("other-0", 1, None, "add"))
+
+    order = [manager.get_next_task().id for _ in range(8)]
+    # 大量积压的租户不会阻塞其他租户，权重为2的租户每轮出队两个
+    assert order == ["bulk-0", "gold-0", "gold-1", "other-0",
+                     "bulk-1", "gold-2", "gold-3", "bulk-2"]
+
+    metrics = manager.get_queue_metrics()['tenants']
+    assert metrics['bulk']['queued'] == 97
+    assert metrics['gold'] == {'queued': 0, 'weight': 2,
+                               'wait_seconds': metrics['gold']['wait_seconds']}
+    assert metrics['gold']['wait_seconds']['count'] == 4
+    assert metrics['default']['wait_seconds']['count'] == 1
+    assert manager.get_task_status("gold-0")['tenant'] == "gold"
+
+    assert manager.cancel_task("bulk-50")
+    assert len(manager.task_queue) == 96
+
+def test_task_manager_recovery(tmp_path):
+    from eon.core.scheduler.task_manager import TaskManager, Task
+    config = {'wal_path': str(tmp_path), 'wal_compact_records': 4}
+    manager = TaskManager(config)
+    for i in range(3):
+        manager.submit_task(Task(f"task-{i}", 1, {'blob': b'\x00\x01'}, "add", {'value': i}))
+    task = manager.get_next_task()
+    manager.complete_task(task.id, result=[1.0])
+    manager.get_next_task()
+    manager.close()
+
+    # 末尾写了一半的记录被忽略
+    segment = sorted(tmp_path.glob("*.wal"))[-1]
+    with open(segment, 'ab') as f:
+        f.write(b'\x00\x00\x01\x00partial')
+
+    recovered = TaskManager(config)
+    assert recovered.get_task_status("task-0")['status'] == "COMPLETED"
+    assert recovered.store.get("task-0").result == [1.0]
+    # 执行中断的任务与未执行的任务按提交顺序重新入队
+    assert [recovered.get_next_task().id for _ in range(2)] == ["task-1", "task-2"]
+    assert recovered.store.get("task-1").data == {'blob': b'\x00\x01'}
+    recovered.close()
+    assert len(list(tmp_path.glob("*.snapshot"))) == 1
+
+def test_unserializable_result(tmp_path):
+    import numpy as np
+    from eon.core.fhe.engine import FHEEngine
+    from eon.core.scheduler.task_manager import TaskManager, Task
+    config = {'wal_path': str(tmp_path)}
+    manager = TaskManager(config)
+    for task_id in ("cipher", "opaque"):
+        manager.submit_task(Task(task_id, 1, None, "add"))
+    encrypted = FHEEngine({}).encrypt(np.array([1.0, 2.0]))
+    manager.complete_task(manager.get_next_task().id, result=encrypted)
+    # 无法写入日志的结果使任务失败，而不是恢复后重新执行
+    with pytest.raises(TypeError):
+        manager.complete_task(manager.get_next_task().id, result=object())
+    assert manager.get_task_status("opaque")['status'] == "FAILED"
+    manager.close()
+
+    recovered = TaskManager(config)
+    assert recovered.store.get("cipher").result == encrypted.serialize()
+    assert recovered.get_task_status("opaque")['status'] == "FAILED"
+    assert recovered.get_next_task() is None
+    recovered.close()
+
+def test_task_queue_recovery(tmp_path):
+    import asyncio
+    from eon.core.queue.task_queue import TaskQueue
+
+    async def run():
+        queue = TaskQueue({'wal_path': str(tmp_path), 'wal_compact_records': 50})
+        ids = await asyncio.gather(*[
+            queue.submit_task("compute", {'index': i}) for i in range(200)
+        ])
+        queue.clean_completed_tasks()
+        await asyncio.sleep(0.05)
+        queue.close()
+        return ids
+
+    ids = asyncio.run(run())
+    recovered = TaskQueue({'wal_path': str(tmp_path)})
+    assert len(recovered.get_pending_tasks()) == 200
+    assert recovered.get_task_status(ids[-1])['status'] == 'pending'
+    assert recovered.queue.qsize() == 200
+    recovered.close()
+
+def test_task_dependencies():
+    import asyncio
+    from eon.core.queue.task_queue import TaskQueue
+
+    async def run():
+        queue = TaskQueue({})
+        running = []
+
+        async def shard_sum(data):
+            running.append(data['shard'])
+            await asyncio.sleep(0.05)
+            return sum(data['values'])
+
+        async def mean(data):
+            return sum(data['inputs']) / len(data['inputs'])
+
+        async def fail(data):
+            raise RuntimeError("shard lost")
+
+        queue.register_handler("shard_sum", shard_sum)
+        queue.register_handler("mean", mean)
+        queue.register_handler("fail", fail)
+        shards = [await queue.submit_task("shard_sum", {'shard': i, 'values': [i, i]})
+                  for i in range(4)]
+        total = await queue.submit_task("mean", {}, depends_on=shards)
+        assert queue.get_task_status(total)['status'] == 'waiting'
+
+        broken = await queue.submit_task("fail", {})
+        downstream = await queue.submit_task("mean", {}, depends_on=[shards[0], broken])
+        chained = await queue.submit_task("mean", {}, depends_on=[downstream])
+
+        start = asyncio.get_running_loop().time()
+        await queue.start_workers(4)
+        await asyncio.wait_for(queue.queue.join(), timeout=10)
+        # 相互独立的分片并行执行
+        assert asyncio.get_running_loop().time() - start < 0.15
+        await queue.stop()
+
+        assert queue.get_task_status(total)['result'] == 3.0
+        assert queue.get_task_status(downstream)['status'] == 'failed'
+        assert queue.get_task_status(chained)['error'] == f"Upstream task failed: {downstream}"
+        assert not queue.waiting and not queue.dependents
+
+        late = await queue.submit_task("mean", {}, depends_on=[total])
+        assert queue.get_task_status(late)['status'] == 'pending'
+        with pytest.raises(ValueError):
+            await queue.submit_task("mean", {}, depends_on=["missing"])
+
+    asyncio.run(run())
+
+def test_task_cancellation():
+    import asyncio
+    from eon.core.queue.task_queue import TaskQueue
+
+    async def run():
+        queue = TaskQueue({'task_timeout': 0.1})
+
+        async def hang(data):
+            await asyncio.sleep(60)
+
+        async def echo(data):
+            return data
+
+        queue.register_handler("hang", hang)
+        queue.register_handler("echo", echo)
+        await queue.start_workers(1)
+        timed_out = await queue.submit_task("hang", {}, priority=0)
+        running = await queue.submit_task("hang", {}, timeout=60)
+        queued = await queue.submit_task("echo", {}, priority=2)
+        downstream = await queue.submit_task("echo", {}, depends_on=[queued])
+
+        for _ in range(100):
+            if queue.get_task_status(running)['status'] == 'running':
+                break
+            await asyncio.sleep(0.05)
+        assert queue.get_task_status(timed_out)['error'] == "Task timed out after 0.1s"
+        assert queue.get_task_status(running)['status'] == 'running'
+        assert queue.cancel_task(queued)
+        assert queue.get_task_status(downstream)['status'] == 'failed'
+
+        # 取消执行中的任务后工作协程立即处理后续任务
+        assert queue.cancel_task(running)
+        after = await queue.submit_task("echo", {'value': 1})
+        await asyncio.wait_for(queue.queue.join(), timeout=5)
+        assert queue.get_task_status(running)['status'] == 'cancelled'
+        assert queue.get_task_status(after)['result'] == {'value': 1}
+        assert not queue.cancel_task(after)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    import time
+    from eon.core.scheduler import TaskManager, Task
+    manager = TaskManager({'task_timeout': 10})
+    manager.submit_task(Task("queued", 1, None, "add"))
+    manager.submit_task(Task("active", 1, None, "add"))
+    manager.submit_task(Task("slow", 1, None, "add"))
+    assert manager.cancel_task("queued")
+    assert manager.get_next_task().id == "active"
+    assert manager.cancel_task("active")
+    assert not manager.active_tasks
+    manager.complete_task("active", result=1)
+    assert manager.get_task_status("active")['status'] == "CANCELLED"
+    assert not manager.cancel_task("active")
+
+    slow = manager.get_next_task()
+    slow.started_at = time.time() - 11
+    assert manager.get_next_task() is None
+    assert manager.get_task_status("slow")['status'] == "FAILED"
+    assert not manager.active_tasks
+
+def _encrypted_sum(data, engine):
+    encrypted = engine.deserialize(bytes.fromhex(data['ciphertext']))
+    result = engine.compute(encrypted, "sum")
+    return {'sum': engine.serialize(result).hex(), 'pid': os.getpid(),
+            'has_secret_key': engine.context.has_secret_key()}
+
+def test_process_pool_workers():
+    import asyncio
+    import numpy as np
+    from eon.core.queue.task_queue import TaskQueue
+
+    async def run():
+        queue = TaskQueue({'process_workers': 2})
+        queue.register_handler("encrypted_sum", _encrypted_sum, cpu_bound=True)
+        await queue.start_workers(1)
+        assert len(queue.workers) == 2
+        # 父进程加密，工作进程用下发的公钥上下文计算，父进程解密
+        engine = queue.fhe_engine
+        ids = [
+            await queue.submit_task("encrypted_sum", {
+                'ciphertext': engine.serialize(engine.encrypt(np.array([1.0, 2.0, i]))).hex()
+            })
+            for i in range(4)
+        ]
+        await asyncio.wait_for(queue.queue.join(), timeout=60)
+        statuses = [queue.get_task_status(task_id) for task_id in ids]
+        await queue.stop()
+        return engine, statuses
+
+    engine, statuses = asyncio.run(run())
+    assert [s['status'] for s in statuses] == ['completed'] * 4
+    sums = [engine.decrypt(engine.deserialize(bytes.fromhex(s['result']['sum'])))[0]
+            for s in statuses]
+    assert [round(value, 3) for value in sums] == [3.0, 4.0, 5.0, 6.0]
+    assert all(s['result']['pid'] != os.getpid() for s in statuses)
+    assert not any(s['result']['has_secret_key'] for s in statuses)
+
+def _sleep(data, engine):
+    import time
+    time.sleep(data['seconds'])
+    return {'pid': os.getpid()}
+
+def test_process_pool_recycled_on_timeout():
+    import asyncio
+    import time
+    from eon.core.queue.task_queue import TaskQueue
+
+    async def run():
+        queue = TaskQueue({'process_workers': 1})
+        queue.register_handler("sleep", _sleep, cpu_bound=True)
+        await queue.start_workers(1)
+        first_pool = queue.process_pool
+        # 超时的CPU任务所在进程被终止，后续任务不必等它执行完
+        hung = await queue.submit_task("sleep", {'seconds': 60}, timeout=0.5)
+        started = time.monotonic()
+        quick = await queue.submit_task("sleep", {'seconds': 0})
+        await asyncio.wait_for(queue.queue.join(), timeout=30)
+        elapsed = time.monotonic() - started
+        statuses = queue.get_task_status(hung), queue.get_task_status(quick)
+        recycled = queue.process_pool is not first_pool
+        await queue.stop()
+        return statuses, elapsed, recycled
+
+    (hung, quick), elapsed, recycled = asyncio.run(run())
+    assert hung['status'] == 'failed'
+    assert hung['error'] == "Task timed out after 0.5s"
+    assert quick['status'] == 'completed'
+    assert recycled and elapsed < 30